@@ -0,0 +1,78 @@
+"""
+Entry point for `python -m kalaha`.
+
+    python -m kalaha                    # terminal / GUI menu (same as main.py)
+    python -m kalaha --startup-profile  # report where start-up time goes
+    python -m kalaha --profile-search 10  # search statistics and per-function timings
+
+For a per-module breakdown combine it with Python's own import timer:
+    python -X importtime -m kalaha --startup-profile
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+from typing import Callable, List, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Modules that must stay out of the minimax start-up path
+HEAVY_MODULES = ("pygame", "numpy", "torch", "sb3_contrib", "stable_baselines3")
+
+def _timed(label: str, fn: Callable[[], object], rows: List[Tuple[str, str]]) -> None:
+    start = time.perf_counter()
+    try:
+        fn()
+        rows.append((label, f"{(time.perf_counter() - start) * 1000:8.1f} ms"))
+    except ImportError as e:
+        rows.append((label, f"unavailable ({e.name})"))
+
+def startup_profile() -> None:
+    """
+    Times the start-up phases: importing the entry point, opening the
+    solved-position stores on first search, and (separately) the GUI and
+    RL stacks that are only imported on demand.
+    """
+    rows: List[Tuple[str, str]] = []
+    _timed("import kalaha.main", lambda: importlib.import_module("kalaha.main"), rows)
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    def first_search() -> None:
+        from kalaha.ai_engine import get_best_move
+        from kalaha.game_logic import initial_state
+        get_best_move(initial_state(), 0, depth=1)
+
+    _timed("first search (opens tablebase/DB)", first_search, rows)
+    _timed("import GUI (on demand)", lambda: importlib.import_module("kalaha.gui_app"), rows)
+    _timed("import RL stack (on demand)", lambda: importlib.import_module("sb3_contrib"), rows)
+
+    print("\n--- Startup profile ---")
+    for label, value in rows:
+        print(f"{label:36} {value}")
+    print(f"Heavy modules loaded by kalaha.main: {', '.join(loaded) if loaded else 'none'}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m kalaha", description="Play Kalaha")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="Report import and first-use timings, then exit")
+    parser.add_argument("--profile-search", type=int, metavar="DEPTH",
+                        help="Profile a search of the starting position to DEPTH, then exit")
+    parser.add_argument("--search", choices=("alphabeta", "pvs"), default="alphabeta",
+                        help="Search algorithm for --profile-search (default: alphabeta)")
+    args = parser.parse_args()
+
+    if args.startup_profile:
+        startup_profile()
+        return
+    if args.profile_search:
+        from kalaha.ai_engine import profile_search
+        from kalaha.game_logic import initial_state
+        profile_search(initial_state(), 0, depth=args.profile_search, search=args.search, use_book=False)
+        return
+
+    from kalaha.main import main as run
+    run()
+
+if __name__ == "__main__":
+    main()
@@ -1,118 +1,465 @@
-import random
+import time
 from collections import OrderedDict
-from typing import List, Tuple, Optional, Any, Dict
+from dataclasses import dataclass, field
+from typing import List, Tuple, Optional, Any, Dict, Callable
 
 # Imports with fallback
 try:
     from game_logic import (
         legal_moves, apply_move, is_terminal, evaluate,
-        P1_PITS, P2_PITS, P1_STORE, P2_STORE, cleanup_board
+        P1_PITS, P2_PITS, P1_STORE, P2_STORE, cleanup_board, LAST_PIT, SOW_CYCLE, RuleSet, DEFAULT_RULES
     )
-    from zobrist_hashing import zobrist
+    from zobrist_hashing import zobrist, ZobristHasher, ZOBRIST_SEED
     from endgame_db import endgame_db
+    from tablebase import tablebase
+    from opening_book import opening_book
+    from transposition_table import TranspositionTable, EXACT, LOWERBOUND, UPPERBOUND, NO_MOVE
+    from evaluation import evaluate_heuristic, heuristic_for
+    import canonical
 except ImportError:
     from kalaha.game_logic import (
         legal_moves, apply_move, is_terminal, evaluate,
-        P1_PITS, P2_PITS, P1_STORE, P2_STORE, cleanup_board
+        P1_PITS, P2_PITS, P1_STORE, P2_STORE, cleanup_board, LAST_PIT, SOW_CYCLE, RuleSet, DEFAULT_RULES
     )
-    from kalaha.zobrist_hashing import zobrist
+    from kalaha.zobrist_hashing import zobrist, ZobristHasher, ZOBRIST_SEED
     from kalaha.endgame_db import endgame_db
+    from kalaha.tablebase import tablebase
+    from kalaha.opening_book import opening_book
+    from kalaha.transposition_table import TranspositionTable, EXACT, LOWERBOUND, UPPERBOUND, NO_MOVE
+    from kalaha.evaluation import evaluate_heuristic, heuristic_for
+    import kalaha.canonical as canonical
 
 # Constants
 MAX_DEPTH = 6
 INF = float('inf')
 
-# Transposition Table
-TT: Dict[int, Tuple[float, int, str]] = {}
+# Transposition Table (fixed capacity, values from Player 0's point of view)
+TT = TranspositionTable()
 
 # Global counter for nodes visited
 NODES_VISITED = 0
 
-def evaluate_heuristic(board: List[int], player: int, strategy: str = 'balanced') -> float:
+# Search statistics counters, reset by every get_best_move (see SearchStats)
+QNODES = 0
+TT_CUTOFFS = 0
+DB_HITS = 0
+BETA_CUTOFFS = 0
+FIRST_MOVE_CUTOFFS = 0
+
+# Iterative deepening
+MAX_ITERATIVE_DEPTH = 40
+TIME_CHECK_MASK = 1023 # Check the clock every 1024 nodes
+
+# TT probe/hit counters when the running search started
+_TT_BASE: Tuple[int, int] = (0, 0)
+
+# Deadline (perf_counter seconds) and stop event of the running search, if any
+_DEADLINE: Optional[float] = None
+_STOP_EVENT: Optional[Any] = None
+
+# Quiescence search at the depth horizon (set per search by get_best_move)
+_QUIESCENCE = False
+QUIESCENCE_DEPTH = 6 # Longest chain of noisy moves followed below the horizon
+
+# How TT keys and values are canonicalized (set per search from the strategy, see canonical.py)
+_CANON_MODE = canonical.MIRRORED
+
+# Rotates the root move order (set by lazy-SMP helper processes for diversity)
+ROOT_ROTATION = 0
+
+# Info about the last get_best_move call (depth reached, nodes, nps, ...)
+LAST_SEARCH_INFO: Dict[str, Any] = {}
+
+# Moves answered from the opening book since start-up
+BOOK_HITS = 0
+
+# Move ordering priorities (history scores stay below HISTORY_LIMIT)
+ORDER_TT_MOVE = 1 << 30
+ORDER_EXTRA_TURN = 1 << 24
+ORDER_CAPTURE = 1 << 23
+ORDER_KILLER_1 = 1 << 22
+ORDER_KILLER_2 = 1 << 21
+HISTORY_LIMIT = 1 << 20
+
+# Killer moves per ply and history table per player/pit
+MAX_PLY = 128
+KILLERS: List[List[int]] = [[-1, -1] for _ in range(MAX_PLY)]
+NO_KILLERS = [-1, -1]
+HISTORY: List[List[int]] = [[0] * 14 for _ in range(2)]
+
+# Rule variant of the positions searched (see set_rules)
+RULES = DEFAULT_RULES
+
+class _NoExactValues:
+    """
+    Stands in for the endgame DB, tablebase and opening book, which only
+    hold positions of the default rules, while another variant is searched.
+    """
+    max_seeds = -1
+    strategy = None
+    depth = 0
+
+    def ensure_loaded(self) -> None:
+        pass
+
+    def lookup(self, *args: Any) -> None:
+        return None
+
+    def probe(self, *args: Any) -> None:
+        return None
+
+    def add(self, *args: Any) -> None:
+        pass
+
+_NO_EXACT_VALUES = _NoExactValues()
+
+# Module globals the search reads the rules from, and their default-rules
+# values (saved on every switch to another variant, so a database swapped in
+# meanwhile, e.g. by a benchmark or test, is what switching back restores)
+_RULE_GLOBALS = ('P1_PITS', 'P2_PITS', 'P1_STORE', 'P2_STORE', 'LAST_PIT', 'SOW_CYCLE',
+                 'legal_moves', 'apply_move', 'is_terminal', 'cleanup_board', 'zobrist', 'evaluate_heuristic',
+                 'tablebase', 'endgame_db', 'opening_book', '_db_lookup', '_db_add')
+_DEFAULT_BINDINGS: Dict[str, Any] = {}
+_RULE_BINDINGS: Dict[RuleSet, Dict[str, Any]] = {}
+
+def set_rules(rules: RuleSet, clear_tt: bool = True) -> None:
+    """
+    Points the search at a rule variant. The search functions read the
+    board layout, sowing tables, move generator, hasher and evaluation from
+    module globals, so those are rebound to the variant's own (precomputed)
+    versions: a variant runs exactly the code of the default rules, with no
+    per-node checks. The endgame DB, tablebase and opening book only hold
+    default-rules positions and are off for other variants.
+    Clears the TT, killer moves and history when the rules change; with
+    clear_tt=False the TT is left alone (a lazy-SMP worker, whose table is
+    shared with searches still running and cleared by the parent).
+    """
+    global RULES, HISTORY
+    if rules == RULES:
+        return
+    if RULES == DEFAULT_RULES:
+        _DEFAULT_BINDINGS.update((name, globals()[name]) for name in _RULE_GLOBALS)
+    if rules == DEFAULT_RULES:
+        rules, bindings = DEFAULT_RULES, _DEFAULT_BINDINGS
+    else:
+        bindings = _RULE_BINDINGS.get(rules)
+        if bindings is None:
+            bindings = _RULE_BINDINGS[rules] = {
+                'P1_PITS': rules.p1_pits, 'P2_PITS': rules.p2_pits,
+                'P1_STORE': rules.p1_store, 'P2_STORE': rules.p2_store,
+                'LAST_PIT': rules.last_pit, 'SOW_CYCLE': rules.sow_cycle,
+                'legal_moves': rules.legal_moves, 'apply_move': rules.apply_move,
+                'is_terminal': rules.is_terminal, 'cleanup_board': rules.cleanup_board,
+                'zobrist': ZobristHasher(ZOBRIST_SEED, rules), 'evaluate_heuristic': heuristic_for(rules),
+                'tablebase': _NO_EXACT_VALUES, 'endgame_db': _NO_EXACT_VALUES, 'opening_book': _NO_EXACT_VALUES,
+                '_db_lookup': _NO_EXACT_VALUES.lookup, '_db_add': _NO_EXACT_VALUES.add,
+            }
+    globals().update(bindings)
+    RULES = rules
+    HISTORY = [[0] * rules.total_pits for _ in range(2)]
+    reset_search_state(clear_tt)
+
+# Search algorithms selectable in get_best_move
+SEARCH_ALGORITHMS = ('alphabeta', 'pvs')
+NULL_WINDOW = 0.001 # Heuristic scores are multiples of 0.1, TT values are rounded to 0.001
+ASPIRATION_WINDOW = 2.0
+
+@dataclass
+class SearchStats:
+    """
+    Statistics of one get_best_move call, left in LAST_SEARCH_INFO["stats"].
+    Counters cover the whole call (all iterations); scores are from Player 0's view.
+    """
+    depth: int = 0
+    score: float = 0.0
+    best_move: Optional[int] = None
+    pv: List[int] = field(default_factory=list) # Principal variation from the TT, best move first
+    nodes: int = 0
+    qnodes: int = 0 # Quiescence nodes (included in nodes)
+    tt_probes: int = 0
+    tt_hits: int = 0
+    tt_cutoffs: int = 0 # Nodes answered by a TT entry
+    db_hits: int = 0 # Nodes answered by the tablebase or endgame DB
+    beta_cutoffs: int = 0
+    first_move_cutoffs: int = 0 # Beta cutoffs caused by the first move searched
+    iterations: List[Tuple[int, int, float]] = field(default_factory=list) # (depth, nodes, seconds) per completed iteration
+    time: float = 0.0
+    timed_out: bool = False
+    book_hit: bool = False
+
+    @property
+    def nps(self) -> float:
+        return self.nodes / self.time if self.time > 0 else 0.0
+
+    @property
+    def tt_hit_rate(self) -> float:
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        """Share of beta cutoffs found by the first move (move ordering quality)."""
+        return self.first_move_cutoffs / self.beta_cutoffs if self.beta_cutoffs else 0.0
+
+    @property
+    def branching_factor(self) -> float:
+        """
+        Effective branching factor: node growth between the last two
+        iterations, or nodes ** (1 / depth) for a single iteration.
+        """
+        if len(self.iterations) >= 2 and self.iterations[-2][1]:
+            return self.iterations[-1][1] / self.iterations[-2][1]
+        if self.depth and self.nodes:
+            return self.nodes ** (1.0 / self.depth)
+        return 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"depth {self.depth}, score {self.score:+.1f}, pv {' '.join(str(m) for m in self.pv) or '-'}",
+            f"nodes {self.nodes} (qnodes {self.qnodes}), {self.time:.3f}s, {self.nps:.0f} nodes/s, EBF {self.branching_factor:.2f}",
+            f"TT probes {self.tt_probes}, hits {self.tt_hits} ({self.tt_hit_rate:.1%}), cutoffs {self.tt_cutoffs}; DB hits {self.db_hits}",
+            f"beta cutoffs {self.beta_cutoffs}, at first move {self.first_move_cutoffs} ({self.first_move_cutoff_rate:.1%})",
+        ]
+        for d, nodes, seconds in self.iterations:
+            lines.append(f"  depth {d:2}: {nodes:10} nodes {seconds * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget is exhausted or it is stopped."""
+
+def _check_abort() -> None:
+    """
+    Called every TIME_CHECK_MASK + 1 nodes: aborts the running search once
+    the deadline has passed or the stop event is set.
+    """
+    if _DEADLINE is not None and time.perf_counter() >= _DEADLINE:
+        raise SearchTimeout()
+    if _STOP_EVENT is not None and _STOP_EVENT.is_set():
+        raise SearchTimeout()
+
+def ordered_children(board: List[int], player: int, board_hash: int, tt_move: int = -1, ply: int = 0) -> List[Tuple[int, List[int], bool, int]]:
     """
-    Advanced heuristic evaluation with multiple strategies.
-    Positive value favors Player 0 (P1/Max).
-    Strategies: 'balanced', 'aggressive', 'defensive', 'basic'
+    Generates the children of a position, best candidates first:
+    TT move, extra turns, captures, killer moves for this ply, then by
+    history score. Ties keep pit order, so the ordering is deterministic.
+    Returns (move, child_board, extra_turn, child_hash) tuples that the
+    search loops consume directly instead of re-applying the moves.
     """
-    store_diff = board[P1_STORE] - board[P2_STORE]
+    store = P1_STORE if player == 0 else P2_STORE
+    prev_store = board[store]
+    killers = KILLERS[ply] if ply < MAX_PLY else NO_KILLERS
+    history = HISTORY[player]
     
-    if strategy == 'basic':
-        return float(store_diff)
+    scored = []
+    for move in (P1_PITS if player == 0 else P2_PITS):
+        if not board[move]:
+            continue
+        child, extra, child_hash = zobrist.apply_move(board, board_hash, move, player)
         
-    p1_side_seeds = sum(board[i] for i in P1_PITS)
-    p2_side_seeds = sum(board[i] for i in P2_PITS)
-    side_diff = p1_side_seeds - p2_side_seeds
-    
-    score = float(store_diff)
-    
-    if strategy == 'balanced':
-        score += 0.5 * side_diff
-    elif strategy == 'defensive':
-        score += 0.8 * side_diff
-        empty_p1 = sum(1 for i in P1_PITS if board[i] == 0)
-        score -= 2.0 * empty_p1
-    elif strategy == 'aggressive':
-        score += 0.3 * side_diff
+        if move == tt_move:
+            priority = ORDER_TT_MOVE
+        else:
+            priority = history[move]
+            if extra:
+                priority += ORDER_EXTRA_TURN
+            if child[store] - prev_store > 1:
+                priority += ORDER_CAPTURE
+            if move == killers[0]:
+                priority += ORDER_KILLER_1
+            elif move == killers[1]:
+                priority += ORDER_KILLER_2
         
-    return score
+        scored.append((-priority, move, child, extra, child_hash))
+    
+    scored.sort(key=lambda x: x[0])
+    return [(move, child, extra, child_hash) for _, move, child, extra, child_hash in scored]
 
 def order_moves(board: List[int], moves: List[int], player: int) -> List[int]:
     """
     Orders moves to improve Alpha-Beta pruning.
     """
-    ordered = []
+    board_hash = zobrist.compute_hash(board, player)
+    return [c[0] for c in ordered_children(board, player, board_hash) if c[0] in moves]
+
+def _record_cutoff(move: int, player: int, depth: int, ply: int, quiet: bool) -> None:
+    """
+    Updates killer and history tables after a beta cutoff by a quiet move.
+    """
+    if not quiet:
+        return
+    if ply < MAX_PLY:
+        killers = KILLERS[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+    history = HISTORY[player]
+    history[move] += depth * depth
+    if history[move] > HISTORY_LIMIT:
+        for i in range(len(history)):
+            history[i] //= 2
+
+def reset_search_state(clear_tt: bool = True) -> None:
+    """
+    Clears the TT, killer moves and history table, so that a search from a
+    given position visits the same number of nodes every time (benchmarks).
+    """
+    if clear_tt:
+        TT.clear()
+    for killers in KILLERS:
+        killers[0] = killers[1] = -1
+    for history in HISTORY:
+        for i in range(len(history)):
+            history[i] = 0
+
+def noisy_moves(board: List[int], player: int) -> List[Tuple[int, List[int], bool]]:
+    """
+    Moves that end in the mover's store (extra turn) or capture, as
+    (move, child_board, extra_turn), extra turns first, then by seeds won.
+    The landing pit comes from LAST_PIT, so quiet moves are never applied.
+    """
+    store = P1_STORE if player == 0 else P2_STORE
+    first = store - 6
+    noisy = []
+    for move in range(first, store):
+        seeds = board[move]
+        if not seeds:
+            continue
+        last = LAST_PIT[player][move][seeds % SOW_CYCLE]
+        if last == store:
+            child, _ = apply_move(board, move, player)
+            noisy.append((0, move, child, True))
+        elif first <= last < store and (board[last] == 0 or last == move):
+            child, _ = apply_move(board, move, player)
+            if child[last] == 0: # Captured: the landing pit was emptied into the store
+                noisy.append((board[store] - child[store], move, child, False))
+    noisy.sort(key=lambda x: x[0])
+    return [(move, child, extra) for _, move, child, extra in noisy]
+
+def quiescence_search(board: List[int], alpha: float, beta: float, player: int, strategy: str = 'balanced',
+                      qdepth: int = QUIESCENCE_DEPTH) -> float:
+    """
+    Resolves pending extra turns and captures at the depth horizon, so a
+    leaf is not scored in the middle of a tactical sequence. The side to
+    move either stands pat on the static evaluation or plays a noisy move
+    (see noisy_moves). Fail-soft alpha-beta on Player 0's values.
+    The horizon node itself (qdepth == QUIESCENCE_DEPTH) was already
+    counted by the main search; the nodes below it count as QNODES too.
+    """
+    global NODES_VISITED, QNODES
+    if qdepth < QUIESCENCE_DEPTH:
+        NODES_VISITED += 1
+        QNODES += 1
+        if not NODES_VISITED & TIME_CHECK_MASK:
+            _check_abort()
     
-    for move in moves:
-        sim_board, extra_turn = apply_move(board, move, player)
-        
-        score_diff = (sim_board[P1_STORE] - sim_board[P2_STORE]) if player == 0 else (sim_board[P2_STORE] - sim_board[P1_STORE])
-        prev_diff = (board[P1_STORE] - board[P2_STORE]) if player == 0 else (board[P2_STORE] - board[P1_STORE])
-        
-        captured = (score_diff - prev_diff) > 1
-        
-        priority = 0.0
-        if extra_turn:
-            priority += 1000.0
-        if captured:
-            priority += 500.0
-        
-        priority += random.random()
-        
-        ordered.append((priority, move))
-        
-    ordered.sort(key=lambda x: x[0], reverse=True)
-    return [m for p, m in ordered]
+    if is_terminal(board):
+        final_board = cleanup_board(board)
+        return float(final_board[P1_STORE] - final_board[P2_STORE])
+    
+    value = evaluate_heuristic(board, 0, strategy)
+    if qdepth == 0:
+        return value
+    
+    if player == 0:
+        if value >= beta:
+            return value
+        alpha = max(alpha, value)
+        for _, child, extra in noisy_moves(board, 0):
+            score = quiescence_search(child, alpha, beta, 0 if extra else 1, strategy, qdepth - 1)
+            if score > value:
+                value = score
+                if value >= beta:
+                    break
+                alpha = max(alpha, value)
+    else:
+        if value <= alpha:
+            return value
+        beta = min(beta, value)
+        for _, child, extra in noisy_moves(board, 1):
+            score = quiescence_search(child, alpha, beta, 1 if extra else 0, strategy, qdepth - 1)
+            if score < value:
+                value = score
+                if value <= alpha:
+                    break
+                beta = min(beta, value)
+    return value
+
+def _tt_probe(board_hash: int, board: List[int], player: int) -> Optional[Tuple[float, int, int, int]]:
+    """
+    TT probe through the canonicalization layer: positions sharing pits
+    (and, for symmetric strategies, mirrored ones) share an entry.
+    Returns (value, depth, flag, move) from Player 0's view, or None.
+    """
+    mode = _CANON_MODE
+    entry = TT.probe(canonical.key(zobrist, board_hash, board, player, mode))
+    if entry is None:
+        return None
+    val, depth, flag, move = entry
+    val, flag = canonical.from_stored(val, flag, board, player, mode)
+    return val, depth, flag, canonical.move_from_stored(move, player, mode)
+
+def _tt_store(board_hash: int, board: List[int], player: int, value: float, depth: int, flag: int, move: int = NO_MOVE) -> None:
+    mode = _CANON_MODE
+    value, flag = canonical.to_stored(value, flag, board, player, mode)
+    TT.store(canonical.key(zobrist, board_hash, board, player, mode), value, depth, flag,
+             canonical.move_to_stored(move, player, mode))
+
+def _db_lookup(board: List[int], player: int, board_hash: int) -> Optional[int]:
+    """
+    Endgame DB probe: exact values are always symmetric, so the DB is keyed
+    by the mover's pits and stores the seeds the mover still gains.
+    """
+    gain = endgame_db.lookup(board, player, canonical.key(zobrist, board_hash, board, player, canonical.MIRRORED))
+    return None if gain is None else canonical.exact_from_stored(gain, board, player)
 
-def alphabeta_tt_db(board: List[int], depth: int, alpha: float, beta: float, maximizing_player: bool, strategy: str = 'balanced') -> float:
+def _db_add(board: List[int], player: int, score: int, board_hash: int) -> None:
+    endgame_db.add(board, player, canonical.exact_to_stored(score, board, player),
+                   canonical.key(zobrist, board_hash, board, player, canonical.MIRRORED))
+
+def alphabeta_tt_db(board: List[int], depth: int, alpha: float, beta: float, maximizing_player: bool, strategy: str = 'balanced', board_hash: Optional[int] = None, ply: int = 0) -> float:
     """
     Minimax with Alpha-Beta pruning, Transposition Table, and Endgame DB.
+    board_hash is the Zobrist hash of the board; children get theirs
+    incrementally from zobrist.apply_move.
     """
-    global NODES_VISITED
+    global NODES_VISITED, TT_CUTOFFS, DB_HITS, BETA_CUTOFFS, FIRST_MOVE_CUTOFFS
     NODES_VISITED += 1
     
+    if not NODES_VISITED & TIME_CHECK_MASK:
+        _check_abort()
+    
     current_player = 0 if maximizing_player else 1
     
-    # 1. Endgame DB Lookup (if seeds low enough)
+    if board_hash is None:
+        board_hash = zobrist.compute_hash(board, current_player)
+    
+    # 1. Tablebase / Endgame DB Lookup (if seeds low enough)
     total_seeds = sum(board)
+    if total_seeds - board[P1_STORE] - board[P2_STORE] <= tablebase.max_seeds:
+        exact_val = tablebase.probe(board, current_player)
+        if exact_val is not None:
+            DB_HITS += 1
+            return float(exact_val)
     if total_seeds <= max(10, endgame_db.max_seeds):
-        exact_val = endgame_db.lookup(board, current_player)
+        exact_val = _db_lookup(board, current_player, board_hash)
         if exact_val is not None:
+            DB_HITS += 1
             return exact_val
-
-    board_hash = zobrist.compute_hash(board, current_player)
     
     # 2. TT Lookup
-    if board_hash in TT:
-        tt_val, tt_depth, tt_flag = TT[board_hash]
+    tt_entry = _tt_probe(board_hash, board, current_player)
+    if tt_entry is not None:
+        tt_val, tt_depth, tt_flag, _ = tt_entry
         if tt_depth >= depth:
-            if tt_flag == 'EXACT':
+            if tt_flag == EXACT:
+                TT_CUTOFFS += 1
                 return tt_val
-            elif tt_flag == 'LOWERBOUND':
+            elif tt_flag == LOWERBOUND:
                 alpha = max(alpha, tt_val)
-            elif tt_flag == 'UPPERBOUND':
+            elif tt_flag == UPPERBOUND:
                 beta = min(beta, tt_val)
             
             if alpha >= beta:
+                TT_CUTOFFS += 1
                 return tt_val
 
     # 3. Terminal Node or Depth Limit
@@ -122,86 +469,93 @@ def alphabeta_tt_db(board: List[int], depth: int, alpha: float, beta: float, max
             val = float(final_board[P1_STORE] - final_board[P2_STORE])
             
             # Save solved terminal state to DB + TT
-            endgame_db.add(board, current_player, int(val))
-            TT[board_hash] = (val, 100, 'EXACT') 
+            _db_add(board, current_player, int(val), board_hash)
+            _tt_store(board_hash, board, current_player, val, 100, EXACT)
+            return val
+        
+        if _QUIESCENCE:
+            val = quiescence_search(board, alpha, beta, current_player, strategy)
+            _tt_store(board_hash, board, current_player, val, 0, LOWERBOUND if val >= beta else UPPERBOUND if val <= alpha else EXACT)
             return val
         
         val = evaluate_heuristic(board, 0, strategy)
-        TT[board_hash] = (val, depth, 'EXACT')
+        _tt_store(board_hash, board, current_player, val, depth, EXACT)
         return val
     
-    possible_moves = legal_moves(board, current_player)
-    ordered_moves = order_moves(board, possible_moves, current_player)
+    # Best move from a previous (shallower) search goes first
+    tt_move = tt_entry[3] if tt_entry is not None else -1
+    children = ordered_children(board, current_player, board_hash, tt_move, ply)
     
     value: float
-    tt_flag: str = 'EXACT'
+    tt_flag: int = EXACT
+    best_move = -1
 
     if maximizing_player:
         value = -INF
-        for move in ordered_moves:
-            new_board, extra = apply_move(board, move, 0)
-            
+        for move, new_board, extra, child_hash in children:
             if extra:
-                score = alphabeta_tt_db(new_board, depth, alpha, beta, True, strategy)
+                score = alphabeta_tt_db(new_board, depth, alpha, beta, True, strategy, child_hash, ply + 1)
             else:
-                score = alphabeta_tt_db(new_board, depth - 1, alpha, beta, False, strategy)
+                score = alphabeta_tt_db(new_board, depth - 1, alpha, beta, False, strategy, child_hash, ply + 1)
 
             if score > value:
                 value = score
+                best_move = move
             
             alpha = max(alpha, value)
             if alpha >= beta:
-                tt_flag = 'LOWERBOUND'
+                tt_flag = LOWERBOUND
+                BETA_CUTOFFS += 1
+                if move == children[0][0]:
+                    FIRST_MOVE_CUTOFFS += 1
+                _record_cutoff(move, 0, depth, ply, not extra and new_board[P1_STORE] - board[P1_STORE] <= 1)
                 break
     else:
         value = INF
-        for move in ordered_moves:
-            new_board, extra = apply_move(board, move, 1)
-            
+        for move, new_board, extra, child_hash in children:
             if extra:
-                score = alphabeta_tt_db(new_board, depth, alpha, beta, False, strategy)
+                score = alphabeta_tt_db(new_board, depth, alpha, beta, False, strategy, child_hash, ply + 1)
             else:
-                score = alphabeta_tt_db(new_board, depth - 1, alpha, beta, True, strategy)
+                score = alphabeta_tt_db(new_board, depth - 1, alpha, beta, True, strategy, child_hash, ply + 1)
             
             if score < value:
                 value = score
+                best_move = move
                 
             beta = min(beta, value)
             if beta <= alpha:
-                tt_flag = 'UPPERBOUND' 
+                tt_flag = UPPERBOUND
+                BETA_CUTOFFS += 1
+                if move == children[0][0]:
+                    FIRST_MOVE_CUTOFFS += 1
+                _record_cutoff(move, 1, depth, ply, not extra and new_board[P2_STORE] - board[P2_STORE] <= 1)
                 break
 
-    TT[board_hash] = (value, depth, tt_flag)
+    _tt_store(board_hash, board, current_player, value, depth, tt_flag, best_move)
     
     return value
 
-def get_best_move(board: List[int], player: int, depth: int = MAX_DEPTH, strategy: str = 'balanced') -> Tuple[Optional[int], int]:
+def search_root(board: List[int], player: int, depth: int, ordered_moves: List[int], strategy: str = 'balanced', root_hash: Optional[int] = None) -> Tuple[int, float]:
     """
-    Determine the best move for the AI.
-    Returns: (best_move, nodes_analyzed)
+    Searches every root move to the given depth, in the given order.
+    Returns: (best_move, best_value) with the value from Player 0's view.
     """
-    global NODES_VISITED
-    NODES_VISITED = 0
-    
-    possible_moves = legal_moves(board, player)
-    ordered_moves = order_moves(board, possible_moves, player)
-    
-    if not ordered_moves:
-        return None, 0
-        
     best_move = -1
     best_value = -INF if player == 0 else INF
         
     alpha = -INF
     beta = INF
     
+    if root_hash is None:
+        root_hash = zobrist.compute_hash(board, player)
+    
     for move in ordered_moves:
-        new_board, extra_turn = apply_move(board, move, player)
+        new_board, extra_turn, child_hash = zobrist.apply_move(board, root_hash, move, player)
         
         if extra_turn:
-            score = alphabeta_tt_db(new_board, depth, alpha, beta, player == 0, strategy)
+            score = alphabeta_tt_db(new_board, depth, alpha, beta, player == 0, strategy, child_hash, 1)
         else:
-            score = alphabeta_tt_db(new_board, depth - 1, alpha, beta, player != 0, strategy)
+            score = alphabeta_tt_db(new_board, depth - 1, alpha, beta, player != 0, strategy, child_hash, 1)
         
         if player == 0:
             if score > best_value:
@@ -214,4 +568,447 @@ def get_best_move(board: List[int], player: int, depth: int = MAX_DEPTH, strateg
                 best_move = move
             beta = min(beta, best_value)
             
+    return best_move, best_value
+
+def _tt_probe_relative(board_hash: int, board: List[int], player: int) -> Optional[Tuple[float, int, int, int]]:
+    """
+    TT probe with the value and bound flag turned to the side to move's view
+    (_tt_probe returns Player 0's view, shared with alphabeta_tt_db).
+    """
+    entry = _tt_probe(board_hash, board, player)
+    if entry is None or player == 0:
+        return entry
+    val, depth, flag, move = entry
+    if flag == LOWERBOUND:
+        flag = UPPERBOUND
+    elif flag == UPPERBOUND:
+        flag = LOWERBOUND
+    return -val, depth, flag, move
+
+def _tt_store_relative(board_hash: int, board: List[int], value: float, depth: int, flag: int, move: int, player: int) -> None:
+    if player == 1:
+        value = -value
+        if flag == LOWERBOUND:
+            flag = UPPERBOUND
+        elif flag == UPPERBOUND:
+            flag = LOWERBOUND
+    _tt_store(board_hash, board, player, value, depth, flag, move)
+
+def negamax_pvs(board: List[int], depth: int, alpha: float, beta: float, player: int, strategy: str = 'balanced', board_hash: Optional[int] = None, ply: int = 0) -> float:
+    """
+    Negamax with Principal Variation Search, Transposition Table and Endgame DB.
+    Returns the value from the side to move's point of view. The first move
+    is searched with the full window, the rest with a null window and only
+    re-searched when they fail high inside (alpha, beta).
+    """
+    global NODES_VISITED, TT_CUTOFFS, DB_HITS, BETA_CUTOFFS, FIRST_MOVE_CUTOFFS
+    NODES_VISITED += 1
+    
+    if not NODES_VISITED & TIME_CHECK_MASK:
+        _check_abort()
+    
+    sign = 1 if player == 0 else -1
+    
+    if board_hash is None:
+        board_hash = zobrist.compute_hash(board, player)
+    
+    # 1. Tablebase / Endgame DB Lookup
+    total_seeds = sum(board)
+    if total_seeds - board[P1_STORE] - board[P2_STORE] <= tablebase.max_seeds:
+        exact_val = tablebase.probe(board, player)
+        if exact_val is not None:
+            DB_HITS += 1
+            return float(sign * exact_val)
+    if total_seeds <= max(10, endgame_db.max_seeds):
+        exact_val = _db_lookup(board, player, board_hash)
+        if exact_val is not None:
+            DB_HITS += 1
+            return sign * exact_val
+    
+    # 2. TT Lookup
+    tt_entry = _tt_probe_relative(board_hash, board, player)
+    if tt_entry is not None:
+        tt_val, tt_depth, tt_flag, _ = tt_entry
+        if tt_depth >= depth:
+            if tt_flag == EXACT:
+                TT_CUTOFFS += 1
+                return tt_val
+            elif tt_flag == LOWERBOUND:
+                alpha = max(alpha, tt_val)
+            elif tt_flag == UPPERBOUND:
+                beta = min(beta, tt_val)
+            
+            if alpha >= beta:
+                TT_CUTOFFS += 1
+                return tt_val
+    
+    # 3. Terminal Node or Depth Limit
+    if is_terminal(board):
+        final_board = cleanup_board(board)
+        val = final_board[P1_STORE] - final_board[P2_STORE]
+        _db_add(board, player, val, board_hash)
+        _tt_store(board_hash, board, player, float(val), 100, EXACT)
+        return float(sign * val)
+    
+    if depth == 0:
+        if _QUIESCENCE:
+            val = sign * quiescence_search(board, *((alpha, beta) if player == 0 else (-beta, -alpha)), player, strategy)
+            tt_flag = LOWERBOUND if val >= beta else UPPERBOUND if val <= alpha else EXACT
+            _tt_store_relative(board_hash, board, val, 0, tt_flag, -1, player)
+            return val
+        
+        val = evaluate_heuristic(board, 0, strategy)
+        _tt_store(board_hash, board, player, val, depth, EXACT)
+        return sign * val
+    
+    tt_move = tt_entry[3] if tt_entry is not None else -1
+    children = ordered_children(board, player, board_hash, tt_move, ply)
+    store = P1_STORE if player == 0 else P2_STORE
+    
+    alpha_orig = alpha
+    value = -INF
+    best_move = -1
+    
+    for i, (move, new_board, extra, child_hash) in enumerate(children):
+        if i == 0:
+            score = _pvs_child(new_board, extra, depth, alpha, beta, player, strategy, child_hash, ply + 1)
+        else:
+            score = _pvs_child(new_board, extra, depth, alpha, alpha + NULL_WINDOW, player, strategy, child_hash, ply + 1)
+            if alpha < score < beta:
+                score = _pvs_child(new_board, extra, depth, alpha, beta, player, strategy, child_hash, ply + 1)
+        
+        if score > value:
+            value = score
+            best_move = move
+        if value > alpha:
+            alpha = value
+        if alpha >= beta:
+            BETA_CUTOFFS += 1
+            if i == 0:
+                FIRST_MOVE_CUTOFFS += 1
+            _record_cutoff(move, player, depth, ply, not extra and new_board[store] - board[store] <= 1)
+            break
+    
+    if value <= alpha_orig:
+        tt_flag = UPPERBOUND
+    elif value >= beta:
+        tt_flag = LOWERBOUND
+    else:
+        tt_flag = EXACT
+    _tt_store_relative(board_hash, board, value, depth, tt_flag, best_move, player)
+    
+    return value
+
+def _pvs_child(board: List[int], extra: bool, depth: int, alpha: float, beta: float, player: int, strategy: str, board_hash: int, ply: int = 1) -> float:
+    """
+    Value of a child position for `player` (the side that just moved).
+    An extra turn keeps the same side to move, so there is no negation.
+    """
+    if extra:
+        return negamax_pvs(board, depth, alpha, beta, player, strategy, board_hash, ply)
+    return -negamax_pvs(board, depth - 1, -beta, -alpha, 1 - player, strategy, board_hash, ply)
+
+def search_root_pvs(board: List[int], player: int, depth: int, ordered_moves: List[int], strategy: str = 'balanced',
+                    root_hash: Optional[int] = None, alpha: float = -INF, beta: float = INF) -> Tuple[int, float]:
+    """
+    PVS over the root moves inside the (alpha, beta) window.
+    Returns: (best_move, best_value) with the value from the side to move's view.
+    A value <= alpha or >= beta means the window failed and is only a bound.
+    """
+    if root_hash is None:
+        root_hash = zobrist.compute_hash(board, player)
+    
+    best_move = ordered_moves[0]
+    best_value = -INF
+    
+    for i, move in enumerate(ordered_moves):
+        new_board, extra, child_hash = zobrist.apply_move(board, root_hash, move, player)
+        
+        if i == 0:
+            score = _pvs_child(new_board, extra, depth, alpha, beta, player, strategy, child_hash)
+        else:
+            score = _pvs_child(new_board, extra, depth, alpha, alpha + NULL_WINDOW, player, strategy, child_hash)
+            if alpha < score < beta:
+                score = _pvs_child(new_board, extra, depth, alpha, beta, player, strategy, child_hash)
+        
+        if score > best_value:
+            best_value = score
+            best_move = move
+        if best_value > alpha:
+            alpha = best_value
+        if alpha >= beta:
+            break
+            
+    return best_move, best_value
+
+def search_root_aspiration(board: List[int], player: int, depth: int, ordered_moves: List[int], strategy: str = 'balanced',
+                           root_hash: Optional[int] = None, guess: Optional[float] = None) -> Tuple[int, float]:
+    """
+    PVS root search inside an aspiration window around `guess` (the previous
+    iteration's score, side to move's view). On a fail low/high the failing
+    side of the window is opened up and the root is searched again.
+    """
+    if guess is None:
+        return search_root_pvs(board, player, depth, ordered_moves, strategy, root_hash)
+    
+    alpha = guess - ASPIRATION_WINDOW
+    beta = guess + ASPIRATION_WINDOW
+    while True:
+        move, value = search_root_pvs(board, player, depth, ordered_moves, strategy, root_hash, alpha, beta)
+        if value <= alpha:
+            alpha = -INF
+        elif value >= beta:
+            beta = INF
+        else:
+            return move, value
+
+def get_best_move(board: List[int], player: int, depth: Optional[int] = None, strategy: str = 'balanced',
+                  time_limit_ms: Optional[int] = None,
+                  progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                  search: str = 'alphabeta', workers: int = 1,
+                  stop_event: Optional[Any] = None, use_book: bool = True,
+                  quiescence: bool = False, rules: RuleSet = DEFAULT_RULES,
+                  iterative: bool = False) -> Tuple[Optional[int], int]:
+    """
+    Determine the best move for the AI.
+    
+    Without time_limit_ms, searches to a fixed depth (default MAX_DEPTH);
+    iterative=True deepens iteratively up to it instead (lazy-SMP workers
+    do, so their tables fill at every depth).
+    With time_limit_ms, runs iterative deepening (up to depth, default
+    MAX_ITERATIVE_DEPTH) and returns the result of the deepest iteration
+    that completed within the budget. Each iteration searches the previous
+    best move first and reuses the TT for ordering.
+    
+    search selects the algorithm: 'alphabeta' (minimax, alphabeta_tt_db) or
+    'pvs' (negamax with PVS, always iteratively deepened, with aspiration
+    windows around the previous iteration's score).
+    
+    workers > 1 runs a lazy-SMP search in that many processes sharing one
+    transposition table (see parallel_search). stop_event (anything with
+    is_set(), e.g. threading.Event) aborts the search early; the deepest
+    completed iteration is returned (the first ordered move if a
+    fixed-depth search had none). Passing it never changes which search
+    runs, so a stoppable search returns what an unstoppable one would.
+    
+    With use_book, positions in the opening book are answered without
+    searching, provided the book was built with the same strategy and at
+    least the requested depth (any depth when time-limited).
+    
+    quiescence extends every leaf with quiescence_search, so extra-turn
+    chains and captures pending at the horizon are played out before the
+    position is evaluated.
+    
+    rules selects the game variant (see set_rules); the TT then keys
+    exact positions (canonical.ABSOLUTE), as canonicalization assumes the
+    default board layout.
+    
+    Details of the search are left in LAST_SEARCH_INFO; progress_callback,
+    if given, receives the same dict after every completed iteration.
+    LAST_SEARCH_INFO["stats"] holds them as a SearchStats (counters, per
+    iteration timings, principal variation).
+    Returns: (best_move, nodes_analyzed)
+    """
+    global LAST_SEARCH_INFO, _DEADLINE, _STOP_EVENT, _QUIESCENCE, BOOK_HITS, _CANON_MODE
+    if search not in SEARCH_ALGORITHMS:
+        raise ValueError(f"Unknown search algorithm: {search}")
+    
+    set_rules(rules)
+    _reset_counters()
+    _CANON_MODE = canonical.mode_for(strategy) if RULES is DEFAULT_RULES else canonical.ABSOLUTE
+    
+    if use_book:
+        opening_book.ensure_loaded()
+        if opening_book.strategy == strategy and (time_limit_ms is not None or (depth or MAX_DEPTH) <= opening_book.depth):
+            start_time = time.perf_counter()
+            entry = opening_book.lookup(board, player)
+            if entry is not None:
+                BOOK_HITS += 1
+                LAST_SEARCH_INFO = _search_info(opening_book.depth, entry[1], start_time, False)
+                LAST_SEARCH_INFO["book_hit"] = True
+                stats = LAST_SEARCH_INFO["stats"]
+                stats.book_hit = True
+                stats.best_move = entry[0]
+                stats.pv = [entry[0]]
+                if progress_callback:
+                    progress_callback(LAST_SEARCH_INFO)
+                return entry[0], 0
+    
+    if workers > 1:
+        try:
+            from parallel_search import parallel_best_move
+        except ImportError:
+            from kalaha.parallel_search import parallel_best_move
+        move, nodes, LAST_SEARCH_INFO = parallel_best_move(board, player, depth, strategy, time_limit_ms, search, workers,
+                                                           stop_event, quiescence, rules)
+        if progress_callback:
+            progress_callback(LAST_SEARCH_INFO)
+        return move, nodes
+    
+    # Solved-position stores are opened on the first search, not at import
+    tablebase.ensure_loaded()
+    endgame_db.ensure_loaded()
+    
+    TT.new_search()
+    for killers in KILLERS:
+        killers[0] = killers[1] = -1
+    start_time = time.perf_counter()
+    
+    possible_moves = legal_moves(board, player)
+    ordered_moves = order_moves(board, possible_moves, player)
+    
+    if not ordered_moves:
+        LAST_SEARCH_INFO = _search_info(0, 0.0, start_time, False)
+        return None, 0
+    
+    if ROOT_ROTATION:
+        r = ROOT_ROTATION % len(ordered_moves)
+        ordered_moves = ordered_moves[r:] + ordered_moves[:r]
+    
+    root_hash = zobrist.compute_hash(board, player)
+    sign = 1 if player == 0 else -1
+    
+    if time_limit_ms is None and search == 'alphabeta' and not iterative:
+        _STOP_EVENT = stop_event
+        _QUIESCENCE = quiescence
+        try:
+            best_move, best_value = search_root(board, player, depth or MAX_DEPTH, ordered_moves, strategy, root_hash)
+            completed_depth, timed_out = depth or MAX_DEPTH, False
+        except SearchTimeout:
+            best_move, best_value = ordered_moves[0], 0.0
+            completed_depth, timed_out = 0, True
+        finally:
+            _STOP_EVENT = None
+            _QUIESCENCE = False
+        iterations = [(completed_depth, NODES_VISITED, time.perf_counter() - start_time)] if completed_depth else []
+        LAST_SEARCH_INFO = _search_info(completed_depth, best_value, start_time, timed_out,
+                                        board, player, best_move, iterations)
+        if progress_callback:
+            progress_callback(LAST_SEARCH_INFO)
+        return best_move, NODES_VISITED
+    
+    if time_limit_ms is None:
+        max_depth = depth or MAX_DEPTH
+    else:
+        max_depth = depth or MAX_ITERATIVE_DEPTH
+        _DEADLINE = start_time + time_limit_ms / 1000.0
+    _STOP_EVENT = stop_event
+    _QUIESCENCE = quiescence
+    best_move = ordered_moves[0]
+    best_value = 0.0
+    completed_depth = 0
+    timed_out = False
+    iterations: List[Tuple[int, int, float]] = []
+    
+    try:
+        for d in range(1, max_depth + 1):
+            iteration_start = time.perf_counter()
+            iteration_nodes = NODES_VISITED
+            if search == 'pvs':
+                guess = sign * best_value if completed_depth else None
+                move, value = search_root_aspiration(board, player, d, ordered_moves, strategy, root_hash, guess)
+                value *= sign
+            else:
+                move, value = search_root(board, player, d, ordered_moves, strategy, root_hash)
+            best_move, best_value, completed_depth = move, value, d
+            iterations.append((d, NODES_VISITED - iteration_nodes, time.perf_counter() - iteration_start))
+            
+            # Previous best move goes first in the next iteration
+            ordered_moves = [move] + [m for m in ordered_moves if m != move]
+            
+            LAST_SEARCH_INFO = _search_info(d, value, start_time, False, board, player, move, iterations)
+            if progress_callback:
+                progress_callback(LAST_SEARCH_INFO)
+            
+            if _DEADLINE is not None and time.perf_counter() >= _DEADLINE:
+                break
+    except SearchTimeout:
+        timed_out = True
+    finally:
+        _DEADLINE = None
+        _STOP_EVENT = None
+        _QUIESCENCE = False
+    
+    LAST_SEARCH_INFO = _search_info(completed_depth, best_value, start_time, timed_out,
+                                    board, player, best_move, iterations)
     return best_move, NODES_VISITED
+
+def _reset_counters() -> None:
+    global NODES_VISITED, QNODES, TT_CUTOFFS, DB_HITS, BETA_CUTOFFS, FIRST_MOVE_CUTOFFS, _TT_BASE
+    NODES_VISITED = QNODES = TT_CUTOFFS = DB_HITS = BETA_CUTOFFS = FIRST_MOVE_CUTOFFS = 0
+    _TT_BASE = (TT.probes, TT.hits)
+
+def principal_variation(board: List[int], player: int, first_move: Optional[int], depth: int) -> List[int]:
+    """
+    The expected line of play: first_move, then the TT's best move in each
+    following position, for up to `depth` plies (extra turns are free, as in
+    the search). Stops at a missing entry, an illegal move or the game's end.
+    """
+    pv: List[int] = []
+    board_hash = zobrist.compute_hash(board, player)
+    seen = {board_hash}
+    move = first_move
+    while move is not None and depth > 0 and move in (P1_PITS if player == 0 else P2_PITS) and board[move]:
+        pv.append(move)
+        board, extra, board_hash = zobrist.apply_move(board, board_hash, move, player)
+        if not extra:
+            player = 1 - player
+            depth -= 1
+        if is_terminal(board) or board_hash in seen:
+            break
+        seen.add(board_hash)
+        entry = _tt_probe(board_hash, board, player)
+        move = entry[3] if entry is not None else None
+    return pv
+
+def _search_info(depth: int, score: float, start_time: float, timed_out: bool,
+                 board: Optional[List[int]] = None, player: int = 0, best_move: Optional[int] = None,
+                 iterations: Optional[List[Tuple[int, int, float]]] = None) -> Dict[str, Any]:
+    global _TT_BASE
+    elapsed = time.perf_counter() - start_time
+    stats = SearchStats(
+        depth=depth, score=score, best_move=best_move, nodes=NODES_VISITED, qnodes=QNODES,
+        tt_probes=TT.probes - _TT_BASE[0], tt_hits=TT.hits - _TT_BASE[1], tt_cutoffs=TT_CUTOFFS,
+        db_hits=DB_HITS, beta_cutoffs=BETA_CUTOFFS, first_move_cutoffs=FIRST_MOVE_CUTOFFS,
+        iterations=list(iterations or []), time=elapsed, timed_out=timed_out,
+    )
+    if board is not None:
+        # Walking the PV probes the TT; keep those probes out of the search's counts
+        probes, hits = TT.probes, TT.hits
+        stats.pv = principal_variation(board, player, best_move, depth)
+        _TT_BASE = (_TT_BASE[0] + TT.probes - probes, _TT_BASE[1] + TT.hits - hits)
+    return {
+        "depth": depth,
+        "score": score,
+        "nodes": NODES_VISITED,
+        "time": elapsed,
+        "nps": NODES_VISITED / elapsed if elapsed > 0 else 0.0,
+        "timed_out": timed_out,
+        "book_hit": False,
+        "book_hits": BOOK_HITS,
+        "stats": stats,
+    }
+
+def profile_search(board: List[int], player: int, sort_by: str = 'tottime', limit: int = 25,
+                   stream: Optional[Any] = None, **kwargs: Any) -> Tuple[Optional[int], SearchStats]:
+    """
+    Runs get_best_move(board, player, **kwargs) under cProfile and prints
+    the `limit` most expensive functions (sorted by sort_by, any pstats key)
+    and the search statistics to stream (default stdout).
+    Returns: (best_move, stats)
+    """
+    import cProfile
+    import pstats
+    import sys
+
+    out = stream or sys.stdout
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        move, _ = get_best_move(board, player, **kwargs)
+    finally:
+        profiler.disable()
+    stats: SearchStats = LAST_SEARCH_INFO["stats"]
+    print(stats.summary(), file=out)
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats(sort_by).print_stats(limit)
+    return move, stats
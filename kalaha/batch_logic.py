@@ -0,0 +1,130 @@
+"""
+Vectorized game logic for many boards at once.
+
+Boards are rows of an (N, 14) integer array in the same layout as
+game_logic (pits 0-5, store 6, pits 7-12, store 13). Every function works
+on the whole batch with NumPy array operations; there is no per-game Python
+loop. Sowing is closed-form, like apply_move_packed: full laps add one seed
+to 13 pits at once, the remainder comes from a precomputed table.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    from game_logic import (
+        initial_state, SOW_ORDER, SOW_CYCLE, LAST_PIT, STORES,
+        TOTAL_PITS, P1_PITS, P2_PITS, P1_STORE, P2_STORE
+    )
+except ImportError:
+    from kalaha.game_logic import (
+        initial_state, SOW_ORDER, SOW_CYCLE, LAST_PIT, STORES,
+        TOTAL_PITS, P1_PITS, P2_PITS, P1_STORE, P2_STORE
+    )
+
+# LAP_ADD[player]: one seed in every pit a full lap touches
+LAP_ADD = np.zeros((2, TOTAL_PITS), dtype=np.int32)
+# SOW_ADD[player, move, r]: one seed in each of the first r pits after `move`
+SOW_ADD = np.zeros((2, TOTAL_PITS, SOW_CYCLE, TOTAL_PITS), dtype=np.int32)
+for _p in (0, 1):
+    LAP_ADD[_p, SOW_ORDER[_p][0]] = 1
+    for _m in range(TOTAL_PITS):
+        for _r in range(SOW_CYCLE):
+            SOW_ADD[_p, _m, _r, SOW_ORDER[_p][_m][:_r]] = 1
+
+# LAST_PIT_TABLE[player, move, seeds % 13]: pit where the last seed lands
+LAST_PIT_TABLE = np.array(LAST_PIT, dtype=np.int64)
+STORE_OF = np.array(STORES, dtype=np.int64)
+# First pit of each player's row (moves are FIRST_PIT[player] + 0..5)
+FIRST_PIT = np.array([P1_PITS[0], P2_PITS[0]], dtype=np.int64)
+
+def initial_states(n: int) -> np.ndarray:
+    """
+    (n, 14) array of starting boards.
+    """
+    return np.tile(np.array(initial_state(), dtype=np.int32), (n, 1))
+
+def is_terminal_batch(boards: np.ndarray) -> np.ndarray:
+    """
+    Same as is_terminal, per row. Returns a bool array of shape (N,).
+    """
+    return ~boards[:, P1_PITS].any(axis=1) | ~boards[:, P2_PITS].any(axis=1)
+
+def legal_moves_mask(boards: np.ndarray, players: np.ndarray) -> np.ndarray:
+    """
+    (N, 6) bool array: entry j is True if the player to move may sow
+    pit FIRST_PIT[player] + j.
+    """
+    cols = FIRST_PIT[players][:, None] + np.arange(6)
+    return np.take_along_axis(boards, cols, axis=1) > 0
+
+def cleanup_boards(boards: np.ndarray) -> np.ndarray:
+    """
+    Same as cleanup_board, per row (applied to every row given).
+    """
+    new = boards.copy()
+    new[:, P1_STORE] += new[:, P1_PITS].sum(axis=1)
+    new[:, P2_STORE] += new[:, P2_PITS].sum(axis=1)
+    new[:, P1_PITS] = 0
+    new[:, P2_PITS] = 0
+    return new
+
+def apply_moves_batch(boards: np.ndarray, moves: np.ndarray, players: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Same as apply_move for each row: boards (N, 14), moves (N,) pit
+    indices, players (N,) 0 or 1. The input is not modified.
+    Returns: (new_boards, extra_turn, terminal), the flags as bool arrays.
+    """
+    moves = np.asarray(moves, dtype=np.int64)
+    players = np.asarray(players, dtype=np.int64)
+    rows = np.arange(len(boards))
+
+    seeds = boards[rows, moves].astype(np.int64)
+    laps, rem = np.divmod(seeds, SOW_CYCLE)
+
+    new = boards.copy()
+    new[rows, moves] = 0
+    new += (laps[:, None] * LAP_ADD[players] + SOW_ADD[players, moves, rem]).astype(new.dtype)
+
+    last = LAST_PIT_TABLE[players, moves, rem]
+    store = STORE_OF[players]
+    extra = last == store
+
+    # Capture: last seed in an own pit that was empty, opposite pit not empty
+    own_side = np.where(players == 0, last < P1_STORE, (last > P1_STORE) & (last < P2_STORE))
+    opposite = np.where(own_side, 12 - last, 0)
+    captured = new[rows, opposite]
+    capture = own_side & (new[rows, last] == 1) & (captured > 0)
+    if capture.any():
+        r = rows[capture]
+        new[r, store[capture]] += captured[capture] + 1
+        new[r, last[capture]] = 0
+        new[r, opposite[capture]] = 0
+
+    return new, extra, is_terminal_batch(new)
+
+def random_playouts(boards: np.ndarray, players: np.ndarray, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """
+    Plays every game to the end with uniformly random legal moves and
+    returns the final store difference (Player 0's view) per game.
+    Loops over plies, never over games.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    boards = boards.copy()
+    players = np.asarray(players, dtype=np.int64).copy()
+    active = ~is_terminal_batch(boards)
+
+    while active.any():
+        idx = np.flatnonzero(active)
+        b, p = boards[idx], players[idx]
+        # Random legal pit: argmax of random keys over the legal ones
+        keys = rng.random((len(idx), 6)) * legal_moves_mask(b, p)
+        moves = FIRST_PIT[p] + keys.argmax(axis=1)
+        b, extra, terminal = apply_moves_batch(b, moves, p)
+        boards[idx] = b
+        players[idx] = np.where(extra, p, 1 - p)
+        active[idx] = ~terminal
+
+    final = cleanup_boards(boards)
+    return final[:, P1_STORE] - final[:, P2_STORE]
@@ -0,0 +1,107 @@
+"""
+Position canonicalization for the caches (TT, endgame DB, opening book).
+
+Stores never influence the rest of a game: a search value is always the
+current store difference plus something that depends only on the pits and
+the side to move (every evaluation preset scores the store difference with
+weight 1 plus pit-only features). So caches key positions by their pits
+and store values relative to the store difference. Positions that differ
+only in their stores then share one entry.
+
+If the evaluation is also antisymmetric (mirroring the board and swapping
+the side to move negates it), a position and its mirror share the key as
+well: pits are hashed from the side to move's view, values and bounds are
+stored from the side to move's view and moves as 0-5 from its first pit.
+Exact game values (endgame DB, tablebase) always qualify.
+
+Modes (mode_for picks one per strategy):
+    MIRRORED  pits from the mover's view; value relative, mover's view
+    OFFSET    pits from Player 0's view + side to move; value relative
+    ABSOLUTE  exact position (pits, stores, side to move); raw value
+"""
+from typing import List, Tuple
+
+try:
+    from game_logic import P1_STORE, P2_STORE
+    from zobrist_hashing import ZobristHasher, MASK64
+    from evaluation import STRATEGY_WEIGHTS
+    from transposition_table import LOWERBOUND, UPPERBOUND, NO_MOVE
+except ImportError:
+    from kalaha.game_logic import P1_STORE, P2_STORE
+    from kalaha.zobrist_hashing import ZobristHasher, MASK64
+    from kalaha.evaluation import STRATEGY_WEIGHTS
+    from kalaha.transposition_table import LOWERBOUND, UPPERBOUND, NO_MOVE
+
+ABSOLUTE = 0
+OFFSET = 1
+MIRRORED = 2
+
+# First pit of each player's row (mirrored moves are stored relative to it)
+FIRST_PIT = (0, 7)
+
+def mode_for(strategy: str) -> int:
+    """
+    Most sharing the strategy's evaluation allows: MIRRORED if it is
+    store difference + antisymmetric pit features, OFFSET if only the
+    store weight is 1, else ABSOLUTE.
+    """
+    w = STRATEGY_WEIGHTS.get(strategy, STRATEGY_WEIGHTS['basic'])
+    if w[0] != 1.0:
+        return ABSOLUTE
+    # Mirroring negates every feature except the empty-pit counts, which swap
+    return MIRRORED if w[2] == -w[3] else OFFSET
+
+def key(hasher: ZobristHasher, board_hash: int, board: List[int], player: int, mode: int) -> int:
+    """
+    64-bit cache key from a hasher.compute_hash / apply_move hash.
+    """
+    if mode == MIRRORED:
+        return board_hash >> 64 if player else board_hash & MASK64
+    k = (board_hash & MASK64) ^ hasher.turn_keys[player]
+    if mode == ABSOLUTE:
+        k ^= hasher.store_hash(board)
+    return k
+
+def to_stored(value: float, flag: int, board: List[int], player: int, mode: int) -> Tuple[float, int]:
+    """
+    (value, bound flag) from Player 0's view to the stored form.
+    """
+    if mode == ABSOLUTE:
+        return value, flag
+    value -= board[P1_STORE] - board[P2_STORE]
+    if mode == MIRRORED and player:
+        value = -value
+        flag = UPPERBOUND if flag == LOWERBOUND else LOWERBOUND if flag == UPPERBOUND else flag
+    return value, flag
+
+def from_stored(value: float, flag: int, board: List[int], player: int, mode: int) -> Tuple[float, int]:
+    """
+    Inverse of to_stored: back to Player 0's view of this position.
+    """
+    if mode == ABSOLUTE:
+        return value, flag
+    if mode == MIRRORED and player:
+        value = -value
+        flag = UPPERBOUND if flag == LOWERBOUND else LOWERBOUND if flag == UPPERBOUND else flag
+    return value + board[P1_STORE] - board[P2_STORE], flag
+
+def move_to_stored(move: int, player: int, mode: int) -> int:
+    if mode == MIRRORED and move != NO_MOVE:
+        return move - FIRST_PIT[player]
+    return move
+
+def move_from_stored(move: int, player: int, mode: int) -> int:
+    if mode == MIRRORED and move != NO_MOVE:
+        return move + FIRST_PIT[player]
+    return move
+
+def exact_to_stored(score: int, board: List[int], player: int) -> int:
+    """
+    Exact final store difference (Player 0's view) as the seeds the side
+    to move still gains (MIRRORED, the endgame DB's form).
+    """
+    gain = score - (board[P1_STORE] - board[P2_STORE])
+    return -gain if player else gain
+
+def exact_from_stored(gain: int, board: List[int], player: int) -> int:
+    return board[P1_STORE] - board[P2_STORE] + (-gain if player else gain)
@@ -1,62 +1,589 @@
+import atexit
 import json
+import mmap
 import os
-from typing import Dict, Optional, List, Union
+import struct
+import subprocess
+import sys
+import threading
+import time
+import weakref
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Optional, List, Any, Tuple, Iterator
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
 
 try:
     from zobrist_hashing import zobrist
 except ImportError:
     from kalaha.zobrist_hashing import zobrist
 
-DB_FILE = "endgame_db.json"
+DB_FILE = "endgame_db.bin"
+LEGACY_JSON_FILE = "endgame_db.json"
+
+# Binary layout: 40-byte header, then `count` sorted uint64 hash keys,
+# then `count` int8 scores (same order). Opened with mmap, never parsed.
+# The header records the Zobrist seed and key version the keys were hashed
+# with; a file whose keys no longer match the global hasher is stale.
+MAGIC = b"KLHEGDB1"
+FORMAT_VERSION = 2
+PREFIX = struct.Struct("<8sI") # magic, version (all format versions)
+HEADER = struct.Struct("<8sIIQQI4x") # magic, version, max_seeds, count, zobrist seed, key version
+STALE_SUFFIX = ".stale"
+
+# Journal: 32-byte header, then fixed-size records appended in any order by
+# any process (under an exclusive flock). `generation` is bumped by every
+# compaction, telling readers to remap the sorted file.
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_MAGIC = b"KLHEGJN1"
+JOURNAL_HEADER = struct.Struct("<8sI4xQQ") # magic, key version, zobrist seed, generation
+RECORD = struct.Struct("<QbB") # hash key, score, seeds on the board (for max_seeds)
+
+FLUSH_INTERVAL = 2.0        # Seconds between background flushes
+FLUSH_THRESHOLD = 4096      # Buffered positions that wake the writer early
+COMPACT_MIN_RECORDS = 65536 # Journal size below which save() never compacts
+
+# Live databases (their writer threads are reset after fork, flushed at exit)
+_INSTANCES: "weakref.WeakSet[EndgameDB]" = weakref.WeakSet()
+
+class StaleDatabaseError(Exception):
+    """
+    The file was written with other hash keys (or an older format whose
+    keys came from per-process random tables): its lookups can never hit.
+    """
 
 class EndgameDB:
-    def __init__(self) -> None:
-        self.db: Dict[str, int] = {} # Hash (str) -> Score (int)
+    """
+    Solved positions (hash -> exact score). With lazy=True nothing is read
+    until the first lookup/add/save (or an explicit ensure_loaded()), so
+    importing the engine stays cheap.
+
+    New positions are buffered in memory and nothing is written until the
+    caller opts into persistence with persist() (or save()). From then on,
+    with write_behind=True a background thread appends them to the journal
+    (<path>.journal) every FLUSH_INTERVAL seconds or once FLUSH_THRESHOLD
+    are waiting, so the search never waits for the disk, and positions
+    still buffered at exit are flushed. save() flushes synchronously, picks
+    up what other processes appended and compacts the journal into the
+    sorted file once it has grown large.
+    """
+    def __init__(self, path: str = DB_FILE, lazy: bool = False, write_behind: bool = True) -> None:
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.write_behind = write_behind
+        self.persistent = False # Set by persist(): buffered positions reach the disk
+        self.pending: Dict[int, int] = {} # Hash -> Score, not yet written to disk
+        self.journal: Dict[int, int] = {} # Hash -> Score, in the journal (not yet compacted)
         self.max_seeds: int = 0
-        self.load()
+        self._file_count = 0
+        self._generation: Optional[int] = None
+        self._journal_offset = 0
+        self._file: Optional[Any] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._keys: Any = ()
+        self._scores: Any = ()
+        self.loaded = False
+        self.lookups = 0
+        self.hits = 0
+        self._init_writer()
+        _INSTANCES.add(self)
+        if not lazy:
+            self.load()
+
+    def _init_writer(self) -> None:
+        self._lock = threading.Lock()       # Guards swapping out `pending`
+        self._flush_lock = threading.Lock() # Serializes journal writes and compaction
+        self._wake = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._stopping = False
+
+    @property
+    def count(self) -> int:
+        """
+        Positions on disk: the sorted file plus the journal (a position in
+        both counts twice until the next compaction).
+        """
+        return self._file_count + len(self.journal)
+
+    def ensure_loaded(self) -> None:
+        if not self.loaded:
+            self.load()
 
     def load(self) -> None:
-        if os.path.exists(DB_FILE):
+        self.close()
+        self.loaded = True
+        self.journal = {}
+        self._generation = None
+        if self.path == DB_FILE and not os.path.exists(self.path) and os.path.exists(LEGACY_JSON_FILE):
+            # Keyed with the random tables of the process that wrote it, so never converted
+            print(f"Ignoring {LEGACY_JSON_FILE}: its keys predate stable Zobrist seeding.")
+
+        if os.path.exists(self.journal_path):
             try:
-                with open(DB_FILE, 'r') as f:
-                    data = json.load(f)
-                    self.db = data.get("positions", {})
-                    self.max_seeds = data.get("max_seeds", 0)
-                    print(f"Loaded {len(self.db)} solved positions from {DB_FILE}. Max seeds: {self.max_seeds}")
+                with open(self.journal_path, 'rb') as f, _locked(f, exclusive=False):
+                    self._sync_journal(f)
+            except StaleDatabaseError as e:
+                self.journal = {}
+                discard_stale(self.journal_path, str(e))
             except Exception as e:
-                print(f"Error loading {DB_FILE}: {e}")
-                self.db = {}
+                print(f"Error loading {self.journal_path}: {e}")
+                self.journal = {}
+        if self._generation is None:
+            self._open_file()
+
+        if self.count:
+            print(f"Loaded {self.count} solved positions from {self.path}. Max seeds: {self.max_seeds}")
         else:
             print("No endgame database found. Starting fresh.")
 
+    def _open_file(self) -> None:
+        """
+        (Re)maps the sorted file; a stale one is discarded.
+        """
+        self._close_file()
+        if not os.path.exists(self.path):
+            return
+        try:
+            self._map()
+        except StaleDatabaseError as e:
+            self._close_file()
+            discard_stale(self.path, str(e))
+        except Exception as e:
+            print(f"Error loading {self.path}: {e}")
+            self._close_file()
+
+    def _map(self) -> None:
+        self._file = open(self.path, 'rb')
+        magic, version = PREFIX.unpack(self._file.read(PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError("not an endgame database file")
+        if version != FORMAT_VERSION:
+            raise StaleDatabaseError(f"format version {version}")
+        self._file.seek(0)
+        _, _, max_seeds, count, seed, key_version = HEADER.unpack(self._file.read(HEADER.size))
+        _check_keys(seed, key_version)
+
+        self.max_seeds = max(self.max_seeds, max_seeds)
+        self._file_count = count
+        if count:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(self._mm)
+            keys_end = HEADER.size + 8 * count
+            self._keys = view[HEADER.size:keys_end].cast('Q')
+            self._scores = view[keys_end:keys_end + count].cast('b')
+
+    def _sync_journal(self, f: Any) -> None:
+        """
+        Reads the journal records not seen yet (the caller holds the lock).
+        If another process compacted the journal since, the sorted file is
+        remapped and the journal read from the start. A torn record at the
+        end (crash or an append in progress) is left for the next read.
+        """
+        f.seek(0)
+        header = f.read(JOURNAL_HEADER.size)
+        if len(header) < JOURNAL_HEADER.size:
+            return
+        magic, key_version, seed, generation = JOURNAL_HEADER.unpack(header)
+        if magic != JOURNAL_MAGIC:
+            raise ValueError("not an endgame database journal")
+        _check_keys(seed, key_version)
+
+        if generation != self._generation:
+            self._open_file()
+            self.journal = {}
+            self._generation = generation
+            self._journal_offset = JOURNAL_HEADER.size
+        f.seek(self._journal_offset)
+        data = f.read()
+        usable = len(data) - len(data) % RECORD.size
+        journal = self.journal
+        for key, score, seeds in RECORD.iter_unpack(data[:usable]):
+            journal[key] = score
+            if seeds > self.max_seeds:
+                self.max_seeds = seeds
+        self._journal_offset += usable
+
+    def _close_file(self) -> None:
+        if isinstance(self._keys, memoryview):
+            self._keys.release()
+            self._scores.release()
+        self._keys = ()
+        self._scores = ()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._file_count = 0
+
+    def close(self) -> None:
+        """
+        Stops the writer thread and unmaps the file (positions not yet
+        flushed are kept in memory).
+        """
+        if self._writer is not None:
+            self._stopping = True
+            self._wake.set()
+            self._writer.join()
+            self._writer = None
+            self._stopping = False
+        self._close_file()
+
+    def flush(self) -> int:
+        """
+        Appends the buffered positions to the journal under an exclusive
+        file lock and fsyncs it. Returns the number of positions written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = self.pending
+                if not batch:
+                    return 0
+                self.journal.update(batch)
+                self.pending = {}
+            seeds = min(self.max_seeds, 255)
+            data = b"".join(RECORD.pack(key, max(-128, min(127, score)), seeds) for key, score in batch.items())
+            with open(self.journal_path, 'a+b') as f, _locked(f, exclusive=True):
+                if f.seek(0, os.SEEK_END) == 0:
+                    generation = self._generation or 0
+                    f.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, zobrist.key_version, zobrist.seed or 0, generation))
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            return len(batch)
+
+    def refresh(self) -> None:
+        """
+        Picks up positions other processes appended to the journal.
+        """
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'rb') as f, _locked(f, exclusive=False):
+                self._sync_journal(f)
+
+    def compact(self) -> None:
+        """
+        Merges the journal into the sorted file (written to a temporary
+        file, fsynced, then swapped in) and empties the journal. Runs under
+        the exclusive journal lock, so no process appends meanwhile; a crash
+        before the journal is emptied only replays entries already merged.
+        """
+        self.ensure_loaded()
+        with self._flush_lock:
+            with open(self.journal_path, 'a+b') as f, _locked(f, exclusive=True):
+                self._sync_journal(f)
+                merged = dict(zip(self._keys, self._scores))
+                merged.update(self.journal)
+                with self._lock:
+                    merged.update(self.pending)
+                    self.pending = {}
+                self._close_file()
+                write_db(self.path, merged, self.max_seeds)
+
+                self._generation = (self._generation or 0) + 1
+                f.truncate(0)
+                f.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, zobrist.key_version, zobrist.seed or 0, self._generation))
+                f.flush()
+                os.fsync(f.fileno())
+                self.journal = {}
+                self._journal_offset = JOURNAL_HEADER.size
+                self._open_file()
+
+    def persist(self) -> None:
+        """
+        Opts into writing buffered positions to disk: starts the writer
+        thread (with write_behind=True) and the flush at exit.
+        """
+        self.persistent = True
+        self._start_writer()
+
+    def _start_writer(self) -> None:
+        if self.write_behind and self._writer is None:
+            self._writer = threading.Thread(target=self._write_behind, name="endgame-db-writer", daemon=True)
+            self._writer.start()
+
     def save(self) -> None:
+        """
+        Flushes the buffered positions to the journal, reads what other
+        processes added, and compacts once the journal holds at least
+        COMPACT_MIN_RECORDS positions and as many as the sorted file.
+        """
+        self.ensure_loaded()
+        self.persist()
         try:
-            with open(DB_FILE, 'w') as f:
-                data = {
-                    "max_seeds": self.max_seeds,
-                    "positions": self.db
-                }
-                json.dump(data, f, indent=4)
-            print(f"Saved {len(self.db)} positions to {DB_FILE}.")
+            written = self.flush()
+            self.refresh()
+            if len(self.journal) >= max(COMPACT_MIN_RECORDS, self._file_count):
+                self.compact()
+            if written:
+                print(f"Saved {self.count} positions to {self.path}.")
         except Exception as e:
-            print(f"Error saving {DB_FILE}: {e}")
+            print(f"Error saving {self.path}: {e}")
 
-    def lookup(self, board: List[int], player: int) -> Optional[int]:
+    def lookup(self, board: List[int], player: int, board_hash: Optional[int] = None) -> Optional[int]:
         """
         Returns exact score if position is solved, else None.
+        board_hash is the 64-bit key (default: zobrist.position_key); the
+        search passes its canonical key and stores relative values.
         """
-        h = str(zobrist.compute_hash(board, player))
-        return self.db.get(h)
+        if not self.loaded:
+            self.load()
+        if board_hash is None:
+            board_hash = zobrist.position_key(board, player)
+        self.lookups += 1
+        score = self.pending.get(board_hash)
+        if score is None:
+            score = self.journal.get(board_hash)
+            if score is None:
+                i = self._find(board_hash)
+                if i is None:
+                    return None
+                score = self._scores[i]
+        self.hits += 1
+        return score
 
-    def add(self, board: List[int], player: int, score: int) -> None:
+    def add(self, board: List[int], player: int, score: int, board_hash: Optional[int] = None) -> None:
         """
-        Adds a solved position.
+        Adds a solved position (buffered; see flush).
         """
-        h = str(zobrist.compute_hash(board, player))
-        self.db[h] = score
-        
+        if not self.loaded:
+            self.load()
+        if board_hash is None:
+            board_hash = zobrist.position_key(board, player)
+        with self._lock:
+            self.pending[board_hash] = score
+
         current_seeds = sum(board)
         if current_seeds > self.max_seeds:
             self.max_seeds = current_seeds
 
-endgame_db = EndgameDB()
+        if self.persistent:
+            if self._writer is None:
+                self._start_writer() # First add after fork() or close()
+            elif len(self.pending) >= FLUSH_THRESHOLD:
+                self._wake.set()
+
+    def _write_behind(self) -> None:
+        while not self._stopping:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error writing {self.journal_path}: {e}")
+
+    def __len__(self) -> int:
+        self.ensure_loaded()
+        unsorted = dict(self.journal)
+        unsorted.update(self.pending)
+        return self._file_count + sum(1 for h in unsorted if self._find(h) is None)
+
+    def _find(self, board_hash: int) -> Optional[int]:
+        i = bisect_left(self._keys, board_hash)
+        if i < self._file_count and self._keys[i] == board_hash:
+            return i
+        return None
+
+def _check_keys(seed: int, key_version: int) -> None:
+    if not key_version or key_version != zobrist.key_version or seed != zobrist.seed:
+        raise StaleDatabaseError(f"keys from Zobrist seed {seed:#x} version {key_version}")
+
+@contextmanager
+def _locked(f: Any, exclusive: bool) -> Iterator[None]:
+    """
+    Advisory lock on an open file, held for the with block: shared for
+    readers, exclusive for writers (always exclusive on Windows).
+    """
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _after_fork() -> None:
+    # Threads and held locks do not survive fork: give every database fresh ones
+    for db in list(_INSTANCES):
+        db._init_writer()
+
+def _flush_at_exit() -> None:
+    for db in list(_INSTANCES):
+        if db.persistent and db.pending:
+            try:
+                db.flush()
+            except Exception as e:
+                print(f"Error writing {db.journal_path}: {e}")
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+atexit.register(_flush_at_exit)
+
+def write_db(path: str, positions: Dict[int, int], max_seeds: int) -> None:
+    """
+    Writes positions (hash -> score) in the binary format, stamped with
+    the global hasher's seed and key version.
+    """
+    keys = sorted(positions)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, max_seeds, len(keys), zobrist.seed or 0, zobrist.key_version))
+        f.write(array('Q', keys).tobytes())
+        f.write(array('b', (max(-128, min(127, positions[k])) for k in keys)).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def discard_stale(path: str, reason: str) -> str:
+    """
+    Migration for a database whose keys cannot match this process: it is
+    renamed to <path>.stale (replacing an older one) and the search starts
+    from an empty database, refilling it as it solves positions again.
+    Hashes cannot be turned back into positions, so entries are not re-keyed.
+    Returns the new path.
+    """
+    stale_path = path + STALE_SUFFIX
+    os.replace(path, stale_path)
+    print(f"Discarded stale endgame database {path} ({reason}); moved to {stale_path}.")
+    return stale_path
+
+def convert_json(json_path: str = LEGACY_JSON_FILE, bin_path: str = DB_FILE) -> int:
+    """
+    Conversion of a JSON database into the binary format. Only meaningful
+    for JSON keyed with the current Zobrist seed: the old endgame_db.json
+    files were hashed with per-process random keys and are ignored on load.
+    Returns the number of positions written.
+    """
+    with open(json_path, 'r') as f:
+        data = json.load(f)
+    positions = {int(h): int(score) for h, score in data.get("positions", {}).items()}
+    write_db(bin_path, positions, data.get("max_seeds", 0))
+    print(f"Converted {len(positions)} positions from {json_path} to {bin_path}.")
+    return len(positions)
+
+# Global instance, read from disk on first use
+endgame_db = EndgameDB(lazy=True)
+
+def endgame_positions(count: int, max_pit_seeds: int = 14, seed: int = 0) -> List[Tuple[List[int], int]]:
+    """
+    Deterministic late-game positions (at most max_pit_seeds seeds left in
+    the pits) from random games, for the restart benchmark.
+    """
+    try:
+        from game_logic import initial_state, legal_moves, apply_move, is_terminal, P1_STORE, P2_STORE
+    except ImportError:
+        from kalaha.game_logic import initial_state, legal_moves, apply_move, is_terminal, P1_STORE, P2_STORE
+    import random
+
+    rng = random.Random(seed)
+    positions: List[Tuple[List[int], int]] = []
+    while len(positions) < count:
+        board, player = initial_state(), 0
+        while not is_terminal(board):
+            if sum(board) - board[P1_STORE] - board[P2_STORE] <= max_pit_seeds:
+                positions.append((board, player))
+                break
+            board, extra = apply_move(board, rng.choice(legal_moves(board, player)), player)
+            player = player if extra else 1 - player
+    return positions
+
+def run_benchmark_phase(path: str, positions: int, depth: int) -> Dict[str, Any]:
+    """
+    Searches the benchmark positions with `path` as the endgame database
+    (fresh TT for every position, so only the database carries over) and
+    saves it. Returns lookups, hits, search time and save time.
+    """
+    try:
+        import ai_engine
+    except ImportError:
+        import kalaha.ai_engine as ai_engine
+
+    db = EndgameDB(path)
+    db.persist()
+    ai_engine.endgame_db = db
+    start = time.perf_counter()
+    for board, player in endgame_positions(positions):
+        ai_engine.reset_search_state()
+        ai_engine.get_best_move(board, player, depth=depth, use_book=False)
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    db.save()
+    save_time = time.perf_counter() - start
+    db.close()
+    return {"lookups": db.lookups, "hits": db.hits, "time": elapsed, "save": save_time}
+
+def restart_benchmark(path: str, positions: int = 40, depth: int = 8) -> List[Dict[str, Any]]:
+    """
+    Cache hits across restarts: runs the same searches in separate
+    processes against one database file: fresh file, restart with the
+    same keys, then a process with random keys (the old behaviour), then
+    the seeded keys again after that process' file was discarded.
+    """
+    phases = [("first run", False), ("restart", False), ("random keys", True), ("after migration", False)]
+    for stale in (path, path + JOURNAL_SUFFIX):
+        for p in (stale, stale + STALE_SUFFIX):
+            if os.path.exists(p):
+                os.remove(p)
+    results = []
+    print(f"{'phase':16} {'lookups':>9} {'hits':>8} {'hit rate':>9} {'time':>8} {'save':>8}")
+    for name, random_keys in phases:
+        cmd = [sys.executable, os.path.abspath(__file__), "--benchmark-phase", path,
+               "--positions", str(positions), "--depth", str(depth)]
+        if random_keys:
+            cmd.append("--random-keys")
+        output = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        result["phase"] = name
+        results.append(result)
+        rate = result["hits"] / result["lookups"] if result["lookups"] else 0.0
+        print(f"{name:16} {result['lookups']:9} {result['hits']:8} {rate:9.1%} {result['time']:7.2f}s {result['save'] * 1000:6.1f}ms")
+    return results
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Endgame database tools")
+    parser.add_argument("--convert", nargs=2, metavar=("JSON", "BIN"),
+                        help="Convert a JSON endgame database to the binary format")
+    parser.add_argument("--compact", metavar="BIN",
+                        help="Merge the journal into the sorted file")
+    parser.add_argument("--migrate", metavar="BIN",
+                        help="Check a database file and discard it if its keys are stale")
+    parser.add_argument("--restart-benchmark", metavar="BIN",
+                        help="Measure database hits across process restarts (file is overwritten)")
+    parser.add_argument("--positions", type=int, default=40,
+                        help="Benchmark positions (default: 40)")
+    parser.add_argument("--depth", type=int, default=8,
+                        help="Benchmark search depth (default: 8)")
+    parser.add_argument("--benchmark-phase", metavar="BIN", help=argparse.SUPPRESS)
+    parser.add_argument("--random-keys", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.convert:
+        convert_json(args.convert[0], args.convert[1])
+    if args.compact:
+        db = EndgameDB(args.compact)
+        db.compact()
+        print(f"Compacted {db.count} positions into {args.compact}.")
+        db.close()
+    if args.migrate:
+        EndgameDB(args.migrate).close()
+    if args.restart_benchmark:
+        restart_benchmark(args.restart_benchmark, args.positions, args.depth)
+    if args.benchmark_phase:
+        if args.random_keys:
+            zobrist.__init__(None) # Per-process random keys, as before stable seeding
+        print(json.dumps(run_benchmark_phase(args.benchmark_phase, args.positions, args.depth)))
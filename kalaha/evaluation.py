@@ -0,0 +1,282 @@
+"""
+Table-driven position evaluation.
+
+A position is scored as a weighted sum over a fixed feature set (FEATURES),
+all from Player 0's point of view. Strategies are named weight presets
+(STRATEGY_WEIGHTS); for each one an evaluator is prepared once that only
+computes the features with a non-zero weight, so the search pays nothing
+for unused features and never branches on the strategy name.
+
+The presets reproduce the original hand-written strategies exactly (same
+floating-point operations in the same order), so searches visit the same
+nodes as before.
+
+Boards of other rule variants get their own evaluators (evaluators_for,
+heuristic_for), with the pit ranges bound in, so they cost the same.
+
+evaluate_batch scores an (N, 14) NumPy array of boards with any weight
+vector, for tuning weights on large position sets.
+"""
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+try:
+    from game_logic import (
+        P1_PITS, P2_PITS, P1_STORE, P2_STORE, SOW_CYCLE, RuleSet, DEFAULT_RULES
+    )
+except ImportError:
+    from kalaha.game_logic import (
+        P1_PITS, P2_PITS, P1_STORE, P2_STORE, SOW_CYCLE, RuleSet, DEFAULT_RULES
+    )
+
+FEATURES = (
+    'store_diff',      # Seeds in Player 0's store minus Player 1's
+    'side_diff',       # Seeds on Player 0's side minus Player 1's
+    'p1_empty',        # Empty pits on Player 0's side
+    'p2_empty',        # Empty pits on Player 1's side
+    'capture_diff',    # Best immediate capture of Player 0 minus Player 1's (seeds won)
+    'extra_turn_diff', # Pits that would end in the own store, Player 0 minus Player 1
+)
+NUM_FEATURES = len(FEATURES)
+
+STRATEGY_WEIGHTS: Dict[str, Sequence[float]] = {
+    'basic':      (1.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+    'balanced':   (1.0, 0.5, 0.0, 0.0, 0.0, 0.0),
+    'aggressive': (1.0, 0.3, 0.0, 0.0, 0.0, 0.0),
+    'defensive':  (1.0, 0.8, -2.0, 0.0, 0.0, 0.0),
+}
+
+def _rule_tables(rules: RuleSet) -> Tuple[List[int], List[List[List[int]]]]:
+    """
+    (EXTRA_TURN_SEEDS, STORE_SOWN) of a ruleset:
+    EXTRA_TURN_SEEDS[i]: seeds pit i needs (mod sow_cycle) for its last seed to land in the own store;
+    STORE_SOWN[player][move][r]: 1 if the first r pits sown from `move` include the own store.
+    """
+    p1_store, p2_store = rules.stores
+    extra_turn_seeds = [
+        (p1_store - i) if i in rules.p1_pits else (p2_store - i) if i in rules.p2_pits else -1
+        for i in range(rules.total_pits)
+    ]
+    store_sown = [
+        [[int(rules.stores[p] in order[:r]) for r in range(rules.sow_cycle)] for order in per_move]
+        for p, per_move in enumerate(rules.sow_order)
+    ]
+    return extra_turn_seeds, store_sown
+
+EXTRA_TURN_SEEDS, STORE_SOWN = _rule_tables(DEFAULT_RULES)
+_RULE_TABLES = {DEFAULT_RULES: (EXTRA_TURN_SEEDS, STORE_SOWN)}
+
+def _tables_for(rules: RuleSet) -> Tuple[List[int], List[List[List[int]]]]:
+    tables = _RULE_TABLES.get(rules)
+    if tables is None:
+        tables = _RULE_TABLES[rules] = _rule_tables(rules)
+    return tables
+
+def best_capture(board: List[int], player: int, rules: RuleSet = DEFAULT_RULES) -> int:
+    """
+    Most seeds `player` would win by a capture if it were to move now
+    (captured seeds plus the capturing one), 0 if there is none.
+    Only moves landing in an empty own pit are played out.
+    """
+    return _best_capture(board, player, rules, _tables_for(rules)[1][player])
+
+def _best_capture(board: List[int], player: int, rules: RuleSet, store_sown: List[List[int]]) -> int:
+    store = rules.stores[player]
+    first = store - rules.pits
+    best = 0
+    for move in range(first, store):
+        seeds = board[move]
+        if not seeds:
+            continue
+        laps, rem = divmod(seeds, rules.sow_cycle)
+        last = rules.last_pit[player][move][rem]
+        if first <= last < store and (board[last] == 0 or last == move):
+            child, _ = rules.apply_move(board, move, player)
+            if child[last] == 0: # Captured: the landing pit was emptied into the store
+                gain = child[store] - board[store] - laps - store_sown[move][rem]
+                if gain > best:
+                    best = gain
+    return best
+
+def feature_functions(rules: RuleSet = DEFAULT_RULES) -> List[Callable[[List[int]], int]]:
+    """
+    One function per feature (in FEATURES order) for boards of `rules`;
+    the pit ranges are bound into each function once.
+    """
+    p1_store, p2_store = rules.stores
+    p2_first = p1_store + 1
+    extra_turn_seeds, store_sown = _tables_for(rules)
+    cycle = rules.sow_cycle
+
+    def store_diff(board: List[int]) -> int:
+        return board[p1_store] - board[p2_store]
+
+    def side_diff(board: List[int]) -> int:
+        return sum(board[0:p1_store]) - sum(board[p2_first:p2_store])
+
+    def p1_empty(board: List[int]) -> int:
+        return board[0:p1_store].count(0)
+
+    def p2_empty(board: List[int]) -> int:
+        return board[p2_first:p2_store].count(0)
+
+    def capture_diff(board: List[int]) -> int:
+        return _best_capture(board, 0, rules, store_sown[0]) - _best_capture(board, 1, rules, store_sown[1])
+
+    def extra_turn_diff(board: List[int]) -> int:
+        count = 0
+        for i in rules.p1_pits:
+            if board[i] and board[i] % cycle == extra_turn_seeds[i]:
+                count += 1
+        for i in rules.p2_pits:
+            if board[i] and board[i] % cycle == extra_turn_seeds[i]:
+                count -= 1
+        return count
+
+    return [store_diff, side_diff, p1_empty, p2_empty, capture_diff, extra_turn_diff]
+
+FEATURE_FUNCTIONS: List[Callable[[List[int]], int]] = feature_functions(DEFAULT_RULES)
+
+def features(board: List[int]) -> List[int]:
+    """
+    All feature values of a position, in FEATURES order.
+    """
+    return [f(board) for f in FEATURE_FUNCTIONS]
+
+def make_evaluator(weights: Sequence[float], rules: RuleSet = DEFAULT_RULES) -> Callable[[List[int]], float]:
+    """
+    Evaluation function for a weight vector: sum of weight * feature over
+    the features with a non-zero weight, added in FEATURES order.
+    """
+    if len(weights) != NUM_FEATURES:
+        raise ValueError(f"expected {NUM_FEATURES} weights, got {len(weights)}")
+    active = [(j, float(w)) for j, w in enumerate(weights) if w]
+    p1_store, p2_store = rules.stores
+    p2_first = p1_store + 1
+
+    # Fast paths for the shapes of the built-in presets
+    if len(active) == 1 and active[0] == (0, 1.0):
+        return lambda board: float(board[p1_store] - board[p2_store])
+    if len(active) == 2 and active[0] == (0, 1.0) and active[1][0] == 1:
+        w_side = active[1][1]
+        return lambda board: (board[p1_store] - board[p2_store]) + w_side * (sum(board[0:p1_store]) - sum(board[p2_first:p2_store]))
+
+    functions = FEATURE_FUNCTIONS if rules == DEFAULT_RULES else feature_functions(rules)
+    active_functions = [(functions[j], w) for j, w in active]
+
+    def evaluate(board: List[int]) -> float:
+        score = 0.0
+        for f, w in active_functions:
+            score += w * f(board)
+        return score
+    return evaluate
+
+EVALUATORS: Dict[str, Callable[[List[int]], float]] = {
+    name: make_evaluator(weights) for name, weights in STRATEGY_WEIGHTS.items()
+}
+
+# EVALUATORS of the other rulesets, built on first use
+_RULE_EVALUATORS: Dict[RuleSet, Dict[str, Callable[[List[int]], float]]] = {}
+
+def evaluators_for(rules: RuleSet) -> Dict[str, Callable[[List[int]], float]]:
+    """
+    EVALUATORS for boards of `rules` (every strategy in STRATEGY_WEIGHTS).
+    """
+    if rules == DEFAULT_RULES:
+        return EVALUATORS
+    evaluators = _RULE_EVALUATORS.get(rules)
+    if evaluators is None:
+        evaluators = _RULE_EVALUATORS[rules] = {
+            name: make_evaluator(weights, rules) for name, weights in STRATEGY_WEIGHTS.items()
+        }
+    return evaluators
+
+def add_strategy(name: str, weights: Sequence[float]) -> None:
+    """
+    Registers (or replaces) a named weight preset, usable as `strategy`
+    everywhere a strategy name is accepted.
+    """
+    evaluator = make_evaluator(weights)
+    STRATEGY_WEIGHTS[name] = tuple(float(w) for w in weights)
+    EVALUATORS[name] = evaluator
+    for rules, evaluators in _RULE_EVALUATORS.items():
+        evaluators[name] = make_evaluator(weights, rules)
+
+def evaluate_heuristic(board: List[int], player: int, strategy: str = 'balanced') -> float:
+    """
+    Advanced heuristic evaluation with multiple strategies.
+    Positive value favors Player 0 (P1/Max).
+    Strategies: the presets in STRATEGY_WEIGHTS ('balanced', 'aggressive',
+    'defensive', 'basic'); unknown names score the store difference only.
+    """
+    return EVALUATORS.get(strategy, EVALUATORS['basic'])(board)
+
+def heuristic_for(rules: RuleSet) -> Callable[[List[int], int, str], float]:
+    """
+    evaluate_heuristic for boards of `rules`.
+    """
+    if rules == DEFAULT_RULES:
+        return evaluate_heuristic
+
+    evaluators = evaluators_for(rules)
+
+    def evaluate(board: List[int], player: int, strategy: str = 'balanced') -> float:
+        return evaluators.get(strategy, evaluators['basic'])(board)
+    return evaluate
+
+def features_batch(boards: Any) -> Any:
+    """
+    (N, NUM_FEATURES) float array of the features of an (N, 14) board array
+    (NumPy and batch_logic are imported on first use).
+    """
+    import numpy as np
+    try:
+        import batch_logic
+    except ImportError:
+        import kalaha.batch_logic as batch_logic
+
+    boards = np.asarray(boards)
+    n = len(boards)
+    out = np.empty((n, NUM_FEATURES), dtype=np.float64)
+    p1 = boards[:, P1_PITS]
+    p2 = boards[:, P2_PITS]
+    out[:, 0] = boards[:, P1_STORE] - boards[:, P2_STORE]
+    out[:, 1] = p1.sum(axis=1) - p2.sum(axis=1)
+    out[:, 2] = (p1 == 0).sum(axis=1)
+    out[:, 3] = (p2 == 0).sum(axis=1)
+
+    extra_seeds = np.array(EXTRA_TURN_SEEDS)
+    extra = (boards > 0) & (boards % SOW_CYCLE == extra_seeds)
+    out[:, 5] = extra[:, P1_PITS].sum(axis=1) - extra[:, P2_PITS].sum(axis=1)
+
+    store_sown = np.array(STORE_SOWN)
+    best = np.zeros((2, n), dtype=np.int64)
+    for player, pits in ((0, P1_PITS), (1, P2_PITS)):
+        store = (P1_STORE, P2_STORE)[player]
+        players = np.full(n, player)
+        for move in pits:
+            seeds = boards[:, move].astype(np.int64)
+            laps, rem = np.divmod(seeds, SOW_CYCLE)
+            new, _, _ = batch_logic.apply_moves_batch(boards, np.full(n, move), players)
+            last = batch_logic.LAST_PIT_TABLE[player, move, rem]
+            own = (last >= store - 6) & (last < store)
+            captured = (seeds > 0) & own & (new[np.arange(n), last] == 0)
+            gain = new[:, store] - boards[:, store] - laps - store_sown[player, move, rem]
+            best[player] = np.maximum(best[player], np.where(captured, gain, 0))
+    out[:, 4] = best[0] - best[1]
+    return out
+
+def evaluate_batch(boards: Any, weights: Any = None, strategy: str = 'balanced') -> Any:
+    """
+    Scores of an (N, 14) board array: features_batch(boards) times weights
+    (the strategy's preset when weights is None). Shape (N,).
+    """
+    import numpy as np
+    if weights is None:
+        weights = STRATEGY_WEIGHTS.get(strategy, STRATEGY_WEIGHTS['basic'])
+    feats = features_batch(boards)
+    # Column by column in FEATURES order, so scores equal evaluate_heuristic's bit for bit
+    scores = np.zeros(len(feats), dtype=np.float64)
+    for j, w in enumerate(weights):
+        if w:
+            scores += float(w) * feats[:, j]
+    return scores
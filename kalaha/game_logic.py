@@ -1,5 +1,5 @@
 import copy
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 # Constants
 P1_PITS = list(range(0, 6))
@@ -130,3 +130,312 @@ def get_sowing_path(board: List[int], move: int, player: int) -> List[int]:
         temp_seeds -= 1
         
     return path
+
+# ---------------------------------------------------------------------------
+# Rule variants
+# ---------------------------------------------------------------------------
+
+class RuleSet:
+    """
+    A Kalah variant: `pits` pits per side, `seeds` seeds per pit at the
+    start, and whether a last seed landing in an empty own pit is captured
+    even when the opposite pit is empty (empty_capture; the default rules
+    only capture when the opposite pit has seeds).
+
+    Boards keep the default layout scaled to the variant: Player 0's pits
+    are 0..pits-1 and its store is pits, Player 1's pits follow and its
+    store is the last index. All sowing tables are precomputed per ruleset,
+    and the methods below only index them, so every variant runs the same
+    code as fast as the default rules (the module-level functions, which
+    stay the reference implementation of Kalah(6,6)).
+    """
+    def __init__(self, pits: int = 6, seeds: int = 6, empty_capture: bool = False) -> None:
+        if pits < 1 or seeds < 1:
+            raise ValueError(f"invalid ruleset: {pits} pits, {seeds} seeds")
+        self.pits = pits
+        self.seeds = seeds
+        self.empty_capture = empty_capture
+        self.name = f"kalah({pits},{seeds})" + ("+empty" if empty_capture else "")
+
+        self.total_pits = 2 * pits + 2
+        self.p1_store = pits
+        self.p2_store = 2 * pits + 1
+        self.p1_pits = list(range(0, pits))
+        self.p2_pits = list(range(pits + 1, 2 * pits + 1))
+        self.stores = (self.p1_store, self.p2_store)
+        self.total_seeds = 2 * pits * seeds
+        self.sow_cycle = self.total_pits - 1 # Pits visited in one lap (opponent store skipped)
+
+        # OPPOSITE[i]: the pit facing pit i; OWN_PIT[player][i]: i is one of player's pits
+        self.opposite = [2 * pits - i if i not in self.stores else -1 for i in range(self.total_pits)]
+        self.own_pit = [[i in self.p1_pits for i in range(self.total_pits)],
+                        [i in self.p2_pits for i in range(self.total_pits)]]
+
+        # SOW_ORDER[player][move]: the sow_cycle pits receiving a seed, in
+        # order, when sowing from `move` (one full lap, ending back on `move`)
+        self.sow_order: List[List[List[int]]] = []
+        for player in (0, 1):
+            skip = self.stores[1 - player]
+            per_move: List[List[int]] = []
+            for move in range(self.total_pits):
+                path = []
+                idx = move
+                while len(path) < self.sow_cycle:
+                    idx = (idx + 1) % self.total_pits
+                    if idx != skip:
+                        path.append(idx)
+                per_move.append(path)
+            self.sow_order.append(per_move)
+
+        # LAST_PIT[player][move][seeds % sow_cycle]: pit where the last seed lands
+        self.last_pit = [
+            [[order[(r - 1) % self.sow_cycle] for r in range(self.sow_cycle)] for order in per_move]
+            for per_move in self.sow_order
+        ]
+
+        # Packed boards: pit_bits bits per pit, enough for every seed in one pit
+        self.pit_bits = max(self.total_seeds.bit_length(), 1)
+        self.pit_mask = (1 << self.pit_bits) - 1
+        bits = self.pit_bits
+        self.lap_mask = [
+            sum(1 << (i * bits) for i in range(self.total_pits) if i != self.stores[1 - p]) for p in (0, 1)
+        ]
+        self.sow_mask = [
+            [[sum(1 << (i * bits) for i in order[:r]) for r in range(self.sow_cycle)] for order in per_move]
+            for per_move in self.sow_order
+        ]
+        self.side_masks = (
+            sum(self.pit_mask << (i * bits) for i in self.p1_pits),
+            sum(self.pit_mask << (i * bits) for i in self.p2_pits),
+        )
+
+    def __repr__(self) -> str:
+        return f"RuleSet({self.pits}, {self.seeds}, empty_capture={self.empty_capture})"
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, RuleSet) and (self.pits, self.seeds, self.empty_capture) == (other.pits, other.seeds, other.empty_capture)
+
+    def __hash__(self) -> int:
+        return hash((self.pits, self.seeds, self.empty_capture))
+
+    def initial_state(self) -> List[int]:
+        board = [self.seeds] * self.total_pits
+        board[self.p1_store] = board[self.p2_store] = 0
+        return board
+
+    def legal_moves(self, board: List[int], player: int) -> List[int]:
+        return [i for i in (self.p2_pits if player else self.p1_pits) if board[i] > 0]
+
+    def is_terminal(self, board: List[int]) -> bool:
+        return not any(board[0:self.p1_store]) or not any(board[self.p1_store + 1:self.p2_store])
+
+    def cleanup_board(self, board: List[int]) -> List[int]:
+        p1, p2 = self.p1_store, self.p2_store
+        new_board = [0] * self.total_pits
+        new_board[p1] = board[p1] + sum(board[0:p1])
+        new_board[p2] = board[p2] + sum(board[p1 + 1:p2])
+        return new_board
+
+    def apply_move(self, board: List[int], move: int, player: int) -> Tuple[List[int], bool]:
+        """
+        Same as apply_move, table-driven: full laps add to every pit of
+        SOW_ORDER at once, the remainder to its first pits.
+        Returns: (new_board, extra_turn_boolean)
+        """
+        new_board = list(board)
+        seeds = new_board[move]
+        new_board[move] = 0
+        laps, rem = divmod(seeds, self.sow_cycle)
+        order = self.sow_order[player][move]
+        if laps:
+            for idx in order:
+                new_board[idx] += laps
+        for idx in order[:rem]:
+            new_board[idx] += 1
+
+        last = self.last_pit[player][move][rem]
+        store = self.stores[player]
+        if last == store:
+            return new_board, True
+
+        # Capture: last seed in an own pit that was empty
+        if self.own_pit[player][last] and new_board[last] == 1:
+            opposite = self.opposite[last]
+            if new_board[opposite] or self.empty_capture:
+                new_board[store] += new_board[opposite] + 1
+                new_board[last] = new_board[opposite] = 0
+        return new_board, False
+
+    def get_sowing_path(self, board: List[int], move: int, player: int) -> List[int]:
+        order = self.sow_order[player][move]
+        return [order[i % self.sow_cycle] for i in range(board[move])]
+
+    def pack_board(self, board: List[int]) -> int:
+        packed = 0
+        for i in range(self.total_pits - 1, -1, -1):
+            packed = (packed << self.pit_bits) | board[i]
+        return packed
+
+    def unpack_board(self, packed: int) -> List[int]:
+        bits, mask = self.pit_bits, self.pit_mask
+        return [(packed >> (i * bits)) & mask for i in range(self.total_pits)]
+
+    def legal_moves_packed(self, packed: int, player: int) -> List[int]:
+        bits, mask = self.pit_bits, self.pit_mask
+        return [i for i in (self.p2_pits if player else self.p1_pits) if (packed >> (i * bits)) & mask]
+
+    def is_terminal_packed(self, packed: int) -> bool:
+        return not (packed & self.side_masks[0]) or not (packed & self.side_masks[1])
+
+    def cleanup_board_packed(self, packed: int) -> int:
+        bits = self.pit_bits
+        board = self.unpack_board(packed)
+        packed &= ~(self.side_masks[0] | self.side_masks[1])
+        packed += (sum(board[0:self.p1_store]) << (self.p1_store * bits))
+        packed += (sum(board[self.p1_store + 1:self.p2_store]) << (self.p2_store * bits))
+        return packed
+
+    def apply_move_packed(self, packed: int, move: int, player: int) -> Tuple[int, bool]:
+        """
+        Same as apply_move_packed, with this ruleset's tables.
+        """
+        bits, mask = self.pit_bits, self.pit_mask
+        shift = move * bits
+        seeds = (packed >> shift) & mask
+        laps, rem = divmod(seeds, self.sow_cycle)
+
+        packed -= seeds << shift
+        if laps:
+            packed += laps * self.lap_mask[player]
+        packed += self.sow_mask[player][move][rem]
+
+        last = self.last_pit[player][move][rem]
+        store = self.stores[player]
+        if last == store:
+            return packed, True
+
+        if self.own_pit[player][last]:
+            last_shift = last * bits
+            if (packed >> last_shift) & mask == 1:
+                opp_shift = self.opposite[last] * bits
+                opp_seeds = (packed >> opp_shift) & mask
+                if opp_seeds or self.empty_capture:
+                    packed -= (1 << last_shift) + (opp_seeds << opp_shift)
+                    packed += (opp_seeds + 1) << (store * bits)
+
+        return packed, False
+
+# The standard rules; the module-level constants and functions are this ruleset
+DEFAULT_RULES = RuleSet(6, 6)
+
+# Variants played in tournaments, by name
+RULESETS: Dict[str, RuleSet] = {
+    rules.name: rules for rules in (
+        RuleSet(4, 4), RuleSet(6, 4), DEFAULT_RULES,
+        RuleSet(4, 4, empty_capture=True), RuleSet(6, 4, empty_capture=True), RuleSet(6, 6, empty_capture=True),
+    )
+}
+
+# ---------------------------------------------------------------------------
+# Packed board representation
+# ---------------------------------------------------------------------------
+# The 14 pits are packed into a single Python int, PIT_BITS bits per pit
+# (pit i lives at bits [i*PIT_BITS, (i+1)*PIT_BITS)). 72 seeds fit in 7 bits,
+# so a whole board is one ~98-bit integer: no list copies, and sowing becomes
+# a couple of additions with precomputed masks.
+
+PIT_BITS = DEFAULT_RULES.pit_bits
+PIT_MASK = DEFAULT_RULES.pit_mask
+SOW_CYCLE = DEFAULT_RULES.sow_cycle
+
+# SOW_ORDER[player][move] -> the 13 pit indices receiving a seed, in order,
+# when sowing from `move` (one full lap, ending back on `move`)
+SOW_ORDER = DEFAULT_RULES.sow_order
+
+# One seed in every pit a full lap touches
+LAP_MASK = DEFAULT_RULES.lap_mask
+
+# SOW_MASK[player][move][r]: one seed in each of the first r pits after `move`
+SOW_MASK = DEFAULT_RULES.sow_mask
+
+# LAST_PIT[player][move][seeds % 13]: pit where the last seed lands
+LAST_PIT = DEFAULT_RULES.last_pit
+
+P1_SIDE_MASK, P2_SIDE_MASK = DEFAULT_RULES.side_masks
+STORES = DEFAULT_RULES.stores
+
+def pack_board(board: List[int]) -> int:
+    """
+    Packs a 14-element list board into a single integer.
+    """
+    packed = 0
+    for i in range(TOTAL_PITS - 1, -1, -1):
+        packed = (packed << PIT_BITS) | board[i]
+    return packed
+
+def unpack_board(packed: int) -> List[int]:
+    """
+    Expands a packed board back into the 14-element list form.
+    """
+    return [(packed >> (i * PIT_BITS)) & PIT_MASK for i in range(TOTAL_PITS)]
+
+def legal_moves_packed(packed: int, player: int) -> List[int]:
+    """
+    Same as legal_moves, for a packed board.
+    """
+    pits = P1_PITS if player == 0 else P2_PITS
+    return [i for i in pits if (packed >> (i * PIT_BITS)) & PIT_MASK]
+
+def is_terminal_packed(packed: int) -> bool:
+    """
+    Same as is_terminal, for a packed board (two mask tests, no loop).
+    """
+    return not (packed & P1_SIDE_MASK) or not (packed & P2_SIDE_MASK)
+
+def cleanup_board_packed(packed: int) -> int:
+    """
+    Same as cleanup_board, for a packed board.
+    """
+    p1_seeds = 0
+    for i in P1_PITS:
+        p1_seeds += (packed >> (i * PIT_BITS)) & PIT_MASK
+    p2_seeds = 0
+    for i in P2_PITS:
+        p2_seeds += (packed >> (i * PIT_BITS)) & PIT_MASK
+    packed &= ~(P1_SIDE_MASK | P2_SIDE_MASK)
+    packed += (p1_seeds << (P1_STORE * PIT_BITS)) + (p2_seeds << (P2_STORE * PIT_BITS))
+    return packed
+
+def apply_move_packed(packed: int, move: int, player: int) -> Tuple[int, bool]:
+    """
+    Same as apply_move, for a packed board.
+    Sowing is closed-form: full laps are added in one step with LAP_MASK,
+    the remainder with a precomputed SOW_MASK.
+    Returns: (new_packed, extra_turn_boolean)
+    """
+    shift = move * PIT_BITS
+    seeds = (packed >> shift) & PIT_MASK
+    laps, rem = divmod(seeds, SOW_CYCLE)
+
+    packed -= seeds << shift
+    if laps:
+        packed += laps * LAP_MASK[player]
+    packed += SOW_MASK[player][move][rem]
+
+    last = LAST_PIT[player][move][rem]
+    store = STORES[player]
+    if last == store:
+        return packed, True
+
+    # Capture: last seed in an own pit that was empty
+    own_side = last < P1_STORE if player == 0 else P1_STORE < last < P2_STORE
+    if own_side:
+        last_shift = last * PIT_BITS
+        if (packed >> last_shift) & PIT_MASK == 1:
+            opp_shift = (12 - last) * PIT_BITS
+            opp_seeds = (packed >> opp_shift) & PIT_MASK
+            if opp_seeds > 0:
+                packed -= (1 << last_shift) + (opp_seeds << opp_shift)
+                packed += (opp_seeds + 1) << (store * PIT_BITS)
+
+    return packed, False
@@ -2,23 +2,30 @@ import pygame
 import sys
 import os
 import time
-import numpy as np
-from typing import List, Tuple, Dict, Any, Optional
-from sb3_contrib import MaskablePPO # type: ignore
+import threading
+from concurrent.futures import Future
+from typing import List, Tuple, Dict, Any, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # numpy and sb3_contrib (torch) are only imported when the PPO agent plays
+    from sb3_contrib import MaskablePPO # type: ignore
 
 from kalaha.gui.constants import (
     BG_COLOR, TEXT_COLOR, ACCENT_COLOR, BUTTON_COLOR, BUTTON_HOVER,
     BORDER_BOARD, BORDER_STORE, ScreenState
 )
 
-# Imports with fallback or absolute paths
+# Engine imports: bare names first, like the engine modules import each other
+# (mixing `kalaha.x` with their `x` would load a second engine, TT and DB)
 try:
-    from kalaha.game_logic import (
+    from game_logic import (
         initial_state, legal_moves, apply_move, is_terminal, cleanup_board, 
         get_sowing_path
     )
-    from kalaha.ai_engine import get_best_move
-    from kalaha.endgame_db import endgame_db
+    from ai_engine import get_best_move
+    from endgame_db import endgame_db
+    from ponder import Ponderer
+    from mcts import get_best_move_mcts, ITERATIONS_PER_DEPTH
 except ImportError:
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
     from kalaha.game_logic import (
@@ -27,6 +34,8 @@ except ImportError:
     )
     from kalaha.ai_engine import get_best_move
     from kalaha.endgame_db import endgame_db
+    from kalaha.ponder import Ponderer
+    from kalaha.mcts import get_best_move_mcts, ITERATIONS_PER_DEPTH
 
 class GameScreen:
     def __init__(self, screen: pygame.Surface, font_med: pygame.font.Font, font_small: pygame.font.Font, config: Dict[str, Any], on_exit: Any) -> None:
@@ -46,8 +55,10 @@ class GameScreen:
             'db': endgame_db,
             'get_path': get_sowing_path
         }
+        self.game_logic['db'].persist() # Solved positions found while playing are kept
 
-        self.rl_model: Optional[MaskablePPO] = None
+        self.rl_model: Optional['MaskablePPO'] = None
+        self.rl_unavailable: bool = False # Set once loading failed (e.g. sb3_contrib missing)
         
         # State
         self.state: ScreenState = ScreenState.IDLE # IDLE, THINKING, ANIMATING, UNDO_ANIMATING
@@ -68,6 +79,21 @@ class GameScreen:
         self.MAX_UNDOS: int = 20
         
         self.bot_thinking_start: float = 0
+        
+        # Bot search running on a background thread (see start_bot_search)
+        self.bot_future: Optional[Future] = None
+        self.cancelled_search: Optional[Future] = None # Still winding down after cancel
+        self.search_stop: threading.Event = threading.Event()
+        self.search_progress: Dict[str, Any] = {} # Last progress_callback info
+        
+        # Settings of the bot's minimax search: the ponderer gets the same ones,
+        # so a ponder hit is what the real search would have returned
+        self.search_settings: Dict[str, Any] = {'depth': self.config['depth'], 'strategy': self.config['strategy']}
+        
+        # Searches the bot's likely positions while the human is choosing a pit
+        self.ponderer: Optional[Ponderer] = None
+        if self.config.get('ponder', 'On') == 'On' and self.config['strategy'] not in ('PPO-Agent', 'MCTS'):
+            self.ponderer = Ponderer(**self.search_settings)
         self.board: List[int] = []
         self.current_player: int = 0
         self.game_over: bool = False
@@ -79,6 +105,7 @@ class GameScreen:
         self.reset_game()
 
     def reset_game(self) -> None:
+        self.cancel_bot_search()
         self.board = self.game_logic['initial_state']()
         self.current_player = 0
         self.game_over = False
@@ -112,6 +139,11 @@ class GameScreen:
         """Undo the last move. Returns True if successful."""
         if len(self.undo_history) <= 1:  # Only initial state
             return False
+        
+        if self.state == ScreenState.THINKING:
+            # Undo while the bot thinks: drop its search
+            self.cancel_bot_search()
+            self.state = ScreenState.IDLE
             
         if self.state != ScreenState.IDLE:  # Safety check
             return False
@@ -143,9 +175,12 @@ class GameScreen:
         
         return True
         
-    def load_rl_model(self) -> Optional[MaskablePPO]:
+    def load_rl_model(self) -> Optional['MaskablePPO']:
         if self.rl_model: return self.rl_model
+        if self.rl_unavailable: return None
         try:
+            from sb3_contrib import MaskablePPO # type: ignore
+            
             model_path = os.path.join("models", "kalaha_latest.zip")
             if not os.path.exists(model_path):
                  model_path = os.path.join("..", "models", "kalaha_latest.zip")
@@ -155,13 +190,14 @@ class GameScreen:
                 return self.rl_model
         except Exception as e:
             print(f"Failed to load RL model: {e}")
-            pass
+            self.rl_unavailable = True
         return None
 
     def get_rl_move(self, board: List[int], player: int) -> Optional[int]:
         model = self.load_rl_model()
         if not model: return None
         
+        import numpy as np
         obs = np.zeros(15, dtype=np.int32)
         if player == 0:
             obs[0:6] = board[0:6]; obs[6] = board[6]; obs[7:13] = board[7:13]; obs[13] = board[13]; obs[14] = 0
@@ -215,10 +251,15 @@ class GameScreen:
                     self.anim_timer = current_time
             return
 
-        # Handle Bot Thinking Delay
+        # Handle Bot Thinking (search runs in the background, only poll here)
         if self.state == ScreenState.THINKING:
-            # Add artificial delay 0.5s + computation
-            if current_time - self.bot_thinking_start > 0.5:
+            for event in events:
+                if event.type == pygame.MOUSEBUTTONDOWN and self.buttons.get("undo", pygame.Rect(0,0,0,0)).collidepoint(event.pos):
+                    if self.undo_move():
+                        print("Move undone!")
+                    return
+            # Add artificial delay 0.5s, then move as soon as the search is done
+            if current_time - self.bot_thinking_start > 0.5 and (self.bot_future is None or self.bot_future.done()):
                 self.execute_bot_move()
             return
 
@@ -244,10 +285,76 @@ class GameScreen:
                                     self.trigger_move(idx)
                                     
     def bot_step(self) -> None:
-        # Check if we should start bot thinking
-        if self.state == ScreenState.IDLE and not self.game_over and self.is_bot and self.current_player == 1:
-            self.state = ScreenState.THINKING
-            self.bot_thinking_start = time.time()
+        if self.state != ScreenState.IDLE or self.game_over or not self.is_bot:
+            return
+        if self.cancelled_search is not None and not self.cancelled_search.done():
+            return # The engine is single-search: wait for the cancelled one to stop
+        self.cancelled_search = None
+        
+        if self.current_player == 0:
+            # Human to move: ponder the bot's replies (no-op if already on it)
+            if self.ponderer:
+                self.ponderer.start(self.board, self.current_player)
+            return
+        
+        # Bot to move: start thinking
+        self.state = ScreenState.THINKING
+        self.bot_thinking_start = time.time()
+        if self.config['strategy'] != 'PPO-Agent':
+            self.start_bot_search()
+
+    def start_bot_search(self) -> None:
+        """
+        Runs the minimax search on a daemon thread. The result lands in
+        self.bot_future, which update() polls without blocking.
+        """
+        board = self.board.copy()
+        player = self.current_player
+        stop_event = threading.Event()
+        future: Future = Future()
+        self.search_stop = stop_event
+        self.search_progress = {}
+        
+        def on_progress(info: Dict[str, Any]) -> None:
+            if not stop_event.is_set():
+                self.search_progress = dict(info)
+        
+        ponderer = self.ponderer
+        
+        def run() -> None:
+            try:
+                if self.config['strategy'] == 'MCTS':
+                    # The tree is kept between moves, so earlier simulations carry over
+                    future.set_result(get_best_move_mcts(
+                        board, player, iterations=self.config['depth'] * ITERATIONS_PER_DEPTH,
+                        stop_event=stop_event, progress_callback=on_progress
+                    ))
+                    return
+                if ponderer:
+                    # Instant on a ponder hit, otherwise searches with the warmed TT
+                    future.set_result(ponderer.get_best_move(board, player, progress_callback=on_progress, stop_event=stop_event))
+                    return
+                future.set_result(self.game_logic['ai'](
+                    board, player, progress_callback=on_progress, stop_event=stop_event, **self.search_settings
+                ))
+            except BaseException as e:
+                future.set_exception(e)
+        
+        threading.Thread(target=run, name="kalaha-bot-search", daemon=True).start()
+        self.bot_future = future
+
+    def cancel_bot_search(self) -> None:
+        """
+        Stops the running bot search (if any), discarding its result,
+        and any pondering.
+        """
+        if self.ponderer and self.bot_future is None: # A running search already stopped it
+            self.ponderer.stop()
+        if self.bot_future is not None:
+            self.search_stop.set()
+            self.cancelled_search = self.bot_future
+            self.bot_future = None
+        self.search_progress = {}
 
     def execute_bot_move(self) -> None:
         move = None
@@ -255,8 +362,15 @@ class GameScreen:
         if self.config['strategy'] == 'PPO-Agent':
              move = self.get_rl_move(self.board, self.current_player)
              nodes = 1 # RL is instant
-        else:
-             move, nodes = self.game_logic['ai'](self.board, self.current_player, depth=self.config['depth'], strategy=self.config['strategy'])
+        elif self.bot_future is not None:
+             future, self.bot_future = self.bot_future, None
+             try:
+                 move, nodes = future.result()
+             except Exception as e:
+                 # A failed search must not take the game down: play the first legal move instead
+                 print(f"Bot search failed: {e!r}")
+                 moves = self.game_logic['legal'](self.board, self.current_player)
+                 move = moves[0] if moves else None
         
         self.last_move_nodes = nodes
         self.total_nodes_analyzed += nodes
@@ -342,7 +456,13 @@ class GameScreen:
         if self.state == ScreenState.ANIMATING:
             status_txt = "Distributing..."
         elif self.state == ScreenState.THINKING:
-            status_txt = "Thinking..."
+            info = self.search_progress
+            if info.get('iterations'): # MCTS
+                status_txt = f"Thinking... {info['iterations']:,} simulations, {info['nps']:,.0f}/s"
+            elif info:
+                status_txt = f"Thinking... depth {info['depth']}, {info['nps']:,.0f} nodes/s"
+            else:
+                status_txt = "Thinking..."
         else:
             status_txt = "Waiting..."
         self.draw_text(status_txt, self.font_small, (150,150,150), center=(W//2, top_bar_h//2 + 30))
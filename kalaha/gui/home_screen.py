@@ -17,9 +17,12 @@ class HomeScreen:
         if 'anim_speed' not in self.config:
             self.config['anim_speed'] = 0.5 # Default 0.5s
         
-        self.strategies: List[str] = ["basic", "balanced", "aggressive", "defensive", "PPO-Agent"]
+        self.strategies: List[str] = ["basic", "balanced", "aggressive", "defensive", "MCTS", "PPO-Agent"]
         self.difficulties: List[str] = ["Beginner", "Easy", "Medium", "Hard", "Hell"]
         self.colors: List[str] = ["Gold", "Red", "Blue", "Green", "White"]
+        self.ponder_options: List[str] = ["On", "Off"]
+        if 'ponder' not in self.config:
+            self.config['ponder'] = "On"
         
         self.buttons: Dict[str, pygame.Rect] = {}
         
@@ -117,6 +120,17 @@ class HomeScreen:
         self.anim_slider['rect'] = handle_rect
         self.anim_slider['bar'] = bar_rect
         
+        y += step_y
+        # Pondering (bot thinks on the human's time)
+        self.draw_text("Ponder:", self.font_med, TEXT_COLOR, center=(col_lbl_x, y))
+        self.draw_text(f"{self.config['ponder']}", self.font_med, ACCENT_COLOR, center=(col_val_x, y))
+        b_prev = pygame.Rect(col_val_x - 160, y - 15, 30, 30)
+        b_next = pygame.Rect(col_val_x + 130, y - 15, 30, 30)
+        self.draw_nav_button("<", b_prev)
+        self.draw_nav_button(">", b_next)
+        self.buttons["ponder_prev"] = b_prev
+        self.buttons["ponder_next"] = b_next
+        
         # Play
         play_w, play_h = 240, 70
         play_rect = pygame.Rect(cx - play_w//2, H - 100, play_w, play_h) # Moved down
@@ -137,6 +151,8 @@ class HomeScreen:
                 self.cycle_option("difficulty", self.difficulties, 1); self.update_difficulty_preset()
             if self.buttons.get("color_prev", pygame.Rect(0,0,0,0)).collidepoint(pos): self.cycle_option("ball_color", self.colors, -1)
             if self.buttons.get("color_next", pygame.Rect(0,0,0,0)).collidepoint(pos): self.cycle_option("ball_color", self.colors, 1)
+            if self.buttons.get("ponder_prev", pygame.Rect(0,0,0,0)).collidepoint(pos): self.cycle_option("ponder", self.ponder_options, -1)
+            if self.buttons.get("ponder_next", pygame.Rect(0,0,0,0)).collidepoint(pos): self.cycle_option("ponder", self.ponder_options, 1)
             
             # Sliders
             if self.check_slider_click(self.depth_slider, pos): 
@@ -19,7 +19,7 @@ class GameGUI:
         self.state = GameState.TITLE
         self.start_time = time.time()
         
-        self.config: Dict[str, Any] = { "strategy": "balanced", "depth": 6, "difficulty": "Medium", "ball_color": "Gold", "anim_speed": 0.5 }
+        self.config: Dict[str, Any] = { "strategy": "balanced", "depth": 6, "difficulty": "Medium", "ball_color": "Gold", "anim_speed": 0.5, "ponder": "On" }
         
         self.game_screen: Optional[GameScreen] = None
         self.home_screen = HomeScreen(self.screen, self.font_big, self.font_med, self.font_small, self.config, self.start_game)
@@ -29,6 +29,8 @@ class GameGUI:
         self.state = GameState.GAME
 
     def goto_home(self) -> None:
+        if self.game_screen:
+            self.game_screen.cancel_bot_search()
         self.game_screen = None 
         self.state = GameState.HOME
 
@@ -48,6 +50,8 @@ class GameGUI:
             events = pygame.event.get()
             for event in events:
                 if event.type == pygame.QUIT:
+                    if self.game_screen:
+                        self.game_screen.cancel_bot_search()
                     pygame.quit(); sys.exit()
                 
                 if self.state == GameState.HOME:
@@ -1,29 +1,33 @@
 # Ensure we can import modules from the same directory
 import sys
 import os
+import time
+from typing import Tuple
 
 # Ensure parent directory is in path for imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# Bare names first, like the modules themselves import each other: mixing
+# `kalaha.x` here with their `x` would load two copies of the engine (two
+# TTs, two endgame DBs) when run from within kalaha/
 try:
-    from kalaha.game_logic import (
+    from game_logic import (
         initial_state, legal_moves, apply_move, is_terminal, 
         evaluate, cleanup_board, P1_PITS, P2_PITS, P1_STORE, P2_STORE
     )
-    from kalaha.ai_engine import get_best_move
-    from kalaha.endgame_db import endgame_db
-    import kalaha.gui_app as gui_app
+    from ai_engine import get_best_move, MAX_ITERATIVE_DEPTH
+    import ai_engine
+    from endgame_db import endgame_db
+    from ponder import Ponderer
 except ImportError:
-    # Fallback/Local imports if running from within kalaha/ dir without package structure?
-    # Ideally the sys.path append above solves this, making 'kalaha' accessible.
-    # But let's keep local fallback just in case, but cleaner.
-    from game_logic import (
+    from kalaha.game_logic import (
         initial_state, legal_moves, apply_move, is_terminal, 
         evaluate, cleanup_board, P1_PITS, P2_PITS, P1_STORE, P2_STORE
     )
-    from ai_engine import get_best_move
-    from endgame_db import endgame_db
-    import gui_app
+    from kalaha.ai_engine import get_best_move, MAX_ITERATIVE_DEPTH
+    import kalaha.ai_engine as ai_engine
+    from kalaha.endgame_db import endgame_db
+    from kalaha.ponder import Ponderer
 
 def print_board(board):
     print("\n" + "="*40)
@@ -58,24 +62,16 @@ def get_human_move(board, player):
         except ValueError:
             print("Invalid input.")
 
-def get_player_type(mode: str, current_player: int) -> str:
-    """Determine player type based on mode and current player"""
-    if mode == 'BvB':
-        return 'bot', 'bot'
-    
-    if mode == 'HvA':
-        return ('human', 'agent') if current_player == 0 else ('agent', 'human')
-    
-    if mode == 'AvB':
-        return ('agent', 'bot') if current_player == 0 else ('bot', 'agent')
-        
-    if mode == 'HvB':
-        return ('human', 'bot') if current_player == 0 else ('bot', 'human')
-        
-    if mode == 'BvH':
-        return ('bot', 'human') if current_player == 0 else ('human', 'bot')
-        
-    return ('human', 'human')  # HvH default
+def get_player_type(mode: str) -> Tuple[str, str]:
+    """Determine player types (P1, P2) based on mode"""
+    PLAYER_TYPES = {
+        'BvB': ('bot', 'bot'),
+        'HvA': ('human', 'agent'),
+        'AvB': ('agent', 'bot'),
+        'HvB': ('human', 'bot'),
+        'BvH': ('bot', 'human'),
+    }
+    return PLAYER_TYPES.get(mode, ('human', 'human'))  # HvH default
 
 def main():
     print("Welcome to Kalaha!")
@@ -84,6 +80,11 @@ def main():
     
     choice = input("Select interface: ")
     if choice == '2':
+        # pygame (and the GUI's own imports) are only loaded when asked for
+        try:
+            import kalaha.gui_app as gui_app
+        except ImportError:
+            import gui_app
         gui_app.run_gui()
         return
 
@@ -111,8 +112,11 @@ def main():
         
     # Configuration
     bot_depth = 6
+    bot_time_ms = None
     bot_strategy = 'balanced'
     sim_delay = 0.5
+    ponder = False
+    quiescence = False
     
     if mode != 'HvH':
         try:
@@ -120,18 +124,38 @@ def main():
             if d_input.strip():
                 bot_depth = int(d_input)
                 
+            t_ms_input = input("Time limit per move in ms (blank = fixed depth): ")
+            if t_ms_input.strip():
+                bot_time_ms = int(t_ms_input)
+                # Depth becomes the iterative deepening cap; no cap unless one was given
+                if not d_input.strip():
+                    bot_depth = MAX_ITERATIVE_DEPTH
+                
             print(" Strategies: basic, balanced, defensive, aggressive")
             s_input = input("Enter Bot Strategy (default 'balanced'): ")
             if s_input.strip():
                 bot_strategy = s_input.strip()
+            
+            q_input = input("Play out captures and extra turns at the search horizon (quiescence)? (y/N): ")
+            quiescence = q_input.strip().lower() == 'y'
 
             if mode == 'BvB':
                 t_input = input("Simulation Delay (seconds, default 0.5): ")
                 if t_input.strip():
                     sim_delay = float(t_input)
+                    
+            if mode in ('HvB', 'BvH'):
+                p_input = input("Let the bot think on your time (ponder)? (Y/n): ")
+                ponder = p_input.strip().lower() != 'n'
                 
         except ValueError:
             print("Invalid input, using defaults.")
+    
+    # Solved positions found during the game are written to the endgame DB
+    endgame_db.persist()
+    
+    # Searches the bot's likely positions while the human is choosing a pit
+    ponderer = Ponderer(depth=bot_depth, strategy=bot_strategy, time_limit_ms=bot_time_ms, quiescence=quiescence) if ponder else None
             
     board = initial_state()
     current_player = 0 
@@ -143,7 +167,7 @@ def main():
         move = -1
         
         # Determine player types
-        p1_type, p2_type = get_player_type(mode, current_player)
+        p1_type, p2_type = get_player_type(mode)
         player_type = p1_type if current_player == 0 else p2_type
         
         print(f"Turn: Player {current_player + 1} ({player_type.title()})")
@@ -196,14 +220,22 @@ def main():
             if mode == 'BvB':
                 time.sleep(sim_delay)
                 
-            move, nodes = get_best_move(board, current_player, depth=bot_depth, strategy=bot_strategy)
+            if ponderer:
+                move, nodes = ponderer.get_best_move(board, current_player)
+            else:
+                move, nodes = get_best_move(board, current_player, depth=bot_depth, strategy=bot_strategy,
+                                            time_limit_ms=bot_time_ms, quiescence=quiescence)
             if move is None:
                 print("Bot has no legal moves!")
                 break
             # Display relative move for readability
             rel_move = move + 1 if current_player == 0 else move - 7 + 1
-            print(f"Bot chose pit: {rel_move} (Index {move}) [Analyzed {nodes} nodes]")
+            info = ai_engine.LAST_SEARCH_INFO
+            hit = " (opening book)" if info.get('book_hit') else " (ponder hit)" if info.get('ponder_hit') else ""
+            print(f"Bot chose pit: {rel_move} (Index {move}) [Analyzed {nodes} nodes, depth {info['depth']}, {info['nps']:.0f} nodes/s]{hit}")
         else:  # human
+            if ponderer:
+                ponderer.start(board, current_player)
             move = get_human_move(board, current_player)
             
         if move is None:
@@ -220,6 +252,10 @@ def main():
     board = cleanup_board(board)
     print_board(board)
     
+    if ponderer:
+        ponderer.stop()
+        print(f"Ponder hits: {ponderer.hits}, misses: {ponderer.misses}")
+    
     # Save Endgame DB
     endgame_db.save()
     
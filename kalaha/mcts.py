@@ -0,0 +1,699 @@
+"""
+Monte Carlo Tree Search (UCT) engine, an alternative to the minimax search.
+
+The tree lives in a node pool of flat arrays (visits, reward sums, first
+child, child count, ...) indexed by node id; children of a node are
+allocated as one contiguous block when it is expanded. Boards are packed
+ints (see game_logic.apply_move_packed) so playouts stay cheap.
+
+Between moves the tree is kept: the next search looks for its position a
+few plies below the old root and, if found, continues from that subtree
+(copied into a fresh pool so old branches do not pile up).
+
+Playouts are driven by a pluggable rollout policy: uniformly random, greedy
+on one of the evaluate_heuristic strategies, or the trained PPO policy.
+
+BatchedMCTS is the batched variant: it selects a batch of leaves (virtual
+loss steers the selections of one batch apart), evaluates them together in
+one call - vectorized random playouts (batch_logic) or one policy/value
+forward pass of the PPO network - and backs them all up. Selection is PUCT,
+guided by the network's move priors. Per-call overhead is paid once per
+batch, so simulations per second grow with the batch size.
+"""
+import math
+import os
+import random
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from game_logic import (
+        pack_board, unpack_board, legal_moves_packed, apply_move_packed,
+        is_terminal_packed, cleanup_board_packed, P1_STORE, P2_STORE, PIT_BITS, PIT_MASK
+    )
+    from evaluation import evaluate_heuristic
+except ImportError:
+    from kalaha.game_logic import (
+        pack_board, unpack_board, legal_moves_packed, apply_move_packed,
+        is_terminal_packed, cleanup_board_packed, P1_STORE, P2_STORE, PIT_BITS, PIT_MASK
+    )
+    from kalaha.evaluation import evaluate_heuristic
+
+# UCT exploration constant (rewards are in [0, 1])
+UCT_C = 1.4
+
+# PUCT exploration constant of BatchedMCTS (scales prior * sqrt(N) / (1 + n))
+PUCT_C = 1.0
+
+# Leaves evaluated per call in BatchedMCTS
+DEFAULT_BATCH_SIZE = 32
+
+# Pending visits (counted as losses for the mover) put on a path until its
+# batch is evaluated
+VIRTUAL_LOSS = 1
+
+# Iterations when neither iterations nor time_ms is given
+DEFAULT_ITERATIONS = 5000
+
+# Node pool size limit: past it, leaves are played out without expanding
+MAX_NODES = 1 << 20
+
+# How many plies below the old root a reused position may be
+REUSE_DEPTH = 4
+
+# Front-ends with a depth setting (GUI, benchmark) run depth * this many simulations
+ITERATIONS_PER_DEPTH = 1000
+
+# Progress is reported every this many iterations
+PROGRESS_INTERVAL = 500
+
+ROLLOUT_POLICIES = ('random', 'basic', 'balanced', 'aggressive', 'defensive', 'ppo')
+
+# Rollout policies with a batched leaf evaluator (used when batch_size is given)
+BATCH_EVALUATORS = ('random', 'ppo')
+
+# Info about the last get_best_move_mcts call
+LAST_SEARCH_INFO: Dict[str, Any] = {}
+
+# Share of the reward given by the final margin instead of win/draw/loss
+# (keeps the search playing for seeds once the game is decided)
+MARGIN_WEIGHT = 0.2
+
+def outcome(packed: int) -> float:
+    """
+    Reward of a finished game for Player 0, in [0, 1]: mostly win (1),
+    draw (0.5) or loss (0), plus MARGIN_WEIGHT of the scaled store margin.
+    """
+    final = cleanup_board_packed(packed)
+    diff = ((final >> (P1_STORE * PIT_BITS)) & PIT_MASK) - ((final >> (P2_STORE * PIT_BITS)) & PIT_MASK)
+    wdl = 1.0 if diff > 0 else 0.0 if diff < 0 else 0.5
+    return (1 - MARGIN_WEIGHT) * wdl + MARGIN_WEIGHT * (0.5 + diff / 144)
+
+class RandomRollout:
+    """Uniformly random legal moves."""
+    def __init__(self, rng: random.Random) -> None:
+        self.rng = rng
+
+    def choose(self, packed: int, player: int, moves: List[int]) -> int:
+        return self.rng.choice(moves)
+
+class HeuristicRollout:
+    """
+    Epsilon-greedy on evaluate_heuristic: the move whose resulting position
+    the strategy rates best for the mover, or a random one with probability epsilon.
+    """
+    def __init__(self, strategy: str, rng: random.Random, epsilon: float = 0.1) -> None:
+        self.strategy = strategy
+        self.rng = rng
+        self.epsilon = epsilon
+
+    def choose(self, packed: int, player: int, moves: List[int]) -> int:
+        if self.rng.random() < self.epsilon:
+            return self.rng.choice(moves)
+        sign = 1 if player == 0 else -1
+        best_move = moves[0]
+        best_score = -math.inf
+        for move in moves:
+            child, extra = apply_move_packed(packed, move, player)
+            score = sign * evaluate_heuristic(unpack_board(child), 0, self.strategy) + (0.5 if extra else 0.0)
+            if score > best_score:
+                best_move, best_score = move, score
+        return best_move
+
+def load_ppo_model(model_path: Optional[str] = None) -> Any:
+    """
+    Loads the trained MaskablePPO model (sb3_contrib is imported here).
+    Raises if it is not installed or the model file is missing.
+    """
+    from sb3_contrib import MaskablePPO # type: ignore
+    path = model_path or os.path.join("models", "kalaha_latest.zip")
+    if not os.path.exists(path):
+        path = os.path.join("..", "models", "kalaha_latest.zip")
+    return MaskablePPO.load(path)
+
+class PPORollout:
+    """
+    The trained MaskablePPO policy (sb3_contrib and numpy are imported on
+    first use). Falls back to random moves if the model cannot be loaded.
+    """
+    def __init__(self, rng: random.Random, model_path: Optional[str] = None) -> None:
+        self.rng = rng
+        self.model_path = model_path
+        self.model: Any = None
+        self.unavailable = False
+
+    def load(self) -> Any:
+        if self.model is None and not self.unavailable:
+            try:
+                self.model = load_ppo_model(self.model_path)
+            except Exception as e:
+                print(f"PPO rollout policy unavailable ({e}), using random rollouts.")
+                self.unavailable = True
+        return self.model
+
+    def choose(self, packed: int, player: int, moves: List[int]) -> int:
+        model = self.load()
+        if model is None:
+            return self.rng.choice(moves)
+        import numpy as np
+        board = unpack_board(packed)
+        obs = np.zeros(15, dtype=np.int32)
+        if player == 0:
+            obs[0:7] = board[0:7]; obs[7:14] = board[7:14]; obs[14] = 0
+        else:
+            obs[0:7] = board[7:14]; obs[7:14] = board[0:7]; obs[14] = 1
+        first = 0 if player == 0 else 7
+        mask = [first + i in moves for i in range(6)]
+        action, _ = model.predict(obs, action_masks=mask, deterministic=True)
+        return first + int(action)
+
+def make_rollout(name: str, rng: random.Random) -> Any:
+    """
+    Rollout policy by name (see ROLLOUT_POLICIES).
+    """
+    if name == 'random':
+        return RandomRollout(rng)
+    if name == 'ppo':
+        return PPORollout(rng)
+    if name in ROLLOUT_POLICIES:
+        return HeuristicRollout(name, rng)
+    raise ValueError(f"Unknown rollout policy: {name}")
+
+class MCTS:
+    """
+    UCT search tree over a node pool of parallel arrays.
+    Rewards are stored from Player 0's view and flipped for Player 1
+    during selection.
+    """
+    def __init__(self, rollout: str = 'random', c: float = UCT_C, max_nodes: int = MAX_NODES,
+                 seed: Optional[int] = None) -> None:
+        self.rng = random.Random(seed)
+        self.rollout_name = rollout
+        self.policy = make_rollout(rollout, self.rng)
+        self.c = c
+        self.max_nodes = max_nodes
+        self.reused = 0 # Visits carried over into the last search
+        self.batch_size = 1 # Simulations per step()
+        self._reset_pool()
+
+    def _reset_pool(self) -> None:
+        self.visits = array('i')
+        self.rewards = array('d')      # Sum of Player 0 rewards
+        self.first_child = array('i')  # -1 until expanded
+        self.num_children = array('b')
+        self.move = array('b')         # Move leading to the node
+        self.to_move = array('b')      # Player to move in the node
+        self.terminal = array('b')
+        self.prior = array('f')        # Move prior (BatchedMCTS only)
+        self.boards: List[int] = []    # Packed boards
+        self.root = -1
+
+    def _new_node(self, packed: int, player: int, move: int) -> int:
+        self.visits.append(0)
+        self.rewards.append(0.0)
+        self.first_child.append(-1)
+        self.num_children.append(0)
+        self.move.append(move)
+        self.to_move.append(player)
+        self.terminal.append(is_terminal_packed(packed))
+        self.prior.append(0.0)
+        self.boards.append(packed)
+        return len(self.boards) - 1
+
+    def __len__(self) -> int:
+        return len(self.boards)
+
+    def set_root(self, board: List[int], player: int) -> None:
+        """
+        Makes (board, player) the root, reusing the matching subtree of the
+        previous search if it is within REUSE_DEPTH plies of the old root.
+        """
+        packed = pack_board(board)
+        found = self._find(packed, player)
+        if found < 0:
+            self._reset_pool()
+            self.root = self._new_node(packed, player, -1)
+            self.reused = 0
+        else:
+            self._compact(found)
+            self.reused = self.visits[self.root]
+
+    def _find(self, packed: int, player: int) -> int:
+        if self.root < 0:
+            return -1
+        level = [self.root]
+        for _ in range(REUSE_DEPTH + 1):
+            next_level = []
+            for node in level:
+                if self.boards[node] == packed and self.to_move[node] == player:
+                    return node
+                first = self.first_child[node]
+                if first >= 0:
+                    next_level.extend(range(first, first + self.num_children[node]))
+            level = next_level
+        return -1
+
+    def _compact(self, new_root: int) -> None:
+        """
+        Copies the subtree under new_root into a fresh pool (breadth first,
+        children blocks stay contiguous) and drops everything else.
+        """
+        old = (self.visits, self.rewards, self.first_child, self.num_children,
+               self.move, self.to_move, self.terminal, self.prior, self.boards)
+        visits, rewards, first_child, num_children, move, to_move, terminal, prior, boards = old
+        self._reset_pool()
+
+        def copy(i: int) -> int:
+            self.visits.append(visits[i]); self.rewards.append(rewards[i])
+            self.first_child.append(-1); self.num_children.append(num_children[i])
+            self.move.append(move[i]); self.to_move.append(to_move[i])
+            self.terminal.append(terminal[i]); self.prior.append(prior[i])
+            self.boards.append(boards[i])
+            return len(self.boards) - 1
+
+        self.root = copy(new_root)
+        self.move[self.root] = -1
+        queue = [(new_root, self.root)]
+        for old_node, new_node in queue:
+            first = first_child[old_node]
+            if first < 0:
+                continue
+            self.first_child[new_node] = len(self.boards)
+            for child in range(first, first + num_children[old_node]):
+                queue.append((child, copy(child)))
+
+    def _expand(self, node: int) -> None:
+        packed = self.boards[node]
+        player = self.to_move[node]
+        first = len(self.boards)
+        moves = legal_moves_packed(packed, player)
+        for move in moves:
+            child, extra = apply_move_packed(packed, move, player)
+            self._new_node(child, player if extra else 1 - player, move)
+        self.first_child[node] = first
+        self.num_children[node] = len(moves)
+
+    def _select_child(self, node: int) -> int:
+        first = self.first_child[node]
+        visits = self.visits
+        rewards = self.rewards
+        log_n = math.log(visits[node] or 1)
+        player = self.to_move[node]
+        best = first
+        best_score = -math.inf
+        for child in range(first, first + self.num_children[node]):
+            n = visits[child]
+            if not n:
+                return child
+            q = rewards[child] / n
+            if player:
+                q = 1.0 - q
+            score = q + self.c * math.sqrt(log_n / n)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def playout(self, packed: int, player: int) -> float:
+        """
+        Plays the position out with the rollout policy; returns Player 0's reward.
+        """
+        choose = self.policy.choose
+        while not is_terminal_packed(packed):
+            move = choose(packed, player, legal_moves_packed(packed, player))
+            packed, extra = apply_move_packed(packed, move, player)
+            if not extra:
+                player = 1 - player
+        return outcome(packed)
+
+    def iterate(self) -> int:
+        """
+        One select / expand / playout / backpropagate pass.
+        Returns the depth of the leaf it reached.
+        """
+        node = self.root
+        path = [node]
+        while self.first_child[node] >= 0 and not self.terminal[node]:
+            node = self._select_child(node)
+            path.append(node)
+
+        if self.terminal[node]:
+            reward = outcome(self.boards[node])
+        else:
+            if self.visits[node] and len(self.boards) < self.max_nodes:
+                self._expand(node)
+                node = self._select_child(node)
+                path.append(node)
+            reward = self.playout(self.boards[node], self.to_move[node])
+
+        visits = self.visits
+        rewards = self.rewards
+        for n in path:
+            visits[n] += 1
+            rewards[n] += reward
+        return len(path) - 1
+
+    def step(self, limit: int) -> Tuple[int, int]:
+        """
+        Runs up to `limit` simulations (one here, a batch in BatchedMCTS).
+        Returns: (simulations_run, deepest_leaf_depth)
+        """
+        return 1, self.iterate()
+
+    def best_move(self) -> Optional[int]:
+        """
+        Most visited root move (None if the root has no moves).
+        """
+        first = self.first_child[self.root]
+        if first < 0:
+            moves = legal_moves_packed(self.boards[self.root], self.to_move[self.root])
+            return moves[0] if moves else None
+        best = max(range(first, first + self.num_children[self.root]), key=lambda c: self.visits[c])
+        return self.move[best]
+
+    def root_stats(self) -> List[Tuple[int, int, float]]:
+        """
+        (move, visits, Player 0 reward mean) for every root child.
+        """
+        first = self.first_child[self.root]
+        if first < 0:
+            return []
+        return [
+            (self.move[c], self.visits[c], self.rewards[c] / self.visits[c] if self.visits[c] else 0.0)
+            for c in range(first, first + self.num_children[self.root])
+        ]
+
+    def search(self, board: List[int], player: int, iterations: Optional[int] = None, time_ms: Optional[int] = None,
+               stop_event: Optional[Any] = None,
+               progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Tuple[Optional[int], Dict[str, Any]]:
+        """
+        Runs UCT from (board, player) for `iterations` iterations or
+        `time_ms` milliseconds (whichever comes first when both are given;
+        DEFAULT_ITERATIONS when neither is), or until stop_event is set.
+        Returns: (best_move, search_info)
+        """
+        start = time.perf_counter()
+        self.set_root(board, player)
+        if iterations is None and time_ms is None:
+            iterations = DEFAULT_ITERATIONS
+        deadline = start + time_ms / 1000.0 if time_ms is not None else None
+
+        done = 0
+        max_depth = 0
+        if not legal_moves_packed(self.boards[self.root], player):
+            iterations = 0
+        while iterations is None or done < iterations:
+            before = done
+            count, depth = self.step(self.batch_size if iterations is None else min(self.batch_size, iterations - done))
+            done += count
+            max_depth = max(max_depth, depth)
+            if done // PROGRESS_INTERVAL > before // PROGRESS_INTERVAL:
+                if progress_callback:
+                    progress_callback(self._info(done, max_depth, start))
+                if stop_event is not None and stop_event.is_set():
+                    break
+            if deadline is not None and done >> 6 > before >> 6 and time.perf_counter() >= deadline:
+                break
+
+        info = self._info(done, max_depth, start)
+        return self.best_move(), info
+
+    def _info(self, done: int, max_depth: int, start: float) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - start
+        root = self.root
+        value = self.rewards[root] / self.visits[root] if self.visits[root] else 0.5
+        return {
+            "iterations": done,
+            "depth": max_depth, # Deepest leaf reached this search
+            "nodes": len(self.boards),
+            "reused": self.reused,
+            "value": value, # Player 0's expected reward at the root
+            "time": elapsed,
+            "nps": done / elapsed if elapsed > 0 else 0.0, # Simulations per second
+            "rollout": self.rollout_name,
+            "batch_size": self.batch_size,
+        }
+
+class PlayoutEvaluator:
+    """
+    Batched leaf values from vectorized random playouts (batch_logic, numpy
+    imported on first use). Gives no priors (PUCT then uses uniform ones).
+    """
+    def __init__(self, rng: random.Random, playouts: int = 1) -> None:
+        self.seed = rng.getrandbits(64)
+        self.playouts = playouts
+        self.np_rng: Any = None
+
+    def evaluate(self, leaves: List[Tuple[int, int]]) -> Tuple[Any, List[float]]:
+        """
+        leaves: (packed_board, player_to_move) pairs.
+        Returns: (priors or None, Player 0 rewards in [0, 1])
+        """
+        import numpy as np
+        try:
+            import batch_logic
+        except ImportError:
+            import kalaha.batch_logic as batch_logic
+        if self.np_rng is None:
+            self.np_rng = np.random.default_rng(self.seed)
+        boards = np.array([unpack_board(packed) for packed, _ in leaves], dtype=np.int32)
+        players = np.array([player for _, player in leaves], dtype=np.int64)
+        if self.playouts > 1:
+            boards = np.repeat(boards, self.playouts, axis=0)
+            players = np.repeat(players, self.playouts)
+        diff = batch_logic.random_playouts(boards, players, self.np_rng)
+        # Same reward as outcome(), for arrays of store differences
+        reward = (1 - MARGIN_WEIGHT) * (np.sign(diff) + 1) / 2 + MARGIN_WEIGHT * (0.5 + diff / 144)
+        return None, reward.reshape(len(leaves), self.playouts).mean(axis=1).tolist()
+
+class PPOEvaluator:
+    """
+    Batched move priors and leaf values from the trained MaskablePPO
+    network: one forward pass through the shared policy/value network per
+    batch, instead of one predict() call per position. The value head
+    estimates the mover's result in [-1, 1]. Falls back to playouts if the
+    model cannot be loaded.
+    """
+    def __init__(self, rng: random.Random, model_path: Optional[str] = None) -> None:
+        self.model_path = model_path
+        self.model: Any = None
+        self.fallback: Optional[PlayoutEvaluator] = None
+        self.rng = rng
+
+    def load(self) -> Any:
+        if self.model is None and self.fallback is None:
+            try:
+                self.model = load_ppo_model(self.model_path)
+            except Exception as e:
+                print(f"PPO evaluator unavailable ({e}), using random playouts.")
+                self.fallback = PlayoutEvaluator(self.rng)
+        return self.model
+
+    def evaluate(self, leaves: List[Tuple[int, int]]) -> Tuple[Any, List[float]]:
+        model = self.load()
+        if model is None:
+            assert self.fallback is not None
+            return self.fallback.evaluate(leaves)
+        import numpy as np
+        import torch as th # type: ignore
+
+        boards = np.array([unpack_board(packed) for packed, _ in leaves], dtype=np.int32)
+        players = np.array([player for _, player in leaves], dtype=np.int64)
+        # Canonical observation (see KalahaEnv._get_obs): mover's side first, then the player id
+        order = np.where(players[:, None] == 0, np.arange(14), (np.arange(14) + 7) % 14)
+        obs = np.empty((len(leaves), 15), dtype=np.int32)
+        obs[:, :14] = np.take_along_axis(boards, order, axis=1)
+        obs[:, 14] = players
+
+        policy = model.policy
+        with th.no_grad():
+            obs_tensor, _ = policy.obs_to_tensor(obs)
+            features = policy.extract_features(obs_tensor)
+            if isinstance(features, tuple): # Separate actor and critic feature extractors
+                latent_pi = policy.mlp_extractor.forward_actor(features[0])
+                latent_vf = policy.mlp_extractor.forward_critic(features[1])
+            else:
+                latent_pi, latent_vf = policy.mlp_extractor(features)
+            logits = policy.action_net(latent_pi).cpu().numpy()
+            values = policy.value_net(latent_vf).cpu().numpy().reshape(-1)
+
+        logits = np.where(obs[:, :6] > 0, logits, -np.inf)
+        priors = np.exp(logits - logits.max(axis=1, keepdims=True))
+        priors /= priors.sum(axis=1, keepdims=True)
+        mover = (np.clip(values, -1.0, 1.0) + 1) / 2
+        return priors, np.where(players == 0, mover, 1 - mover).tolist()
+
+def make_evaluator(name: str, rng: random.Random) -> Any:
+    """
+    Batched leaf evaluator by rollout name (see BATCH_EVALUATORS).
+    """
+    if name == 'random':
+        return PlayoutEvaluator(rng)
+    if name == 'ppo':
+        return PPOEvaluator(rng)
+    raise ValueError(f"No batched evaluator for rollout policy: {name}")
+
+class BatchedMCTS(MCTS):
+    """
+    PUCT search with batched leaf evaluation. Each step() selects
+    batch_size leaves, adding virtual loss along every path so later
+    selections of the batch spread to other branches, evaluates the distinct
+    leaves with a single evaluator call, expands them with the returned
+    priors and backs every path up (removing the virtual loss).
+    """
+    def __init__(self, rollout: str = 'random', batch_size: int = DEFAULT_BATCH_SIZE, c: float = PUCT_C,
+                 max_nodes: int = MAX_NODES, seed: Optional[int] = None, virtual_loss: int = VIRTUAL_LOSS) -> None:
+        super().__init__('random', c, max_nodes, seed)
+        self.rollout_name = rollout
+        self.evaluator = make_evaluator(rollout, self.rng)
+        self.batch_size = batch_size
+        self.virtual_loss = virtual_loss
+        self.batches = 0 # Evaluator calls so far
+
+    def _select_child(self, node: int) -> int:
+        first = self.first_child[node]
+        visits = self.visits
+        rewards = self.rewards
+        prior = self.prior
+        player = self.to_move[node]
+        sqrt_n = math.sqrt(visits[node] or 1)
+        # Unvisited children start at the parent's value (for the mover)
+        parent_q = rewards[node] / visits[node] if visits[node] else 0.5
+        fpu = 1.0 - parent_q if player else parent_q
+        best = first
+        best_score = -math.inf
+        for child in range(first, first + self.num_children[node]):
+            n = visits[child]
+            if n:
+                q = rewards[child] / n
+                if player:
+                    q = 1.0 - q
+            else:
+                q = fpu
+            score = q + self.c * prior[child] * sqrt_n / (1 + n)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def _set_priors(self, node: int, priors: Any) -> None:
+        first = self.first_child[node]
+        count = self.num_children[node]
+        base = 0 if self.to_move[node] == 0 else P1_STORE + 1
+        for child in range(first, first + count):
+            self.prior[child] = 1.0 / count if priors is None else float(priors[self.move[child] - base])
+
+    def _backup(self, path: List[Tuple[int, float]], reward: float) -> None:
+        vl = self.virtual_loss
+        visits = self.visits
+        rewards = self.rewards
+        for n, loss in path:
+            visits[n] += 1 - vl
+            rewards[n] += reward - vl * loss
+
+    def step(self, limit: int) -> Tuple[int, int]:
+        vl = self.virtual_loss
+        visits = self.visits
+        rewards = self.rewards
+        leaves: List[int] = []
+        index: Dict[int, int] = {} # Leaf node -> position in leaves
+        waiting: List[Tuple[List[Tuple[int, float]], int]] = []
+        max_depth = 0
+
+        for _ in range(limit):
+            node = self.root
+            path = [(node, 0.5)] # (node, reward a virtual loss counts as)
+            while self.first_child[node] >= 0 and not self.terminal[node]:
+                mover = self.to_move[node]
+                node = self._select_child(node)
+                path.append((node, float(mover))) # A loss for the mover, in Player 0's view
+            for n, loss in path:
+                visits[n] += vl
+                rewards[n] += vl * loss
+            max_depth = max(max_depth, len(path) - 1)
+
+            if self.terminal[node]:
+                self._backup(path, outcome(self.boards[node]))
+            else:
+                if node not in index:
+                    index[node] = len(leaves)
+                    leaves.append(node)
+                waiting.append((path, index[node]))
+
+        if leaves:
+            priors, values = self.evaluator.evaluate([(self.boards[n], self.to_move[n]) for n in leaves])
+            self.batches += 1
+            for i, node in enumerate(leaves):
+                if len(self.boards) < self.max_nodes:
+                    self._expand(node)
+                    self._set_priors(node, None if priors is None else priors[i])
+            for path, i in waiting:
+                self._backup(path, values[i])
+        return limit, max_depth
+
+    def _info(self, done: int, max_depth: int, start: float) -> Dict[str, Any]:
+        info = super()._info(done, max_depth, start)
+        info["batches"] = self.batches
+        return info
+
+# One tree per rollout policy, kept between calls for tree reuse
+_trees: Dict[str, MCTS] = {}
+
+def get_best_move_mcts(board: List[int], player: int, iterations: Optional[int] = None, time_ms: Optional[int] = None,
+                       rollout: str = 'random', reuse: bool = True, stop_event: Optional[Any] = None,
+                       progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       batch_size: Optional[int] = None) -> Tuple[Optional[int], int]:
+    """
+    Determine the best move with MCTS.
+
+    Runs `iterations` simulations or searches for `time_ms` milliseconds
+    (default DEFAULT_ITERATIONS simulations). rollout picks the playout
+    policy (see ROLLOUT_POLICIES). With batch_size, BatchedMCTS evaluates
+    that many leaves per call (rollout must be in BATCH_EVALUATORS).
+    With reuse, the tree from the previous call is continued when the
+    position is found in it.
+
+    Details are left in LAST_SEARCH_INFO. Returns: (best_move, iterations)
+    """
+    global LAST_SEARCH_INFO
+    key = rollout if batch_size is None else f"{rollout}/batch{batch_size}"
+    tree = _trees.get(key) if reuse else None
+    if tree is None:
+        tree = MCTS(rollout) if batch_size is None else BatchedMCTS(rollout, batch_size)
+        if reuse:
+            _trees[key] = tree
+    move, LAST_SEARCH_INFO = tree.search(board, player, iterations, time_ms, stop_event, progress_callback)
+    return move, LAST_SEARCH_INFO["iterations"]
+
+def reset_trees() -> None:
+    """
+    Drops the trees kept for reuse.
+    """
+    _trees.clear()
+
+def benchmark_batch_sizes(batch_sizes: List[int], rollout: str = 'random', batches: int = 20) -> None:
+    """
+    Prints simulations per second from the starting position for each batch size.
+    """
+    try:
+        from game_logic import initial_state
+    except ImportError:
+        from kalaha.game_logic import initial_state
+    print(f"{'batch':>6} {'sims/s':>10} {'sims':>8}")
+    for batch_size in batch_sizes:
+        tree = BatchedMCTS(rollout, batch_size, seed=0)
+        _, info = tree.search(initial_state(), 0, iterations=batch_size * batches)
+        print(f"{batch_size:6} {info['nps']:10.0f} {info['iterations']:8}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure batched MCTS throughput")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 16, 64, 256],
+                        help="Batch sizes to measure (default: 1 4 16 64 256)")
+    parser.add_argument("--rollout", type=str, default='random', choices=list(BATCH_EVALUATORS),
+                        help="Leaf evaluator: vectorized random playouts or the PPO network")
+    parser.add_argument("--batches", type=int, default=20,
+                        help="Batches per measurement (default: 20)")
+    args = parser.parse_args()
+
+    benchmark_batch_sizes(args.batch_sizes, args.rollout, args.batches)
@@ -0,0 +1,258 @@
+import mmap
+import os
+import struct
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from game_logic import initial_state, legal_moves, apply_move, is_terminal, P1_STORE, P2_STORE
+    from zobrist_hashing import ZobristHasher
+    from transposition_table import EXACT
+    import canonical
+except ImportError:
+    from kalaha.game_logic import initial_state, legal_moves, apply_move, is_terminal, P1_STORE, P2_STORE
+    from kalaha.zobrist_hashing import ZobristHasher
+    from kalaha.transposition_table import EXACT
+    import kalaha.canonical as canonical
+
+BOOK_FILE = "opening_book.bin"
+DEFAULT_PLIES = 4
+DEFAULT_DEPTH = 10
+
+# Keys are Zobrist hashes from a fixed seed (kept in the header), so they are
+# the same in every process. Keys, moves and scores are canonicalized for the
+# book's strategy (canonical.mode_for), so a position also answers for its
+# mirror image and for any store offset.
+BOOK_SEED = 0x4B414C414841
+
+# Binary layout: 48-byte header, then an open-addressing hash table of
+# `table_size` slots (a power of two, at most half full): uint64 keys
+# (0 = empty slot), int8 best moves, int16 scores (x SCORE_SCALE), all in the
+# stored form of canonical.py, and the canonical positions (POSITION_SIZE
+# bytes each, see book_position).
+# Lookups hash the board, probe linearly from key & (table_size - 1) and
+# only trust a slot whose position matches (a 64-bit key can collide).
+MAGIC = b"KLHBOOK1"
+FORMAT_VERSION = 3
+HEADER = struct.Struct("<8sIQHHII16s") # magic, version, seed, depth, plies, count, table_size, strategy
+SCORE_SCALE = 10
+SCORE_LIMIT = 32767
+POSITION_SIZE = 15 # 12 pits, 2 stores, side to move
+
+def book_position(board: List[int], player: int, mode: int) -> bytes:
+    """
+    The position a book key stands for, in the key's canonical form: pits
+    from the mover's view (MIRRORED) or Player 0's view with the side to
+    move (OFFSET); ABSOLUTE adds the stores.
+    """
+    if mode == canonical.MIRRORED:
+        mine, theirs = (board[7:13], board[0:6]) if player else (board[0:6], board[7:13])
+        return bytes(mine + theirs + [0, 0, 0])
+    stores = [board[P1_STORE], board[P2_STORE]] if mode == canonical.ABSOLUTE else [0, 0]
+    return bytes(board[0:6] + board[7:13] + stores + [player])
+
+class OpeningBook:
+    """
+    Precomputed best moves for the first plies of the game.
+    With lazy=True the file is only opened by ensure_loaded().
+    """
+    def __init__(self, path: str = BOOK_FILE, lazy: bool = False) -> None:
+        self.path = path
+        self.loaded = False
+        self.count = 0
+        self.depth = 0
+        self.plies = 0
+        self.strategy = ""
+        self.mode = canonical.MIRRORED
+        self.hasher: Optional[ZobristHasher] = None
+        self._file: Optional[Any] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._keys: Any = ()
+        self._moves: Any = ()
+        self._scores: Any = ()
+        self._positions: Any = ()
+        self._mask = 0
+        if not lazy:
+            self.ensure_loaded()
+
+    def ensure_loaded(self) -> None:
+        if not self.loaded:
+            self.loaded = True
+            if os.path.exists(self.path):
+                self.load()
+
+    def load(self) -> None:
+        self.close()
+        self.loaded = True
+        try:
+            self._file = open(self.path, 'rb')
+            magic, version, seed, depth, plies, count, table_size, strategy = HEADER.unpack(self._file.read(HEADER.size))
+            if magic != MAGIC or version != FORMAT_VERSION or table_size & (table_size - 1):
+                raise ValueError("not an opening book file")
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(self._mm)
+            keys_end = HEADER.size + 8 * table_size
+            moves_end = keys_end + table_size
+            self._keys = view[HEADER.size:keys_end].cast('Q')
+            self._moves = view[keys_end:moves_end].cast('b')
+            scores_end = moves_end + 2 * table_size
+            self._scores = view[moves_end:scores_end].cast('h')
+            self._positions = view[scores_end:scores_end + POSITION_SIZE * table_size]
+            self._mask = table_size - 1
+            self.hasher = ZobristHasher(seed)
+            self.count = count
+            self.depth = depth
+            self.plies = plies
+            self.strategy = strategy.rstrip(b"\0").decode()
+            self.mode = canonical.mode_for(self.strategy)
+            print(f"Loaded opening book ({count} positions, {plies} plies at depth {depth}, {self.strategy}) from {self.path}.")
+        except Exception as e:
+            print(f"Error loading {self.path}: {e}")
+            self.close()
+
+    def close(self) -> None:
+        if isinstance(self._keys, memoryview):
+            self._keys.release()
+            self._moves.release()
+            self._scores.release()
+            self._positions.release()
+        self._keys = ()
+        self._moves = ()
+        self._scores = ()
+        self._positions = ()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.hasher = None
+        self.count = 0
+
+    def lookup(self, board: List[int], player: int) -> Optional[Tuple[int, float]]:
+        """
+        Returns (best_move, score) for a book position, else None.
+        The score is from Player 0's view.
+        """
+        if not self.count:
+            return None
+        assert self.hasher is not None
+        mode = self.mode
+        key = canonical.key(self.hasher, self.hasher.compute_hash(board), board, player, mode)
+        keys = self._keys
+        mask = self._mask
+        i = key & mask
+        while True:
+            k = keys[i]
+            if k == key:
+                # Guard against a hash collision with a non-book position
+                start = i * POSITION_SIZE
+                if self._positions[start:start + POSITION_SIZE] != book_position(board, player, mode):
+                    return None
+                move = canonical.move_from_stored(self._moves[i], player, mode)
+                score, _ = canonical.from_stored(self._scores[i] / SCORE_SCALE, EXACT, board, player, mode)
+                return move, score
+            if not k:
+                return None
+            i = (i + 1) & mask
+
+    def __len__(self) -> int:
+        return self.count
+
+def write_book(path: str, entries: Dict[int, Tuple[int, float, bytes]], seed: int, depth: int, plies: int, strategy: str) -> None:
+    """
+    Writes entries (key -> (best_move, score, book_position), in stored
+    form) as an open-addressing table.
+    """
+    table_size = 2
+    while table_size < 2 * len(entries):
+        table_size *= 2
+    mask = table_size - 1
+    keys = array('Q', bytes(8 * table_size))
+    moves = array('b', bytes(table_size))
+    scores = array('h', bytes(2 * table_size))
+    positions = bytearray(POSITION_SIZE * table_size)
+    for key, (move, score, position) in entries.items():
+        i = key & mask
+        while keys[i]:
+            i = (i + 1) & mask
+        keys[i] = key
+        moves[i] = move
+        scores[i] = max(-SCORE_LIMIT, min(SCORE_LIMIT, int(round(score * SCORE_SCALE))))
+        positions[i * POSITION_SIZE:(i + 1) * POSITION_SIZE] = position
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, seed, depth, plies, len(entries), table_size, strategy.encode()[:16]))
+        f.write(keys.tobytes())
+        f.write(moves.tobytes())
+        f.write(scores.tobytes())
+        f.write(positions)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def generate(plies: int = DEFAULT_PLIES, depth: int = DEFAULT_DEPTH, strategy: str = 'balanced',
+             path: str = BOOK_FILE, workers: int = 1, verbose: bool = True) -> int:
+    """
+    Searches every position reachable in the first `plies` moves (extra
+    turns count as plies) to `depth` and writes the book.
+    Returns the number of positions written.
+    """
+    try:
+        import ai_engine
+    except ImportError:
+        import kalaha.ai_engine as ai_engine
+
+    hasher = ZobristHasher(BOOK_SEED)
+    mode = canonical.mode_for(strategy)
+    entries: Dict[int, Tuple[int, float, bytes]] = {}
+    frontier = [(initial_state(), 0)]
+    start = time.perf_counter()
+
+    for ply in range(plies):
+        next_frontier = []
+        for board, player in frontier:
+            key = canonical.key(hasher, hasher.compute_hash(board), board, player, mode)
+            if key in entries:
+                continue
+            move, _ = ai_engine.get_best_move(board, player, depth=depth, strategy=strategy,
+                                              workers=workers, use_book=False)
+            if move is None:
+                continue
+            score, _ = canonical.to_stored(ai_engine.LAST_SEARCH_INFO["score"], EXACT, board, player, mode)
+            entries[key] = (canonical.move_to_stored(move, player, mode), score, book_position(board, player, mode))
+            for m in legal_moves(board, player):
+                child, extra = apply_move(board, m, player)
+                if not is_terminal(child):
+                    next_frontier.append((child, player if extra else 1 - player))
+        frontier = next_frontier
+        if verbose:
+            print(f"Ply {ply + 1}: {len(entries)} positions searched ({time.perf_counter() - start:.1f}s)")
+
+    write_book(path, entries, BOOK_SEED, depth, plies, strategy)
+    if verbose:
+        print(f"Wrote {len(entries)} positions to {path}.")
+    return len(entries)
+
+# Global instance, opened on first search
+opening_book = OpeningBook(lazy=True)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate the Kalaha opening book")
+    parser.add_argument("--plies", type=int, default=DEFAULT_PLIES,
+                        help=f"Number of opening plies to cover (default: {DEFAULT_PLIES})")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH,
+                        help=f"Search depth per position (default: {DEFAULT_DEPTH})")
+    parser.add_argument("--strategy", type=str, default='balanced',
+                        help="Heuristic strategy to search with (default: balanced)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes per search (lazy SMP when > 1)")
+    parser.add_argument("--output", type=str, default=BOOK_FILE,
+                        help=f"Output file (default: {BOOK_FILE})")
+    args = parser.parse_args()
+
+    generate(args.plies, args.depth, args.strategy, args.output, args.workers)
@@ -0,0 +1,159 @@
+"""
+Lazy-SMP search across processes.
+
+Every worker runs the normal iterative deepening search on the same
+position, but with its root moves rotated and (for helpers) one extra ply,
+so the workers explore the tree in different orders. They all probe and fill
+one transposition table living in shared memory, which is what makes the
+helpers useful: their results become cutoffs for everyone else.
+
+The pool and the shared table are created on first use and reused for
+every following search; call shutdown() to release them early.
+Workers import the engine under the parent's module name, and every search
+sends them its ruleset and strategy weights, so a worker never searches
+with rules or presets (add_strategy) the parent does not have. Only the
+parent clears the shared table (when the rules, the strategy or its
+weights change between searches), never a worker while its siblings are filling it.
+"""
+import atexit
+import importlib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import ai_engine
+    import evaluation
+    from game_logic import RuleSet, DEFAULT_RULES
+    from transposition_table import TranspositionTable, DEFAULT_BUCKETS, buffer_size
+except ImportError:
+    import kalaha.ai_engine as ai_engine
+    import kalaha.evaluation as evaluation
+    from kalaha.game_logic import RuleSet, DEFAULT_RULES
+    from kalaha.transposition_table import TranspositionTable, DEFAULT_BUCKETS, buffer_size
+
+# Buckets of the shared table (16 bytes per entry, 2 entries per bucket)
+SHARED_TT_BUCKETS = DEFAULT_BUCKETS * 4
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_shm: Optional[shared_memory.SharedMemory] = None
+_stop_event: Optional[Any] = None
+_shared_key: Optional[Tuple[Any, ...]] = None # (rules, strategy, weights) the shared table's entries come from
+
+# Worker-side handle on the shared block (kept alive for the process lifetime)
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+
+def _init_worker(shm_name: str, num_buckets: int, stop_event: Any, engine_name: str) -> None:
+    """
+    Pool initializer: points this process' engine (the parent's module,
+    also under a spawn start method) at the shared table.
+    """
+    global ai_engine, evaluation, _worker_shm, _stop_event
+    ai_engine = importlib.import_module(engine_name)
+    evaluation = importlib.import_module(ai_engine.heuristic_for.__module__) # The engine's own presets
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    ai_engine.TT = TranspositionTable(num_buckets, buffer=_worker_shm.buf)
+    _stop_event = stop_event
+
+def _worker_search(board: List[int], player: int, depth: Optional[int], strategy: str,
+                   time_limit_ms: Optional[int], search: str, worker_id: int,
+                   quiescence: bool = False, rules: RuleSet = DEFAULT_RULES,
+                   weights: Optional[Sequence[float]] = None) -> Tuple[Optional[int], int, Dict[str, Any]]:
+    if weights is not None and evaluation.STRATEGY_WEIGHTS.get(strategy) != weights:
+        evaluation.add_strategy(strategy, weights) # Registered in the parent after this worker started
+    ai_engine.ROOT_ROTATION = worker_id
+    ai_engine.set_rules(rules, clear_tt=False) # The parent clears the shared table
+    move, nodes = ai_engine.get_best_move(
+        board, player, depth=depth, strategy=strategy, time_limit_ms=time_limit_ms,
+        search=search, stop_event=_stop_event, quiescence=quiescence, rules=rules, iterative=True
+    )
+    return move, nodes, dict(ai_engine.LAST_SEARCH_INFO)
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers, _shm, _stop_event
+    if _pool is not None and _pool_workers == workers:
+        return _pool
+    shutdown()
+
+    _shm = shared_memory.SharedMemory(create=True, size=buffer_size(SHARED_TT_BUCKETS))
+    _shm.buf[:] = bytes(_shm.size)
+    ctx = mp.get_context()
+    _stop_event = ctx.Event()
+    _pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=ctx,
+        initializer=_init_worker, initargs=(_shm.name, SHARED_TT_BUCKETS, _stop_event, ai_engine.__name__)
+    )
+    _pool_workers = workers
+    return _pool
+
+def shutdown() -> None:
+    """
+    Stops the worker processes and frees the shared table.
+    """
+    global _pool, _pool_workers, _shm, _shared_key
+    _shared_key = None
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
+        _pool_workers = 0
+    if _shm is not None:
+        _shm.close()
+        _shm.unlink()
+        _shm = None
+
+atexit.register(shutdown)
+
+def parallel_best_move(board: List[int], player: int, depth: Optional[int], strategy: str,
+                       time_limit_ms: Optional[int], search: str, workers: int,
+                       stop_event: Optional[Any] = None, quiescence: bool = False,
+                       rules: RuleSet = DEFAULT_RULES) -> Tuple[Optional[int], int, Dict[str, Any]]:
+    """
+    Runs a lazy-SMP search with `workers` processes.
+    Worker 0 searches to the requested depth; helpers search one ply deeper
+    and are stopped as soon as worker 0 finishes (or on stop_event).
+    The deepest completed result wins, worker 0 breaking ties.
+    Returns: (best_move, total_nodes, search_info)
+    """
+    global _shared_key
+    pool = _get_pool(workers)
+    assert _stop_event is not None and _shm is not None
+    _stop_event.clear()
+    weights = evaluation.STRATEGY_WEIGHTS.get(strategy)
+    if _shared_key != (rules, strategy, weights):
+        # Entries of other rules or another evaluation would mix in: clear once, while no worker runs
+        if _shared_key is not None:
+            _shm.buf[:] = bytes(_shm.size)
+        _shared_key = (rules, strategy, weights)
+
+    main_depth = depth or (ai_engine.MAX_DEPTH if time_limit_ms is None else ai_engine.MAX_ITERATIVE_DEPTH)
+    futures = []
+    for worker_id in range(workers):
+        worker_depth = main_depth + (1 if worker_id and time_limit_ms is None else 0)
+        futures.append(pool.submit(_worker_search, board, player, worker_depth, strategy, time_limit_ms, search, worker_id,
+                                   quiescence, rules, weights))
+
+    main = futures[0]
+    while not main.done():
+        wait([main], timeout=0.05)
+        if stop_event is not None and stop_event.is_set():
+            break
+    _stop_event.set()
+    wait(futures)
+    _stop_event.clear()
+
+    results = [f.result() for f in futures]
+    total_nodes = sum(r[1] for r in results)
+
+    # Deepest completed search wins; helpers only count if at least as deep as asked
+    best = results[0]
+    for r in results[1:]:
+        if r[0] is not None and r[2].get("depth", 0) > best[2].get("depth", 0):
+            best = r
+
+    info = dict(best[2])
+    info["nodes"] = total_nodes
+    info["nps"] = total_nodes / info["time"] if info.get("time") else 0.0
+    info["workers"] = workers
+    return best[0], total_nodes, info
@@ -0,0 +1,209 @@
+"""
+Perft: counts the positions reachable in exactly `depth` moves.
+
+Every sowing is one move; after an extra turn the same player moves again.
+A game that ends before `depth` moves contributes nothing (like checkmate
+in chess perft), so the counts depend only on the rules, not on any
+implementation detail. That makes them a correctness check for faster
+move generators: each board implementation below must reproduce
+REFERENCE_COUNTS, and the benchmark reports its speed in leaves per second.
+
+    python kalaha/perft.py --depth 7
+    python kalaha/perft.py --depth 5 --divide
+    python kalaha/perft.py --depth 6 --positions 200   # also mid-game positions
+"""
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from game_logic import (
+        initial_state, legal_moves, apply_move, is_terminal,
+        pack_board, legal_moves_packed, apply_move_packed, is_terminal_packed
+    )
+    from zobrist_hashing import zobrist
+except ImportError:
+    from kalaha.game_logic import (
+        initial_state, legal_moves, apply_move, is_terminal,
+        pack_board, legal_moves_packed, apply_move_packed, is_terminal_packed
+    )
+    from kalaha.zobrist_hashing import zobrist
+
+# perft(initial_state(), 0, depth) for depth 0, 1, 2, ...
+REFERENCE_COUNTS = [1, 6, 35, 190, 1056, 5882, 32243, 177827, 962153, 5197521]
+
+def perft(board: List[int], player: int, depth: int) -> int:
+    """
+    Reference implementation on list boards (apply_move / legal_moves).
+    """
+    if depth == 0:
+        return 1
+    if is_terminal(board):
+        return 0
+    nodes = 0
+    for move in legal_moves(board, player):
+        child, extra = apply_move(board, move, player)
+        nodes += perft(child, player if extra else 1 - player, depth - 1)
+    return nodes
+
+def _perft_packed(packed: int, player: int, depth: int) -> int:
+    if depth == 0:
+        return 1
+    if is_terminal_packed(packed):
+        return 0
+    nodes = 0
+    for move in legal_moves_packed(packed, player):
+        child, extra = apply_move_packed(packed, move, player)
+        nodes += _perft_packed(child, player if extra else 1 - player, depth - 1)
+    return nodes
+
+def perft_packed(board: List[int], player: int, depth: int) -> int:
+    """
+    Packed-int boards (apply_move_packed), as used by MCTS playouts.
+    """
+    return _perft_packed(pack_board(board), player, depth)
+
+def _perft_zobrist(board: List[int], board_hash: int, player: int, depth: int) -> int:
+    if depth == 0:
+        return 1
+    if is_terminal(board):
+        return 0
+    nodes = 0
+    for move in legal_moves(board, player):
+        child, extra, child_hash = zobrist.apply_move(board, board_hash, move, player)
+        nodes += _perft_zobrist(child, child_hash, player if extra else 1 - player, depth - 1)
+    return nodes
+
+def perft_zobrist(board: List[int], player: int, depth: int) -> int:
+    """
+    List boards with incremental hashing (zobrist.apply_move), the move
+    generator of the minimax search.
+    """
+    return _perft_zobrist(board, zobrist.compute_hash(board, player), player, depth)
+
+def perft_batch(board: List[int], player: int, depth: int) -> int:
+    """
+    NumPy batches (batch_logic), expanding one whole ply at a time.
+    Memory grows with the number of positions at the deepest ply.
+    """
+    import numpy as np
+    try:
+        import batch_logic
+    except ImportError:
+        import kalaha.batch_logic as batch_logic
+
+    boards = np.array([board], dtype=np.int32)
+    players = np.array([player], dtype=np.int64)
+    for _ in range(depth):
+        live = ~batch_logic.is_terminal_batch(boards)
+        boards, players = boards[live], players[live]
+        rows, cols = np.nonzero(batch_logic.legal_moves_mask(boards, players))
+        moves = batch_logic.FIRST_PIT[players[rows]] + cols
+        boards, extra, _ = batch_logic.apply_moves_batch(boards[rows], moves, players[rows])
+        players = np.where(extra, players[rows], 1 - players[rows])
+    return len(boards)
+
+# Board implementations, by name
+IMPLEMENTATIONS: Dict[str, Callable[[List[int], int, int], int]] = {
+    "list": perft,
+    "packed": perft_packed,
+    "zobrist": perft_zobrist,
+    "batch": perft_batch,
+}
+
+def divide(board: List[int], player: int, depth: int,
+           fn: Callable[[List[int], int, int], int] = perft) -> Dict[int, int]:
+    """
+    Perft split by first move (move -> leaf count), for locating a
+    disagreement between two implementations.
+    """
+    counts = {}
+    for move in legal_moves(board, player):
+        child, extra = apply_move(board, move, player)
+        counts[move] = fn(child, player if extra else 1 - player, depth - 1)
+    return counts
+
+def random_positions(count: int, seed: int = 0) -> List[Tuple[List[int], int]]:
+    """
+    Non-terminal positions sampled from random games (mid- and endgames
+    that the initial-position counts never reach).
+    """
+    rng = random.Random(seed)
+    positions: List[Tuple[List[int], int]] = []
+    while len(positions) < count:
+        board, player = initial_state(), 0
+        for _ in range(rng.randint(5, 60)):
+            if is_terminal(board):
+                break
+            board, extra = apply_move(board, rng.choice(legal_moves(board, player)), player)
+            player = player if extra else 1 - player
+        if not is_terminal(board):
+            positions.append((board, player))
+    return positions
+
+def check_positions(count: int, depth: int, names: Optional[List[str]] = None, seed: int = 0) -> List[str]:
+    """
+    Compares every implementation with the reference perft from `count`
+    random positions. Returns a description of each mismatch (empty if none).
+    """
+    errors = []
+    for board, player in random_positions(count, seed):
+        expected = perft(board, player, depth)
+        for name in names or list(IMPLEMENTATIONS):
+            nodes = IMPLEMENTATIONS[name](list(board), player, depth)
+            if nodes != expected:
+                errors.append(f"{name}: {nodes} != {expected} for {board}, player {player}")
+    return errors
+
+def benchmark(depth: int, names: Optional[List[str]] = None) -> bool:
+    """
+    Runs every implementation from the initial position, prints leaves/s
+    and whether the count matches REFERENCE_COUNTS (or the reference
+    implementation beyond the table). Returns True if all matched.
+    """
+    expected = REFERENCE_COUNTS[depth] if depth < len(REFERENCE_COUNTS) else None
+    all_ok = True
+    print(f"{'board':8} {'leaves':>10} {'time':>9} {'leaves/s':>11}  check")
+    for name in names or list(IMPLEMENTATIONS):
+        start = time.perf_counter()
+        try:
+            nodes = IMPLEMENTATIONS[name](initial_state(), 0, depth)
+        except ImportError as e:
+            print(f"{name:8} unavailable ({e.name})")
+            continue
+        elapsed = time.perf_counter() - start
+        if expected is None:
+            expected = nodes
+        ok = nodes == expected
+        all_ok = all_ok and ok
+        print(f"{name:8} {nodes:10} {elapsed:8.3f}s {nodes / elapsed if elapsed > 0 else 0:11.0f}  {'ok' if ok else f'MISMATCH (expected {expected})'}")
+    return all_ok
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Kalaha move-generation benchmark and correctness check")
+    parser.add_argument("--depth", type=int, default=6,
+                        help="Moves to search from the initial position (default: 6)")
+    parser.add_argument("--board", choices=list(IMPLEMENTATIONS), nargs="+",
+                        help="Implementations to run (default: all)")
+    parser.add_argument("--divide", action="store_true",
+                        help="Print the count per first move (reference implementation)")
+    parser.add_argument("--positions", type=int, default=0,
+                        help="Also compare all implementations from this many random positions")
+    args = parser.parse_args()
+
+    if args.divide:
+        for move, count in divide(initial_state(), 0, args.depth).items():
+            print(f"{move}: {count}")
+        sys.exit(0)
+    ok = benchmark(args.depth, args.board)
+    if args.positions:
+        errors = check_positions(args.positions, min(args.depth, 4), args.board)
+        print(f"{args.positions} random positions: {len(errors)} mismatches")
+        for error in errors[:10]:
+            print("  " + error)
+        ok = ok and not errors
+    if not ok:
+        sys.exit(1)
@@ -0,0 +1,165 @@
+"""
+Pondering: searching on the opponent's time.
+
+While the human thinks, a Ponderer runs the bot's search on a background
+thread for the positions the human is most likely to leave it, using the
+same settings, and so the same search path, as the real search. If the human then plays into one of them,
+the stored answer is returned at once (a ponder hit); otherwise the normal
+search runs, starting from the transposition table the ponder searches
+already filled.
+"""
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# The engine's TT and search globals are per module: import it the same way
+# as every other module (bare name first), so the ponderer and its caller
+# share one copy of the engine
+try:
+    import ai_engine
+    from game_logic import apply_move, is_terminal, legal_moves
+except ImportError:
+    import kalaha.ai_engine as ai_engine
+    from kalaha.game_logic import apply_move, is_terminal, legal_moves
+
+# Most positions pondered per human turn, in predicted order
+MAX_PONDER_POSITIONS = 16
+
+# Depth of the quick search that predicts the human's reply
+PREDICTION_DEPTH = 4
+
+def predicted_positions(board: List[int], player: int, first_move: Optional[int] = None,
+                        limit: int = MAX_PONDER_POSITIONS) -> List[List[int]]:
+    """
+    Positions where the opponent of `player` is next to move, reachable in
+    one turn of `player` (following extra turns), most likely first:
+    first_move (e.g. a predicted best reply), then engine move order.
+    Game-ending lines are skipped.
+    """
+    positions: List[List[int]] = []
+    seen = set()
+
+    def expand(b: List[int], preferred: Optional[int]) -> None:
+        moves = ai_engine.order_moves(b, legal_moves(b, player), player)
+        if preferred in moves:
+            moves = [preferred] + [m for m in moves if m != preferred]
+        for move in moves:
+            if len(positions) >= limit:
+                return
+            child, extra = apply_move(b, move, player)
+            if is_terminal(child):
+                continue
+            if extra:
+                expand(child, None)
+            elif tuple(child) not in seen:
+                seen.add(tuple(child))
+                positions.append(child)
+
+    expand(board, first_move)
+    return positions
+
+class Ponderer:
+    """
+    Background search of the bot's replies while the other side is to move.
+    Construct it with the bot's search settings, call start() when the
+    human's turn begins and use get_best_move() instead of
+    ai_engine.get_best_move() for the bot's turn.
+    """
+    def __init__(self, depth: Optional[int] = None, strategy: str = 'balanced',
+                 time_limit_ms: Optional[int] = None, search: str = 'alphabeta', quiescence: bool = False) -> None:
+        self.depth = depth
+        self.strategy = strategy
+        self.time_limit_ms = time_limit_ms
+        self.search = search
+        self.quiescence = quiescence
+        self.hits = 0
+        self.misses = 0
+        self.position: Optional[Tuple[Tuple[int, ...], int]] = None # Position being pondered
+        self.results: Dict[Tuple[Tuple[int, ...], int], Tuple[Optional[int], int, Dict[str, Any]]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self, board: List[int], player: int) -> None:
+        """
+        Starts pondering the replies to `player`'s coming turn.
+        Does nothing if this position is already being pondered.
+        """
+        key = (tuple(board), player)
+        if key == self.position:
+            return
+        self.stop()
+        self.results = {}
+        self.position = key
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(list(board), player, self._stop), name="kalaha-ponder", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops pondering and waits for the search thread to exit
+        (the engine runs one search at a time).
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.position = None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for pondering to finish. Returns True if it has.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    def _run(self, board: List[int], player: int, stop_event: threading.Event) -> None:
+        bot = 1 - player
+        guess, _ = ai_engine.get_best_move(board, player, depth=PREDICTION_DEPTH, strategy=self.strategy,
+                                           stop_event=stop_event)
+        for position in predicted_positions(board, player, guess):
+            if stop_event.is_set():
+                return
+            move, nodes = ai_engine.get_best_move(
+                position, bot, depth=self.depth, strategy=self.strategy,
+                time_limit_ms=self.time_limit_ms, search=self.search, stop_event=stop_event,
+                quiescence=self.quiescence
+            )
+            # A search cut short by stop() is not what the real search would return
+            if stop_event.is_set():
+                return
+            self.results[(tuple(position), bot)] = (move, nodes, dict(ai_engine.LAST_SEARCH_INFO))
+
+    def get_best_move(self, board: List[int], player: int,
+                      progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                      stop_event: Optional[Any] = None) -> Tuple[Optional[int], int]:
+        """
+        Stops pondering, then answers from the pondered results on a hit or
+        runs the normal search (with the warmed TT) on a miss.
+        progress_callback and stop_event are passed on to that search.
+        LAST_SEARCH_INFO is set either way; it has "ponder_hit" set.
+        Returns: (best_move, nodes_analyzed)
+        """
+        pondered = self.position is not None
+        self.stop()
+        result = self.results.get((tuple(board), player))
+        self.results = {}
+        if result is not None:
+            self.hits += 1
+            move, nodes, info = result
+            info["ponder_hit"] = True
+            ai_engine.LAST_SEARCH_INFO = info
+            if progress_callback:
+                progress_callback(info)
+            return move, nodes
+
+        if pondered: # Not a miss when there was nothing to ponder (e.g. the bot's extra turn)
+            self.misses += 1
+        move, nodes = ai_engine.get_best_move(board, player, depth=self.depth, strategy=self.strategy,
+                                              time_limit_ms=self.time_limit_ms, search=self.search,
+                                              progress_callback=progress_callback, stop_event=stop_event,
+                                              quiescence=self.quiescence)
+        ai_engine.LAST_SEARCH_INFO["ponder_hit"] = False
+        return move, nodes
@@ -0,0 +1,390 @@
+"""
+Exact solver: proves the final result of a position with perfect play.
+
+Unlike get_best_move there is no depth limit and no heuristic: every line
+is played to the end of the game (or to a tablebase / endgame DB hit), so
+the result is the exact final store difference and an optimal line.
+
+Values inside the search are integers: the seeds the side to move still
+gains (final store difference minus the current one, from its view), which
+depend only on the pits. The driver is MTD(f): a sequence of null-window
+searches around a first guess (a short heuristic search) that converge on
+the exact value; every probe reuses the bounds the previous ones proved.
+
+Bounds live in a TranspositionTable keyed like the endgame DB (the
+mover's pits, canonical.MIRRORED), so mirrored positions and positions
+that differ only in their stores share an entry. With tt_file the table is
+a memory-mapped file, which can be larger than RAM (the OS pages it out)
+and is reused by later runs on positions sharing subtrees.
+
+    python kalaha/solver.py --board 0 3 1 0 2 4 30 1 0 2 3 1 0 25 --player 0
+    python kalaha/solver.py --random 20 --tt-file     # solver.tt in the working directory
+"""
+import mmap
+import os
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from game_logic import P1_STORE, P2_STORE, P1_PITS, P2_PITS
+    from zobrist_hashing import zobrist
+    from endgame_db import endgame_db
+    from tablebase import tablebase
+    from transposition_table import TranspositionTable, buffer_size, EXACT, LOWERBOUND, UPPERBOUND, NO_MOVE, MAX_DEPTH
+    import canonical
+except ImportError:
+    from kalaha.game_logic import P1_STORE, P2_STORE, P1_PITS, P2_PITS
+    from kalaha.zobrist_hashing import zobrist
+    from kalaha.endgame_db import endgame_db
+    from kalaha.tablebase import tablebase
+    from kalaha.transposition_table import TranspositionTable, buffer_size, EXACT, LOWERBOUND, UPPERBOUND, NO_MOVE, MAX_DEPTH
+    import kalaha.canonical as canonical
+
+DEFAULT_BUCKETS = 1 << 20     # 32 MiB of table
+GUESS_DEPTH = 8               # Depth of the heuristic search giving MTD(f) its first guess
+DB_MAX_PIT_SEEDS = 16         # Proven positions with at most this many seeds in pits go to the endgame DB
+PROGRESS_INTERVAL = 5.0       # Seconds between progress reports inside a probe
+PROGRESS_MASK = 4095          # Check the clock every 4096 nodes
+
+# Table file (`--tt-file` without a path: TT_FILE in the working directory):
+# header, then the table's buffer. The header records the Zobrist keys the
+# entries were hashed with and the table size.
+TT_FILE = "solver.tt"
+TT_MAGIC = b"KLHSLTT1"
+TT_HEADER = struct.Struct("<8sIIQ8x") # magic, key version, num_buckets, zobrist seed
+
+@dataclass
+class SolveResult:
+    score: int                     # Exact final store difference (Player 0's view)
+    line: List[int] = field(default_factory=list) # Optimal moves to the end of the game
+    nodes: int = 0
+    probes: int = 0                # Null-window searches MTD(f) needed
+    tt_hits: int = 0
+    db_hits: int = 0
+    time: float = 0.0
+
+    @property
+    def nps(self) -> float:
+        return self.nodes / self.time if self.time > 0 else 0.0
+
+    def summary(self) -> str:
+        return (f"score {self.score:+d}, {len(self.line)} moves, {self.nodes} nodes in {self.time:.2f}s "
+                f"({self.nps:.0f} nodes/s), {self.probes} probes, TT hits {self.tt_hits}, DB hits {self.db_hits}")
+
+class SolverTable:
+    """
+    Bound table for the solver: a TranspositionTable, in memory or backed
+    by a memory-mapped file (path) that survives the process. A file with
+    other keys or another size is reinitialized.
+    """
+    def __init__(self, num_buckets: int = DEFAULT_BUCKETS, path: Optional[str] = None) -> None:
+        self.path = path
+        self._file: Optional[Any] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        if path is None:
+            self.table = TranspositionTable(num_buckets)
+            return
+
+        size = TT_HEADER.size + buffer_size(num_buckets)
+        header = TT_HEADER.pack(TT_MAGIC, zobrist.key_version, num_buckets, zobrist.seed or 0)
+        self._file = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+        if self._file.read(TT_HEADER.size) != header or os.path.getsize(path) != size:
+            if os.path.getsize(path):
+                print(f"Reinitializing solver table {path} (other keys or size).")
+            self._file.seek(0)
+            self._file.truncate(0)
+            self._file.truncate(size) # Sparse: pages are only written when used
+            self._file.write(header)
+            self._file.flush()
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        self._view = memoryview(self._mm)[TT_HEADER.size:]
+        self.table = TranspositionTable(num_buckets, buffer=self._view)
+
+    def close(self) -> None:
+        if self._mm is None:
+            return
+        self.table.release()
+        self._view.release()
+        self._mm.flush()
+        self._mm.close()
+        self._file.close()
+        self._mm = self._view = self._file = None
+
+class Solver:
+    """
+    Null-window searches over integer gains (see the module docstring).
+    progress, if given, receives a dict (bounds, nodes, time, ...) after
+    every probe and every PROGRESS_INTERVAL seconds during one.
+    """
+    def __init__(self, table: SolverTable, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        self.tt = table.table
+        self.progress = progress
+        self.nodes = 0
+        self.tt_hits = 0
+        self.db_hits = 0
+        self.lower = -72 # Bounds on the root mover's gain proven so far
+        self.upper = 72
+        self.root: Tuple[List[int], int] = ([0] * 14, 0)
+        self.start_time = time.perf_counter()
+        self._next_report = self.start_time + PROGRESS_INTERVAL
+
+    def report(self, phase: str) -> None:
+        if self.progress is None:
+            return
+        elapsed = time.perf_counter() - self.start_time
+        board, player = self.root
+        lower, upper = sorted(canonical.exact_from_stored(g, board, player) for g in (self.lower, self.upper))
+        self.progress({
+            "phase": phase,
+            "lower": lower, # Bounds on the final score (Player 0's view)
+            "upper": upper,
+            "nodes": self.nodes,
+            "time": elapsed,
+            "nps": self.nodes / elapsed if elapsed > 0 else 0.0,
+            "tt_hits": self.tt_hits,
+            "db_hits": self.db_hits,
+        })
+
+    def search(self, board: List[int], player: int, board_hash: int, alpha: int, beta: int) -> int:
+        """
+        Fail-soft negamax on the mover's gain: the exact value if it lies
+        strictly between alpha and beta, else a bound on the failing side.
+        """
+        self.nodes += 1
+        if not self.nodes & PROGRESS_MASK and self.progress is not None and time.perf_counter() >= self._next_report:
+            self._next_report = time.perf_counter() + PROGRESS_INTERVAL
+            self.report("searching")
+
+        store = P1_STORE if player == 0 else P2_STORE
+        first = store - 6
+        own = sum(board[first:store])
+        opp = sum(board[0:6]) + sum(board[7:13]) - own
+        if own == 0 or opp == 0:
+            return own - opp # Game over: remaining seeds go to their owners
+
+        if own + opp <= tablebase.max_seeds:
+            self.db_hits += 1
+            return canonical.exact_to_stored(tablebase.probe(board, player), board, player)
+        key = canonical.key(zobrist, board_hash, board, player, canonical.MIRRORED)
+        gain = endgame_db.lookup(board, player, key)
+        if gain is not None:
+            self.db_hits += 1
+            return gain
+
+        # The mover can neither win nor lose more than the seeds in play
+        lower, upper = -own - opp, own + opp
+        tt_move = NO_MOVE
+        entry = self.tt.probe(key)
+        if entry is not None:
+            self.tt_hits += 1
+            value, _, flag, tt_move = entry
+            value = int(value)
+            if flag == EXACT:
+                return value
+            if flag == LOWERBOUND:
+                lower = value
+            else:
+                upper = value
+            tt_move = canonical.move_from_stored(tt_move, player, canonical.MIRRORED)
+        if lower >= beta:
+            return lower
+        if upper <= alpha:
+            return upper
+
+        # Children: TT move, extra turns, then by seeds won (captures first).
+        # A child whose stored bound already refutes the window cuts off at
+        # once (enhanced transposition cutoff).
+        children = []
+        probe = self.tt.probe
+        for move in range(first, store):
+            if board[move]:
+                child, extra, child_hash = zobrist.apply_move(board, board_hash, move, player)
+                gained = child[store] - board[store]
+                child_player = player if extra else 1 - player
+                entry = probe(canonical.key(zobrist, child_hash, child, child_player, canonical.MIRRORED))
+                if entry is not None:
+                    value, _, flag, _ = entry
+                    if extra and flag != UPPERBOUND and gained + value >= beta:
+                        return gained + int(value)
+                    if not extra and flag != LOWERBOUND and gained - value >= beta:
+                        return gained - int(value)
+                children.append((move != tt_move, not extra, -gained, move, child, extra, child_hash))
+        children.sort(key=lambda c: c[:4])
+
+        nodes = self.nodes
+        a = a0 = max(alpha, lower)
+        b = min(beta, upper)
+        best = -73
+        best_move = NO_MOVE
+        for _, _, neg_gained, move, child, extra, child_hash in children:
+            gained = -neg_gained
+            if extra:
+                value = gained + self.search(child, player, child_hash, a - gained, b - gained)
+            else:
+                value = gained - self.search(child, 1 - player, child_hash, gained - b, gained - a)
+            if value > best:
+                best = value
+                best_move = move
+                if best > a:
+                    a = best
+                    if a >= b:
+                        break
+
+        # A bound that meets the other known bound is exact
+        if best <= a0:
+            flag = EXACT if best <= lower else UPPERBOUND
+        elif best >= b:
+            flag = EXACT if best >= upper else LOWERBOUND
+        else:
+            flag = EXACT
+        # Depth slot: size of the subtree, so the depth-preferred slot keeps the costliest proofs
+        work = min((self.nodes - nodes).bit_length(), MAX_DEPTH)
+        self.tt.store(key, best, work, flag, canonical.move_to_stored(best_move, player, canonical.MIRRORED))
+        if flag == EXACT and own + opp <= DB_MAX_PIT_SEEDS:
+            endgame_db.add(board, player, best, key)
+        return best
+
+    def mtdf(self, board: List[int], player: int, guess: int) -> int:
+        """
+        Exact gain of the mover by null-window probes starting at guess.
+        """
+        self.root = (board, player)
+        board_hash = zobrist.compute_hash(board)
+        in_play = sum(board) - board[P1_STORE] - board[P2_STORE]
+        self.lower, self.upper = -in_play, in_play
+        value = max(self.lower, min(self.upper, guess))
+        self.probes = 0
+        while self.lower < self.upper:
+            beta = value + 1 if value == self.lower else value
+            value = self.search(board, player, board_hash, beta - 1, beta)
+            self.probes += 1
+            if value < beta:
+                self.upper = value
+            else:
+                self.lower = value
+            self.report("probe")
+        return self.lower
+
+    def value(self, board: List[int], player: int, board_hash: int, target: int) -> bool:
+        """
+        True if the mover gains at least target.
+        """
+        return self.search(board, player, board_hash, target - 1, target) >= target
+
+    def optimal_line(self, board: List[int], player: int, gain: int) -> List[int]:
+        """
+        Moves reaching the proven gain: in each position, the first move
+        (in search order) whose null-window test reaches the position's
+        value. The tests mostly hit bounds the proof left in the table.
+        """
+        line: List[int] = []
+        board_hash = zobrist.compute_hash(board)
+        while True:
+            store = P1_STORE if player == 0 else P2_STORE
+            pits = P1_PITS if player == 0 else P2_PITS
+            own = sum(board[store - 6:store])
+            if own == 0 or own == sum(board[0:6]) + sum(board[7:13]):
+                return line
+            for move in pits:
+                if not board[move]:
+                    continue
+                child, extra, child_hash = zobrist.apply_move(board, board_hash, move, player)
+                gained = child[store] - board[store]
+                if extra:
+                    if self.value(child, player, child_hash, gain - gained):
+                        child_gain = gain - gained
+                        break
+                elif not self.value(child, 1 - player, child_hash, gained - gain + 1):
+                    child_gain = gained - gain
+                    break
+            else:
+                raise RuntimeError(f"no move reaches the proven value {gain} in {board}")
+            line.append(move)
+            board, board_hash, gain = child, child_hash, child_gain
+            if not extra:
+                player = 1 - player
+
+def solve(board: List[int], player: int, guess: Optional[int] = None,
+          num_buckets: int = DEFAULT_BUCKETS, tt_file: Optional[str] = None,
+          progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> SolveResult:
+    """
+    Solves a position exactly: the final store difference with perfect
+    play (Player 0's view) and an optimal line to the end of the game.
+
+    guess is the first MTD(f) guess as a final score (Player 0's view);
+    by default it comes from a depth-GUESS_DEPTH heuristic search.
+    tt_file backs the bound table with a memory-mapped file of
+    num_buckets buckets (see SolverTable). progress receives status dicts
+    (see Solver).
+    """
+    start_time = time.perf_counter()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    tablebase.ensure_loaded()
+    if guess is None:
+        try:
+            import ai_engine
+        except ImportError:
+            import kalaha.ai_engine as ai_engine
+        ai_engine.get_best_move(board, player, depth=GUESS_DEPTH, strategy='basic', search='pvs', use_book=False)
+        guess = round(ai_engine.LAST_SEARCH_INFO["score"])
+
+    table = SolverTable(num_buckets, tt_file)
+    try:
+        solver = Solver(table, progress)
+        solver.start_time = start_time
+        gain = solver.mtdf(board, player, canonical.exact_to_stored(guess, board, player))
+        nodes = solver.nodes
+        line = solver.optimal_line(board, player, gain)
+        solver.report("done")
+    finally:
+        table.close()
+    return SolveResult(
+        score=canonical.exact_from_stored(gain, board, player), line=line, nodes=nodes,
+        probes=solver.probes, tt_hits=solver.tt_hits, db_hits=solver.db_hits,
+        time=time.perf_counter() - start_time,
+    )
+
+def _print_progress(info: Dict[str, Any]) -> None:
+    print(f"  [{info['time']:8.1f}s] {info['phase']:9} score in [{info['lower']:+d}, {info['upper']:+d}] "
+          f"{info['nodes']:12} nodes {info['nps']:9.0f} nodes/s", flush=True)
+
+if __name__ == "__main__":
+    import argparse
+    import random
+
+    try:
+        from endgame_db import endgame_positions
+    except ImportError:
+        from kalaha.endgame_db import endgame_positions
+
+    parser = argparse.ArgumentParser(description="Solve Kalaha positions exactly")
+    parser.add_argument("--board", type=int, nargs=14, help="Board to solve (14 numbers, stores at 6 and 13)")
+    parser.add_argument("--player", type=int, choices=(0, 1), default=0, help="Side to move (default: 0)")
+    parser.add_argument("--random", type=int, default=0, help="Solve this many random endgame positions instead")
+    parser.add_argument("--max-pit-seeds", type=int, default=14,
+                        help="Seeds per side in the random positions (default: 14)")
+    parser.add_argument("--guess", type=int, help="First MTD(f) guess (default: heuristic search)")
+    parser.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS, help="Table buckets (power of two)")
+    parser.add_argument("--tt-file", nargs="?", const=TT_FILE,
+                        help=f"Back the table with this file, reused by later runs (default path: {TT_FILE})")
+    parser.add_argument("--quiet", action="store_true", help="No progress reports")
+    args = parser.parse_args()
+
+    if args.board:
+        positions = [(args.board, args.player)]
+    else:
+        positions = endgame_positions(args.random or 1, args.max_pit_seeds, seed=random.randrange(1 << 30))
+    endgame_db.persist()
+    try:
+        for board, player in positions:
+            print(f"Solving {board}, player {player} to move")
+            result = solve(board, player, args.guess, args.buckets, args.tt_file,
+                           None if args.quiet else _print_progress)
+            print(result.summary())
+            print("Line: " + " ".join(map(str, result.line)))
+    finally:
+        endgame_db.save()
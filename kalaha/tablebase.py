@@ -0,0 +1,252 @@
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from math import comb
+from typing import Any, List, Optional
+
+try:
+    from game_logic import apply_move, P1_PITS, P2_PITS, P1_STORE, P2_STORE
+except ImportError:
+    from kalaha.game_logic import apply_move, P1_PITS, P2_PITS, P1_STORE, P2_STORE
+
+TABLEBASE_FILE = "endgame_tablebase.bin"
+DEFAULT_MAX_SEEDS = 10
+
+# A position is the 12 pits seen from the side to move: [own 6 pits, opponent 6 pits].
+# Stores never influence the rest of the game, so the table holds, for every
+# pit configuration with up to max_seeds seeds, the exact store difference the
+# side to move will still gain with perfect play. Positions are indexed by
+# combinatorial rank (all compositions of k seeds into 12 pits, k = 0..max_seeds).
+NUM_PITS = 12
+MAGIC = b"KLHTB001"
+HEADER = struct.Struct("<8sII16x") # magic, max_seeds, count, padding
+UNKNOWN = -128
+MAX_SUPPORTED_SEEDS = 127 # Values are int8 (|value| <= seeds), -128 marks unsolved positions
+
+def compositions(seeds: int, parts: int) -> int:
+    """
+    Number of ways to put `seeds` seeds into `parts` pits.
+    """
+    return comb(seeds + parts - 1, parts - 1)
+
+class Ranker:
+    """
+    Perfect (collision-free) index of pit configurations.
+    """
+    def __init__(self, max_seeds: int) -> None:
+        self.max_seeds = max_seeds
+        # offsets[k]: number of positions with fewer than k seeds
+        self.offsets = [comb(k + NUM_PITS - 1, NUM_PITS) for k in range(max_seeds + 2)]
+        self.size = self.offsets[max_seeds + 1]
+        # skip[i][remaining][x]: positions skipped by putting x seeds in pit i
+        # when `remaining` seeds are left for pits i..11
+        self.skip: List[List[List[int]]] = []
+        for i in range(NUM_PITS - 1):
+            rest = NUM_PITS - 1 - i
+            per_remaining = []
+            for remaining in range(max_seeds + 1):
+                row = [0]
+                for x in range(remaining):
+                    row.append(row[-1] + compositions(remaining - x, rest))
+                per_remaining.append(row)
+            self.skip.append(per_remaining)
+
+    def rank(self, pits: List[int]) -> int:
+        remaining = sum(pits)
+        r = self.offsets[remaining]
+        skip = self.skip
+        for i in range(NUM_PITS - 1):
+            x = pits[i]
+            r += skip[i][remaining][x]
+            remaining -= x
+        return r
+
+def canonical_pits(board: List[int], player: int) -> List[int]:
+    """
+    The 12 pits seen from `player`: own pits first, then the opponent's.
+    """
+    if player == 0:
+        return board[0:6] + board[7:13]
+    return board[7:13] + board[0:6]
+
+def _board_from_pits(pits: List[int]) -> List[int]:
+    return pits[0:6] + [0] + pits[6:12] + [0]
+
+class Tablebase:
+    """
+    Read-only view of a tablebase file. With lazy=True the file is only
+    opened by ensure_loaded(); until then probe() never matches.
+    """
+    def __init__(self, path: str = TABLEBASE_FILE, lazy: bool = False) -> None:
+        self.path = path
+        self.max_seeds = -1 # No positions until a file is loaded
+        self.hits = 0
+        self.ranker: Optional[Ranker] = None
+        self._file: Optional[Any] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._values: Any = None
+        self.loaded = False
+        if not lazy:
+            self.ensure_loaded()
+
+    def ensure_loaded(self) -> None:
+        if not self.loaded:
+            self.loaded = True
+            if os.path.exists(self.path):
+                self.load()
+
+    def load(self) -> None:
+        self.close()
+        self.loaded = True
+        try:
+            self._file = open(self.path, 'rb')
+            magic, max_seeds, count = HEADER.unpack(self._file.read(HEADER.size))
+            if magic != MAGIC or max_seeds > MAX_SUPPORTED_SEEDS:
+                raise ValueError("not a tablebase file")
+            ranker = Ranker(max_seeds)
+            if count != ranker.size:
+                raise ValueError("not a tablebase file")
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._values = memoryview(self._mm)[HEADER.size:HEADER.size + count].cast('b')
+            self.ranker = ranker
+            self.max_seeds = max_seeds
+            print(f"Loaded endgame tablebase ({count} positions, up to {max_seeds} seeds) from {self.path}.")
+        except Exception as e:
+            print(f"Error loading {self.path}: {e}")
+            self.close()
+
+    def close(self) -> None:
+        if self._values is not None:
+            self._values.release()
+            self._values = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.ranker = None
+        self.max_seeds = -1
+
+    def probe(self, board: List[int], player: int) -> Optional[int]:
+        """
+        Exact final store difference (Player 0's view) with perfect play,
+        or None if the position has more seeds in pits than the table covers.
+        """
+        if self.ranker is None:
+            return None
+        pits = canonical_pits(board, player)
+        if sum(pits) > self.max_seeds:
+            return None
+        self.hits += 1
+        gain = self._values[self.ranker.rank(pits)]
+        if player == 0:
+            return board[P1_STORE] - board[P2_STORE] + gain
+        return board[P1_STORE] - board[P2_STORE] - gain
+
+def solve_all(max_seeds: int, verbose: bool = False) -> array:
+    """
+    Exhaustively solves every position with up to max_seeds seeds in pits.
+    Returns an int8 array indexed by Ranker(max_seeds).rank(pits).
+
+    Positions are solved level by level (total seeds ascending). Inside a
+    level, a move that keeps every seed in play can only shift the mover's
+    seeds towards their store, so the recursion below never loops.
+    Raises ValueError above MAX_SUPPORTED_SEEDS (values would not fit int8).
+    """
+    if not 0 <= max_seeds <= MAX_SUPPORTED_SEEDS:
+        raise ValueError(f"max_seeds must be between 0 and {MAX_SUPPORTED_SEEDS}, got {max_seeds}")
+    ranker = Ranker(max_seeds)
+    values = array('b', [UNKNOWN]) * ranker.size
+    rank = ranker.rank
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+
+    def solve(pits: List[int]) -> int:
+        r = rank(pits)
+        v = values[r]
+        if v != UNKNOWN:
+            return v
+
+        own = sum(pits[0:6])
+        opp = sum(pits[6:12])
+        if own == 0 or opp == 0:
+            # Game over: remaining seeds go to their owners' stores
+            best = own - opp
+        else:
+            board = _board_from_pits(pits)
+            best = -NUM_PITS * max_seeds - 1
+            for move in range(6):
+                if not pits[move]:
+                    continue
+                child, extra = apply_move(board, move, 0)
+                gain = child[P1_STORE] - child[P2_STORE]
+                child_own = sum(child[i] for i in P1_PITS)
+                child_opp = sum(child[i] for i in P2_PITS)
+                if child_own == 0 or child_opp == 0:
+                    score = gain + child_own - child_opp
+                elif extra:
+                    score = gain + solve(child[0:6] + child[7:13])
+                else:
+                    score = gain - solve(child[7:13] + child[0:6])
+                if score > best:
+                    best = score
+
+        values[r] = best
+        return best
+
+    start = time.perf_counter()
+    for k in range(max_seeds + 1):
+        for pits in _level(k):
+            solve(pits)
+        if verbose:
+            done = ranker.offsets[k + 1]
+            print(f"Seeds {k:2}: {done} positions solved ({time.perf_counter() - start:.1f}s)")
+    return values
+
+def _level(seeds: int) -> Any:
+    """
+    Yields every pit configuration with exactly `seeds` seeds.
+    """
+    pits = [0] * NUM_PITS
+
+    def fill(i: int, remaining: int) -> Any:
+        if i == NUM_PITS - 1:
+            pits[i] = remaining
+            yield list(pits)
+            return
+        for x in range(remaining + 1):
+            pits[i] = x
+            yield from fill(i + 1, remaining - x)
+
+    yield from fill(0, seeds)
+
+def generate(max_seeds: int = DEFAULT_MAX_SEEDS, path: str = TABLEBASE_FILE, verbose: bool = True) -> None:
+    """
+    Solves all positions up to max_seeds seeds and writes the tablebase file.
+    """
+    values = solve_all(max_seeds, verbose)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, max_seeds, len(values)))
+        f.write(values.tobytes())
+    os.replace(tmp_path, path)
+    if verbose:
+        print(f"Wrote {len(values)} positions to {path}.")
+
+# Global instance, opened on first search
+tablebase = Tablebase(lazy=True)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate the Kalaha endgame tablebase by exhaustive search")
+    parser.add_argument("--max-seeds", type=int, default=DEFAULT_MAX_SEEDS,
+                        help=f"Largest number of seeds left in pits (default: {DEFAULT_MAX_SEEDS})")
+    parser.add_argument("--output", type=str, default=TABLEBASE_FILE,
+                        help=f"Output file (default: {TABLEBASE_FILE})")
+    args = parser.parse_args()
+
+    generate(args.max_seeds, args.output)
@@ -1,9 +1,56 @@
+import json
+import os
+import random
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
 from game_logic import (
     initial_state, legal_moves, is_terminal, 
-    evaluate, cleanup_board, apply_move,
-    P1_PITS, P2_PITS, P1_STORE, P2_STORE
+    evaluate, cleanup_board, apply_move, get_sowing_path,
+    P1_PITS, P2_PITS, P1_STORE, P2_STORE,
+    pack_board, unpack_board, legal_moves_packed, apply_move_packed,
+    is_terminal_packed, cleanup_board_packed,
+    RuleSet, DEFAULT_RULES, RULESETS
 )
+from zobrist_hashing import zobrist, ZobristHasher
+import zobrist_hashing
+import canonical
+import ai_engine
+import endgame_db as endgame_db_module
+import tablebase as tablebase_module
+import ponder
+import opening_book as opening_book_module
+import mcts
+import perft
+import evaluation
+import solver
+from transposition_table import TranspositionTable, EXACT, LOWERBOUND, UPPERBOUND, NO_MOVE
+
+try:
+    import numpy as np
+    import batch_logic
+except ImportError: # numpy is optional (only the batch API needs it)
+    np = None
+
+class IsolatedDBTestCase(unittest.TestCase):
+    """
+    Searches in these tests read and add endgame DB positions: give them a
+    fresh in-memory database (nothing written to disk) instead of the
+    user's shared one.
+    """
+
+    def setUp(self):
+        self.db_tmp = tempfile.TemporaryDirectory()
+        self.shared_db = ai_engine.endgame_db
+        db = endgame_db_module.EndgameDB(os.path.join(self.db_tmp.name, "db.bin"), write_behind=False)
+        ai_engine.endgame_db = solver.endgame_db = db
+
+    def tearDown(self):
+        ai_engine.endgame_db = solver.endgame_db = self.shared_db
+        self.db_tmp.cleanup()
 
 class TestKalahaLogic(unittest.TestCase):
     
@@ -96,5 +143,954 @@ class TestKalahaLogic(unittest.TestCase):
         self.assertEqual(cleaned_board[13], 12) # 10 + 2
         self.assertEqual(cleaned_board[6], 10)
 
+class TestPackedBoard(unittest.TestCase):
+
+    def test_round_trip(self):
+        board = initial_state()
+        self.assertEqual(unpack_board(pack_board(board)), board)
+        
+        board = [0] * 14
+        board[6] = 72
+        self.assertEqual(unpack_board(pack_board(board)), board)
+
+    def test_matches_list_board_on_random_games(self):
+        rng = random.Random(1234)
+        for _ in range(300):
+            board = initial_state()
+            packed = pack_board(board)
+            player = 0
+            while not is_terminal(board):
+                self.assertFalse(is_terminal_packed(packed))
+                moves = legal_moves(board, player)
+                self.assertEqual(legal_moves_packed(packed, player), moves)
+                
+                move = rng.choice(moves)
+                board, extra = apply_move(board, move, player)
+                packed, extra_packed = apply_move_packed(packed, move, player)
+                self.assertEqual(unpack_board(packed), board)
+                self.assertEqual(extra_packed, extra)
+                if not extra:
+                    player = 1 - player
+                    
+            self.assertTrue(is_terminal_packed(packed))
+            self.assertEqual(unpack_board(cleanup_board_packed(packed)), cleanup_board(board))
+
+    def test_full_laps(self):
+        # 13 seeds: one full lap, last seed lands back in the (now empty) origin -> capture
+        board = [0] * 14
+        board[2] = 13
+        board[9] = 1
+        expected, extra = apply_move(board, 2, 0)
+        packed, extra_packed = apply_move_packed(pack_board(board), 2, 0)
+        self.assertEqual(unpack_board(packed), expected)
+        self.assertEqual(extra_packed, extra)
+        
+        # 30 seeds: two laps plus a remainder
+        board = [0] * 14
+        board[10] = 30
+        board[0] = 1
+        expected, extra = apply_move(board, 10, 1)
+        packed, extra_packed = apply_move_packed(pack_board(board), 10, 1)
+        self.assertEqual(unpack_board(packed), expected)
+        self.assertEqual(extra_packed, extra)
+
+class TestZobristHashing(unittest.TestCase):
+
+    def test_incremental_hash_matches_full_hash(self):
+        rng = random.Random(99)
+        for _ in range(300):
+            board = initial_state()
+            player = 0
+            h = zobrist.compute_hash(board, player)
+            while not is_terminal(board):
+                move = rng.choice(legal_moves(board, player))
+                expected_board, expected_extra = apply_move(board, move, player)
+                board, extra, h = zobrist.apply_move(board, h, move, player)
+                self.assertEqual(board, expected_board)
+                self.assertEqual(extra, expected_extra)
+                if not extra:
+                    player = 1 - player
+                self.assertEqual(h, zobrist.compute_hash(board, player))
+
+    def test_incremental_hash_on_capture_and_laps(self):
+        cases = [
+            ([0, 1, 0, 0, 0, 0, 3, 0, 0, 0, 0, 5, 0, 2], 0, 0),   # short capture
+            ([0, 0, 13, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0], 2, 0),  # lap capture on origin
+            ([1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 30, 0, 0, 4], 10, 1), # two laps
+            ([0, 0, 0, 0, 0, 0, 0, 4, 0, 0, 0, 0, 0, 0], 7, 1),   # capture across the store
+        ]
+        for board, move, player in cases:
+            h = zobrist.compute_hash(board, player)
+            new_board, extra, new_h = zobrist.apply_move(board, h, move, player)
+            next_player = player if extra else 1 - player
+            self.assertEqual(new_h, zobrist.compute_hash(new_board, next_player))
+
+class TestRuleSet(IsolatedDBTestCase):
+
+    def play(self, rules, seed):
+        rng = random.Random(seed)
+        board = rules.initial_state()
+        player = 0
+        while not rules.is_terminal(board):
+            move = rng.choice(rules.legal_moves(board, player))
+            yield board, move, player
+            board, extra = rules.apply_move(board, move, player)
+            if not extra:
+                player = 1 - player
+
+    def test_default_rules_match_module_functions(self):
+        self.assertEqual(DEFAULT_RULES, RuleSet(6, 6))
+        self.assertEqual(DEFAULT_RULES.initial_state(), initial_state())
+        for seed in range(50):
+            for board, move, player in self.play(DEFAULT_RULES, seed):
+                self.assertEqual(DEFAULT_RULES.legal_moves(board, player), legal_moves(board, player))
+                self.assertEqual(DEFAULT_RULES.apply_move(board, move, player), apply_move(board, move, player))
+                self.assertEqual(DEFAULT_RULES.pack_board(board), pack_board(board))
+
+    def test_variants_packed_and_hashing(self):
+        for name, rules in RULESETS.items():
+            hasher = ZobristHasher(seed=7, rules=rules)
+            for seed in range(20):
+                for board, move, player in self.play(rules, seed):
+                    self.assertEqual(sum(board), rules.total_seeds, name)
+                    packed = rules.pack_board(board)
+                    self.assertEqual(rules.legal_moves_packed(packed, player), rules.legal_moves(board, player))
+                    
+                    expected, extra = rules.apply_move(board, move, player)
+                    new_packed, extra_packed = rules.apply_move_packed(packed, move, player)
+                    self.assertEqual((rules.unpack_board(new_packed), extra_packed), (expected, extra), name)
+                    
+                    h = hasher.compute_hash(board, player)
+                    new_board, _, new_h = hasher.apply_move(board, h, move, player)
+                    self.assertEqual(new_board, expected)
+                    self.assertEqual(new_h, hasher.compute_hash(new_board, player if extra else 1 - player), name)
+
+    def test_empty_capture(self):
+        # Kalah(4,4): pit 1 sows its last seed into empty pit 2, facing an empty pit 6
+        board = [0, 1, 0, 3, 0, 0, 0, 4, 5, 3]
+        plain, _ = RULESETS["kalah(4,4)"].apply_move(board, 1, 0)
+        empty, _ = RULESETS["kalah(4,4)+empty"].apply_move(board, 1, 0)
+        self.assertEqual(plain, [0, 0, 1, 3, 0, 0, 0, 4, 5, 3])
+        self.assertEqual(empty, [0, 0, 0, 3, 1, 0, 0, 4, 5, 3])
+
+    def test_engine_searches_variant_and_switches_back(self):
+        board = initial_state()
+        _, default_nodes = ai_engine.get_best_move(board, 0, depth=5, use_book=False)
+        
+        rules = RULESETS["kalah(4,4)+empty"]
+        variant_board = rules.initial_state()
+        move, nodes = ai_engine.get_best_move(variant_board, 0, depth=5, use_book=False, rules=rules)
+        self.assertIn(move, rules.legal_moves(variant_board, 0))
+        self.assertGreater(nodes, 0)
+        self.assertIs(ai_engine.RULES, rules)
+        
+        self.assertEqual(ai_engine.get_best_move(board, 0, depth=5, use_book=False)[1], default_nodes)
+        self.assertIs(ai_engine.RULES, DEFAULT_RULES)
+
+class TestCanonical(IsolatedDBTestCase):
+
+    @staticmethod
+    def mirror(board):
+        return board[7:14] + board[0:7]
+
+    def test_keys(self):
+        board = [3, 0, 5, 1, 0, 2, 20, 4, 0, 6, 1, 1, 2, 27]
+        offset = board[:6] + [25] + board[7:13] + [22]
+        h = zobrist.compute_hash(board)
+        self.assertEqual(h >> 64, zobrist.compute_hash(self.mirror(board)) & zobrist_hashing.MASK64)
+
+        def key(b, player, mode):
+            return canonical.key(zobrist, zobrist.compute_hash(b), b, player, mode)
+        self.assertEqual(key(board, 0, canonical.MIRRORED), key(self.mirror(board), 1, canonical.MIRRORED))
+        self.assertEqual(key(board, 0, canonical.MIRRORED), key(offset, 0, canonical.MIRRORED))
+        self.assertNotEqual(key(board, 0, canonical.MIRRORED), key(board, 1, canonical.MIRRORED))
+        self.assertEqual(key(board, 1, canonical.OFFSET), key(offset, 1, canonical.OFFSET))
+        self.assertNotEqual(key(board, 0, canonical.OFFSET), key(self.mirror(board), 1, canonical.OFFSET))
+        self.assertNotEqual(key(board, 0, canonical.ABSOLUTE), key(offset, 0, canonical.ABSOLUTE))
+        self.assertEqual(key(board, 0, canonical.ABSOLUTE), zobrist.position_key(board, 0))
+
+    def test_modes_and_values(self):
+        self.assertEqual(canonical.mode_for('balanced'), canonical.MIRRORED)
+        self.assertEqual(canonical.mode_for('defensive'), canonical.OFFSET)
+        evaluation.add_strategy('test_stores', (2, 0, 0, 0, 0, 0))
+        try:
+            self.assertEqual(canonical.mode_for('test_stores'), canonical.ABSOLUTE)
+        finally:
+            del evaluation.STRATEGY_WEIGHTS['test_stores'], evaluation.EVALUATORS['test_stores']
+
+        board = [3, 0, 5, 1, 0, 2, 20, 4, 0, 6, 1, 1, 2, 27]
+        stored = canonical.to_stored(-4.5, LOWERBOUND, board, 1, canonical.MIRRORED)
+        self.assertEqual(stored, (-2.5, UPPERBOUND))
+        self.assertEqual(canonical.from_stored(*stored, self.mirror(board), 0, canonical.MIRRORED), (4.5, UPPERBOUND))
+        for mode in (canonical.ABSOLUTE, canonical.OFFSET, canonical.MIRRORED):
+            self.assertEqual(canonical.from_stored(*canonical.to_stored(3.0, EXACT, board, 1, mode), board, 1, mode), (3.0, EXACT))
+            self.assertEqual(canonical.move_from_stored(canonical.move_to_stored(9, 1, mode), 1, mode), 9)
+        self.assertEqual(canonical.exact_from_stored(canonical.exact_to_stored(-9, board, 1), self.mirror(board), 0), 9)
+
+    def test_mirrored_search_shares_the_table(self):
+        board = [3, 0, 5, 1, 0, 2, 20, 4, 0, 6, 1, 1, 2, 27]
+        for search in ('alphabeta', 'pvs'):
+            ai_engine.reset_search_state()
+            move, fresh = ai_engine.get_best_move(board, 0, depth=5, search=search)
+            score = ai_engine.LAST_SEARCH_INFO["score"]
+            mirror_move, reused = ai_engine.get_best_move(self.mirror(board), 1, depth=5, search=search)
+            self.assertEqual(mirror_move, move + 7)
+            self.assertAlmostEqual(ai_engine.LAST_SEARCH_INFO["score"], -score)
+            self.assertLess(reused, fresh)
+
+class TestTranspositionTable(unittest.TestCase):
+
+    def test_store_and_probe(self):
+        tt = TranspositionTable(num_buckets=16)
+        tt.store(12345, -3.5, 7, LOWERBOUND, 9)
+        self.assertEqual(tt.probe(12345), (-3.5, 7, LOWERBOUND, 9))
+        tt.store(777, 12.0, 100, EXACT)
+        self.assertEqual(tt.probe(777), (12.0, 100, EXACT, NO_MOVE))
+        self.assertIsNone(tt.probe(999))
+        self.assertEqual(tt.hits, 2)
+        self.assertEqual(tt.misses, 1)
+
+    def test_bounded_capacity_and_replacement(self):
+        tt = TranspositionTable(num_buckets=4)
+        # Keys 1, 5, 9 all map to bucket 1
+        tt.store(1, 1.0, 10, EXACT)
+        tt.store(5, 2.0, 2, EXACT)  # shallower: goes to the always-replace slot
+        tt.store(9, 3.0, 3, EXACT)  # evicts 5, deep entry for 1 is kept
+        self.assertEqual(tt.probe(1)[0], 1.0)
+        self.assertIsNone(tt.probe(5))
+        self.assertEqual(tt.probe(9)[0], 3.0)
+        self.assertEqual(tt.collisions, 1)
+        self.assertEqual(tt.overwrites, 1)
+        
+        # A new search generation lets shallow entries replace old deep ones
+        tt.new_search()
+        tt.store(13, 4.0, 1, UPPERBOUND)
+        self.assertIsNone(tt.probe(1))
+        self.assertEqual(tt.probe(13)[0], 4.0)
+        
+        for key in range(1000):
+            tt.store(key, 0.0, 1, EXACT)
+        self.assertLessEqual(tt.usage(), tt.capacity)
+        
+        tt.clear()
+        self.assertEqual(tt.usage(), 0)
+        self.assertEqual(tt.probes, 0)
+
+class TestSearch(IsolatedDBTestCase):
+
+    def test_fixed_depth_reports_info(self):
+        board = initial_state()
+        move, nodes = ai_engine.get_best_move(board, 0, depth=3)
+        self.assertIn(move, legal_moves(board, 0))
+        self.assertEqual(ai_engine.LAST_SEARCH_INFO["depth"], 3)
+        self.assertEqual(ai_engine.LAST_SEARCH_INFO["nodes"], nodes)
+
+    def test_time_limited_search(self):
+        board = initial_state()
+        board, _ = apply_move(board, 2, 0)
+        ai_engine.TT.clear()
+        reports = []
+        move, nodes = ai_engine.get_best_move(board, 1, time_limit_ms=150, progress_callback=reports.append)
+        info = ai_engine.LAST_SEARCH_INFO
+        self.assertIn(move, legal_moves(board, 1))
+        self.assertGreaterEqual(info["depth"], 1)
+        self.assertLess(info["time"], 1.0)
+        self.assertEqual([r["depth"] for r in reports], list(range(1, len(reports) + 1)))
+
+    def test_pvs_matches_plain_minimax(self):
+        def minimax(board, depth, player):
+            if is_terminal(board):
+                final = cleanup_board(board)
+                return float(final[P1_STORE] - final[P2_STORE])
+            if depth == 0:
+                return ai_engine.evaluate_heuristic(board, 0, 'balanced')
+            scores = []
+            for move in legal_moves(board, player):
+                child, extra = apply_move(board, move, player)
+                if extra:
+                    scores.append(minimax(child, depth, player))
+                else:
+                    scores.append(minimax(child, depth - 1, 1 - player))
+            return max(scores) if player == 0 else min(scores)
+        
+        rng = random.Random(7)
+        board = initial_state()
+        player = 0
+        for _ in range(6):
+            ai_engine.TT.clear()
+            move, _ = ai_engine.get_best_move(board, player, depth=3, search='pvs')
+            self.assertAlmostEqual(ai_engine.LAST_SEARCH_INFO["score"], minimax(board, 3, player), places=2)
+            
+            board, extra = apply_move(board, rng.choice(legal_moves(board, player)), player)
+            if not extra:
+                player = 1 - player
+
+    def test_search_stats(self):
+        board = initial_state()
+        board, _ = apply_move(board, 3, 0)
+        ai_engine.reset_search_state()
+        move, nodes = ai_engine.get_best_move(board, 1, depth=6, search='pvs', use_book=False)
+        stats = ai_engine.LAST_SEARCH_INFO["stats"]
+        self.assertEqual((stats.nodes, stats.best_move, stats.depth), (nodes, move, 6))
+        self.assertEqual([d for d, _, _ in stats.iterations], list(range(1, 7)))
+        self.assertEqual(sum(n for _, n, _ in stats.iterations), nodes)
+        # Every node not answered by the tablebase/DB probes the TT once
+        self.assertEqual(stats.tt_probes, nodes - stats.db_hits)
+        self.assertLessEqual(stats.tt_cutoffs, stats.tt_hits)
+        self.assertLessEqual(stats.first_move_cutoffs, stats.beta_cutoffs)
+        self.assertGreater(stats.branching_factor, 1.0)
+        
+        # The PV is a legal line starting with the best move
+        self.assertEqual(stats.pv[0], move)
+        player = 1
+        for m in stats.pv:
+            self.assertIn(m, legal_moves(board, player))
+            board, extra = apply_move(board, m, player)
+            if not extra:
+                player = 1 - player
+
+    def test_profile_search(self):
+        import io
+        out = io.StringIO()
+        move, stats = ai_engine.profile_search(initial_state(), 0, limit=5, stream=out, depth=4, use_book=False)
+        self.assertEqual(stats.best_move, move)
+        self.assertIn("alphabeta_tt_db", out.getvalue())
+        self.assertIn("beta cutoffs", out.getvalue())
+
+    def test_node_counts_are_deterministic(self):
+        board = initial_state()
+        board, _ = apply_move(board, 3, 0)
+        for search in ('alphabeta', 'pvs'):
+            counts = []
+            for _ in range(2):
+                ai_engine.reset_search_state()
+                counts.append(ai_engine.get_best_move(board, 1, depth=5, search=search))
+            self.assertEqual(counts[0], counts[1])
+
+    def test_ordering_puts_tactics_first(self):
+        board = [0, 0, 0, 1, 2, 0, 0, 0, 0, 0, 0, 0, 4, 0]
+        board[7] = 1 # keep P2 alive
+        h = zobrist.compute_hash(board, 0)
+        children = ai_engine.ordered_children(board, 0, h)
+        # Pit 4 (2 seeds) ends in the store: extra turn beats the quiet pit 3
+        self.assertEqual(children[0][0], 4)
+        self.assertTrue(children[0][2])
+        child_board, extra = apply_move(board, children[0][0], 0)
+        self.assertEqual(children[0][1], child_board)
+        # A TT move hint overrides everything
+        self.assertEqual(ai_engine.ordered_children(board, 0, h, tt_move=3)[0][0], 3)
+
+    def random_positions(self, count, seed=11):
+        rng = random.Random(seed)
+        positions = []
+        while len(positions) < count:
+            board, player = initial_state(), 0
+            for _ in range(rng.randint(0, 40)):
+                if is_terminal(board):
+                    break
+                board, extra = apply_move(board, rng.choice(legal_moves(board, player)), player)
+                player = player if extra else 1 - player
+            if not is_terminal(board):
+                positions.append((board, player))
+        return positions
+
+    def reference_quiescence(self, board, player, qdepth=ai_engine.QUIESCENCE_DEPTH):
+        if is_terminal(board):
+            final = cleanup_board(board)
+            return float(final[P1_STORE] - final[P2_STORE])
+        values = [ai_engine.evaluate_heuristic(board, 0, 'balanced')]
+        if qdepth:
+            for move, child, extra in ai_engine.noisy_moves(board, player):
+                values.append(self.reference_quiescence(child, player if extra else 1 - player, qdepth - 1))
+        return max(values) if player == 0 else min(values)
+
+    def test_noisy_moves(self):
+        for board, player in self.random_positions(200):
+            store = P1_STORE if player == 0 else P2_STORE
+            expected = set()
+            for move in legal_moves(board, player):
+                child, extra = apply_move(board, move, player)
+                # A capture adds more to the store than the seeds sown into it
+                if extra or child[store] - board[store] > get_sowing_path(board, move, player).count(store):
+                    expected.add(move)
+            noisy = ai_engine.noisy_moves(board, player)
+            self.assertEqual({m for m, _, _ in noisy}, expected)
+            for move, child, extra in noisy:
+                self.assertEqual((child, extra), apply_move(board, move, player))
+
+    def test_quiescence_matches_reference(self):
+        for board, player in self.random_positions(60):
+            self.assertAlmostEqual(
+                ai_engine.quiescence_search(board, -ai_engine.INF, ai_engine.INF, player),
+                self.reference_quiescence(board, player)
+            )
+
+    def test_search_with_quiescence(self):
+        def minimax(board, depth, player):
+            if is_terminal(board):
+                final = cleanup_board(board)
+                return float(final[P1_STORE] - final[P2_STORE])
+            if depth == 0:
+                return self.reference_quiescence(board, player)
+            scores = []
+            for move in legal_moves(board, player):
+                child, extra = apply_move(board, move, player)
+                scores.append(minimax(child, depth if extra else depth - 1, player if extra else 1 - player))
+            return max(scores) if player == 0 else min(scores)
+        
+        for board, player in self.random_positions(4, seed=3):
+            for search in ('alphabeta', 'pvs'):
+                ai_engine.reset_search_state()
+                ai_engine.get_best_move(board, player, depth=2, search=search, use_book=False, quiescence=True)
+                stats = ai_engine.LAST_SEARCH_INFO["stats"]
+                self.assertAlmostEqual(stats.score, minimax(board, 2, player), places=2)
+                self.assertLessEqual(stats.qnodes, stats.nodes)
+
+    def test_parallel_search_returns_legal_move(self):
+        import parallel_search
+        board = initial_state()
+        try:
+            move, nodes = ai_engine.get_best_move(board, 0, depth=4, workers=2)
+            self.assertEqual(parallel_search._shared_key[:2], (DEFAULT_RULES, 'balanced'))
+            
+            # Another variant: the parent clears the shared table, the workers never do
+            rules = RULESETS["kalah(4,4)"]
+            variant_move, _ = ai_engine.get_best_move(rules.initial_state(), 0, depth=4, workers=2, rules=rules)
+            self.assertIn(variant_move, rules.legal_moves(rules.initial_state(), 0))
+            self.assertEqual(parallel_search._shared_key[:2], (rules, 'balanced'))
+        finally:
+            parallel_search.shutdown()
+        self.assertIsNone(parallel_search._shared_key)
+        self.assertIn(move, legal_moves(board, 0))
+        self.assertGreater(nodes, 0)
+        self.assertEqual(ai_engine.LAST_SEARCH_INFO["workers"], 2)
+        self.assertGreaterEqual(ai_engine.LAST_SEARCH_INFO["depth"], 4)
+        
+        # A worker registers a preset it lacks (added in the parent after it started)
+        weights = (1.0, 0.0, 0.0, 0.0, 2.0, 0.0)
+        try:
+            parallel_search._worker_search(board, 0, 2, 'test_parallel', None, 'alphabeta', 0, weights=weights)
+            self.assertEqual(evaluation.STRATEGY_WEIGHTS['test_parallel'], weights)
+        finally:
+            del evaluation.STRATEGY_WEIGHTS['test_parallel'], evaluation.EVALUATORS['test_parallel']
+            ai_engine.ROOT_ROTATION = 0
+
+class TestPerft(unittest.TestCase):
+
+    def test_reference_counts(self):
+        names = ["list", "packed", "zobrist"] + (["batch"] if np is not None else [])
+        for name in names:
+            counts = [perft.IMPLEMENTATIONS[name](initial_state(), 0, d) for d in range(6)]
+            self.assertEqual(counts, perft.REFERENCE_COUNTS[:6], name)
+
+    def test_random_positions_agree(self):
+        names = ["packed", "zobrist"] + (["batch"] if np is not None else [])
+        self.assertEqual(perft.check_positions(30, 3, names), [])
+
+    def test_divide_sums_to_perft(self):
+        counts = perft.divide(initial_state(), 0, 4)
+        self.assertEqual(sorted(counts), [0, 1, 2, 3, 4, 5])
+        self.assertEqual(sum(counts.values()), perft.REFERENCE_COUNTS[4])
+
+class TestEvaluation(IsolatedDBTestCase):
+
+    def test_presets_match_hand_written_strategies(self):
+        def reference(board, strategy):
+            store_diff = board[P1_STORE] - board[P2_STORE]
+            side_diff = sum(board[i] for i in P1_PITS) - sum(board[i] for i in P2_PITS)
+            score = float(store_diff)
+            if strategy == 'balanced':
+                score += 0.5 * side_diff
+            elif strategy == 'defensive':
+                score += 0.8 * side_diff
+                score -= 2.0 * sum(1 for i in P1_PITS if board[i] == 0)
+            elif strategy == 'aggressive':
+                score += 0.3 * side_diff
+            return score
+
+        for board, _ in perft.random_positions(200, seed=5):
+            for strategy in ('basic', 'balanced', 'defensive', 'aggressive', 'unknown'):
+                self.assertEqual(ai_engine.evaluate_heuristic(board, 0, strategy), reference(board, strategy))
+
+    def test_features(self):
+        # P0: pit 3 (3 seeds) ends in the store, pit 1 (1 seed) captures pit 10 (5 + 1)
+        # P1: pit 11 (2 seeds) ends in the store, pit 7 (13 seeds) captures pit 5 after a lap (0 + 1 + 1)
+        board = [0, 1, 0, 3, 0, 0, 10, 13, 0, 0, 5, 2, 0, 4]
+        self.assertEqual(evaluation.features(board), [6, 4 - 20, 4, 3, 6 - 2, 1 - 1])
+        self.assertEqual(evaluation.best_capture(initial_state(), 0), 0)
+
+    def test_custom_strategy(self):
+        evaluation.add_strategy('test_captures', (1, 0, 0, 0, 2, 0))
+        try:
+            board = [0, 1, 0, 3, 0, 0, 10, 13, 0, 0, 5, 2, 0, 4]
+            self.assertEqual(ai_engine.evaluate_heuristic(board, 0, 'test_captures'), 6 + 2 * 4)
+            move, _ = ai_engine.get_best_move(board, 0, depth=2, strategy='test_captures')
+            self.assertIn(move, legal_moves(board, 0))
+        finally:
+            del evaluation.STRATEGY_WEIGHTS['test_captures'], evaluation.EVALUATORS['test_captures']
+        with self.assertRaises(ValueError):
+            evaluation.make_evaluator((1, 2))
+
+    @unittest.skipUnless(np is not None, "numpy not installed")
+    def test_batch_matches_scalar(self):
+        boards = [board for board, _ in perft.random_positions(300, seed=6)]
+        feats = evaluation.features_batch(np.array(boards))
+        self.assertEqual(feats.tolist(), [evaluation.features(b) for b in boards])
+        weights = (1.0, 0.4, -0.5, 0.5, 0.7, 1.5)
+        evaluation.add_strategy('test_batch', weights)
+        try:
+            expected = [ai_engine.evaluate_heuristic(b, 0, 'test_batch') for b in boards]
+        finally:
+            del evaluation.STRATEGY_WEIGHTS['test_batch'], evaluation.EVALUATORS['test_batch']
+        self.assertEqual(evaluation.evaluate_batch(np.array(boards), weights).tolist(), expected)
+        self.assertEqual(evaluation.evaluate_batch(np.array(boards), strategy='defensive').tolist(),
+                         [ai_engine.evaluate_heuristic(b, 0, 'defensive') for b in boards])
+
+class TestEndgameDB(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "db.bin")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_add_save_reload(self):
+        db = endgame_db_module.EndgameDB(self.path)
+        board = [0] * 14
+        board[6] = 40
+        board[13] = 32
+        db.add(board, 0, 8)
+        db.add(board, 1, -8)
+        self.assertEqual(db.lookup(board, 0), 8)
+        db.save()
+        db.close()
+        
+        db = endgame_db_module.EndgameDB(self.path)
+        self.assertEqual(db.count, 2)
+        self.assertEqual(db.lookup(board, 0), 8)
+        self.assertEqual(db.lookup(board, 1), -8)
+        self.assertIsNone(db.lookup(initial_state(), 0))
+        
+        # New entries are merged with the mapped ones on save
+        db.add(initial_state(), 0, 0)
+        db.save()
+        self.assertEqual(db.count, 3)
+        self.assertEqual(db.lookup(board, 1), -8)
+        self.assertEqual(db.lookup(initial_state(), 0), 0)
+        db.close()
+
+    def test_lazy_load(self):
+        db = endgame_db_module.EndgameDB(self.path)
+        db.add(initial_state(), 0, 3)
+        db.save()
+        db.close()
+        
+        db = endgame_db_module.EndgameDB(self.path, lazy=True)
+        self.assertFalse(db.loaded)
+        self.assertEqual(db.count, 0)
+        self.assertEqual(db.lookup(initial_state(), 0), 3)
+        self.assertTrue(db.loaded)
+        db.close()
+
+    def test_convert_json(self):
+        json_path = os.path.join(self.tmp.name, "db.json")
+        with open(json_path, "w") as f:
+            json.dump({"max_seeds": 72, "positions": {"123": 5, "18446744073709551615": -50}}, f)
+        
+        self.assertEqual(endgame_db_module.convert_json(json_path, self.path), 2)
+        db = endgame_db_module.EndgameDB(self.path)
+        self.assertEqual(db.lookup([], 0, 123), 5)
+        self.assertEqual(db.lookup([], 0, 18446744073709551615), -50)
+        self.assertEqual(db.max_seeds, 72)
+        db.close()
+
+    def test_hash_keys_stable_across_processes(self):
+        code = "from zobrist_hashing import zobrist; print(zobrist.compute_hash([3] * 12 + [18, 18], 1))"
+        here = os.path.dirname(os.path.abspath(__file__))
+        out = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True, check=True)
+        self.assertEqual(int(out.stdout.strip()), zobrist.compute_hash([3] * 12 + [18, 18], 1))
+
+    def test_stale_database_is_discarded(self):
+        stale_headers = [
+            struct.pack("<8sIIQ8x", endgame_db_module.MAGIC, 1, 72, 1),  # format 1 (random keys)
+            endgame_db_module.HEADER.pack(endgame_db_module.MAGIC, endgame_db_module.FORMAT_VERSION, 72, 1,
+                                          zobrist.seed + 1, zobrist.key_version),
+            endgame_db_module.HEADER.pack(endgame_db_module.MAGIC, endgame_db_module.FORMAT_VERSION, 72, 1, 0, 0),
+        ]
+        for header in stale_headers:
+            with open(self.path, "wb") as f:
+                f.write(header + struct.pack("<Qb", zobrist.position_key(initial_state(), 0), 5))
+            db = endgame_db_module.EndgameDB(self.path)
+            self.assertEqual(db.count, 0)
+            self.assertIsNone(db.lookup(initial_state(), 0))
+            self.assertFalse(os.path.exists(self.path))
+            self.assertTrue(os.path.exists(self.path + endgame_db_module.STALE_SUFFIX))
+
+            # The fresh database is stamped with the current keys and survives a reload
+            db.add(initial_state(), 0, 5)
+            db.save()
+            db.close()
+            db = endgame_db_module.EndgameDB(self.path)
+            self.assertEqual(db.lookup(initial_state(), 0), 5)
+            self.assertEqual((db.lookups, db.hits), (1, 1))
+            db.close()
+            os.remove(db.journal_path)
+
+    def test_write_behind_journal(self):
+        old_threshold = endgame_db_module.FLUSH_THRESHOLD
+        endgame_db_module.FLUSH_THRESHOLD = 1
+        try:
+            db = endgame_db_module.EndgameDB(self.path)
+            db.add([], 0, 1, board_hash=1)
+            self.assertIsNone(db._writer) # Nothing reaches the disk before persist()
+            self.assertFalse(os.path.exists(db.journal_path))
+            db.persist()
+            for key in range(1, 4):
+                db.add([], 0, key, board_hash=key)
+            for _ in range(200): # The writer thread appends without save()
+                if os.path.exists(db.journal_path) and os.path.getsize(db.journal_path) == \
+                        endgame_db_module.JOURNAL_HEADER.size + 3 * endgame_db_module.RECORD.size:
+                    break
+                threading.Event().wait(0.01)
+            db.close()
+        finally:
+            endgame_db_module.FLUSH_THRESHOLD = old_threshold
+        self.assertFalse(os.path.exists(self.path))
+
+        # A torn record at the end (crash mid-append) is ignored
+        with open(db.journal_path, "ab") as f:
+            f.write(b"\x07\x00\x00")
+        reader = endgame_db_module.EndgameDB(self.path)
+        self.assertEqual(reader.count, 3)
+        self.assertEqual([reader.lookup([], 0, k) for k in (1, 2, 3, 4)], [1, 2, 3, None])
+
+        # Compaction by another instance is noticed through the journal generation
+        db = endgame_db_module.EndgameDB(self.path)
+        db.add([], 0, 4, board_hash=4)
+        db.compact()
+        self.assertEqual((db._file_count, len(db.journal)), (4, 0))
+        self.assertEqual(os.path.getsize(db.journal_path), endgame_db_module.JOURNAL_HEADER.size)
+        db.close()
+        reader.refresh()
+        self.assertEqual(reader.count, 4)
+        self.assertEqual(reader.lookup([], 0, 4), 4)
+        reader.close()
+
+    def test_concurrent_writers(self):
+        code = (
+            "import sys, endgame_db as e; w = int(sys.argv[2]); db = e.EndgameDB(sys.argv[1]); "
+            "[db.add([], 0, w, board_hash=w * 1000 + i + 1) for i in range(500)]; "
+            "db.compact() if w == 2 else db.save()"
+        )
+        here = os.path.dirname(os.path.abspath(__file__))
+        procs = [subprocess.Popen([sys.executable, "-c", code, self.path, str(w)], cwd=here,
+                                  stdout=subprocess.DEVNULL) for w in range(4)]
+        self.assertEqual([p.wait() for p in procs], [0] * 4)
+        db = endgame_db_module.EndgameDB(self.path)
+        self.assertEqual(len(db), 2000)
+        self.assertEqual([db.lookup([], 0, w * 1000 + 500) for w in range(4)], [0, 1, 2, 3])
+        db.close()
+
+class TestTablebase(unittest.TestCase):
+
+    def test_ranking_is_a_bijection(self):
+        ranker = tablebase_module.Ranker(3)
+        ranks = sorted(
+            ranker.rank(pits)
+            for k in range(4)
+            for pits in tablebase_module._level(k)
+        )
+        self.assertEqual(ranks, list(range(ranker.size)))
+
+    def test_rejects_values_beyond_int8(self):
+        with self.assertRaises(ValueError):
+            tablebase_module.solve_all(tablebase_module.MAX_SUPPORTED_SEEDS + 1)
+
+    def test_values_match_exhaustive_search(self):
+        def solve(board, player):
+            if is_terminal(board):
+                final = cleanup_board(board)
+                return final[P1_STORE] - final[P2_STORE]
+            scores = []
+            for move in legal_moves(board, player):
+                child, extra = apply_move(board, move, player)
+                scores.append(solve(child, player if extra else 1 - player))
+            return max(scores) if player == 0 else min(scores)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tb.bin")
+            tablebase_module.generate(5, path, verbose=False)
+            tb = tablebase_module.Tablebase(path)
+            self.assertEqual(tb.max_seeds, 5)
+            
+            rng = random.Random(5)
+            for _ in range(200):
+                board = [0] * 14
+                for _ in range(rng.randint(1, 5)):
+                    board[rng.choice(P1_PITS + P2_PITS)] += 1
+                board[P1_STORE] = rng.randint(0, 30)
+                board[P2_STORE] = rng.randint(0, 30)
+                player = rng.randint(0, 1)
+                self.assertEqual(tb.probe(board, player), solve(board, player))
+            
+            self.assertIsNone(tb.probe(initial_state(), 0))
+            tb.close()
+
+class TestSolver(IsolatedDBTestCase):
+
+    def test_matches_exhaustive_values(self):
+        ranker = tablebase_module.Ranker(7)
+        values = tablebase_module.solve_all(7)
+        rng = random.Random(11)
+        for i in range(40):
+            pits = [0] * 12
+            for _ in range(rng.randint(2, 7)):
+                pits[rng.randrange(12)] += 1
+            if not sum(pits[:6]) or not sum(pits[6:]):
+                continue
+            player = rng.randint(0, 1)
+            own, opp = pits[:6] + [30], pits[6:] + [72 - 30 - sum(pits)]
+            board = own + opp if player == 0 else opp + own
+            result = solver.solve(board, player, guess=None if i < 3 else rng.randint(-20, 20), num_buckets=1 << 10)
+            gain = values[ranker.rank(pits)]
+            self.assertEqual(result.score, board[P1_STORE] - board[P2_STORE] + (gain if player == 0 else -gain))
+
+            # The line is legal and ends the game with the proven score
+            for move in result.line:
+                self.assertIn(move, legal_moves(board, player))
+                board, extra = apply_move(board, move, player)
+                player = player if extra else 1 - player
+            self.assertTrue(is_terminal(board))
+            final = cleanup_board(board)
+            self.assertEqual(final[P1_STORE] - final[P2_STORE], result.score)
+
+    def test_table_file_and_progress(self):
+        board = [0, 3, 1, 2, 1, 0, 35, 0, 2, 1, 1, 1, 2, 23]
+        reports = []
+        shared_db = solver.endgame_db
+        with tempfile.TemporaryDirectory() as tmp:
+            # A fresh endgame DB, so the second solve can only profit from the table file
+            solver.endgame_db = endgame_db_module.EndgameDB(os.path.join(tmp, "db.bin"), write_behind=False)
+            try:
+                path = os.path.join(tmp, "solver.tt")
+                first = solver.solve(board, 1, guess=0, num_buckets=1 << 12, tt_file=path, progress=reports.append)
+                self.assertEqual(os.path.getsize(path), solver.TT_HEADER.size + (1 << 17))
+                solver.endgame_db = endgame_db_module.EndgameDB(os.path.join(tmp, "db2.bin"), write_behind=False)
+                second = solver.solve(board, 1, guess=0, num_buckets=1 << 12, tt_file=path)
+            finally:
+                solver.endgame_db = shared_db
+        self.assertEqual(second.score, first.score)
+        self.assertEqual(second.line, first.line)
+        self.assertLess(second.nodes, first.nodes)
+        self.assertEqual(len([r for r in reports if r["phase"] == "probe"]), first.probes)
+        self.assertEqual((reports[-1]["phase"], reports[-1]["lower"], reports[-1]["upper"]), ("done", first.score, first.score))
+
+class TestOpeningBook(IsolatedDBTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "book.bin")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        super().tearDown()
+
+    def test_seeded_hasher_is_reproducible(self):
+        board = initial_state()
+        h1 = ZobristHasher(7).compute_hash(board, 0)
+        self.assertEqual(h1, ZobristHasher(7).compute_hash(board, 0))
+        self.assertNotEqual(h1, ZobristHasher(8).compute_hash(board, 0))
+
+    def test_generate_and_lookup(self):
+        count = opening_book_module.generate(plies=2, depth=3, strategy='basic', path=self.path, verbose=False)
+        book = opening_book_module.OpeningBook(self.path)
+        self.assertEqual(len(book), count)
+        
+        board = initial_state()
+        expected, _ = ai_engine.get_best_move(board, 0, depth=3, strategy='basic', use_book=False)
+        self.assertEqual(book.lookup(board, 0)[0], expected)
+        for move in legal_moves(board, 0):
+            child, extra = apply_move(board, move, 0)
+            self.assertIsNotNone(book.lookup(child, 0 if extra else 1))
+        # The mirror image (same pits, Player 1 to move) answers with the mirrored move
+        move, score = book.lookup(board, 0)
+        self.assertEqual(book.lookup(board, 1), (move + 7, -score))
+        self.assertIsNone(book.lookup([5, 7, 6, 6, 6, 6, 0, 6, 6, 6, 6, 6, 6, 0], 0))
+        
+        saved = ai_engine.opening_book
+        ai_engine.opening_book = book
+        try:
+            hits = ai_engine.BOOK_HITS
+            self.assertEqual(ai_engine.get_best_move(board, 0, depth=3, strategy='basic'), (expected, 0))
+            self.assertTrue(ai_engine.LAST_SEARCH_INFO["book_hit"])
+            self.assertEqual(ai_engine.BOOK_HITS, hits + 1)
+            # Deeper than the book or another strategy: searched normally
+            self.assertGreater(ai_engine.get_best_move(board, 0, depth=4, strategy='basic')[1], 0)
+            self.assertGreater(ai_engine.get_best_move(board, 0, depth=3, strategy='balanced')[1], 0)
+            self.assertEqual(ai_engine.BOOK_HITS, hits + 1)
+        finally:
+            ai_engine.opening_book = saved
+            book.close()
+
+    def test_key_collision_is_rejected(self):
+        board = initial_state()
+        mode = canonical.mode_for('basic')
+        hasher = ZobristHasher(opening_book_module.BOOK_SEED)
+        key = canonical.key(hasher, hasher.compute_hash(board), board, 0, mode)
+        other = [7, 5, 6, 6, 6, 6, 0, 6, 6, 6, 6, 6, 6, 0]
+        for position, expected in ((opening_book_module.book_position(other, 0, mode), None),
+                                   (opening_book_module.book_position(board, 0, mode), (2, 1.0))):
+            # Same key, stored position either another one (a collision) or the board's own
+            opening_book_module.write_book(self.path, {key: (2, 1.0, position)}, opening_book_module.BOOK_SEED, 3, 1, 'basic')
+            book = opening_book_module.OpeningBook(self.path)
+            self.assertEqual(book.lookup(board, 0), expected)
+            book.close()
+
+class TestPonder(IsolatedDBTestCase):
+
+    def test_predicted_positions(self):
+        board = initial_state()
+        positions = ponder.predicted_positions(board, 0, first_move=5)
+        self.assertEqual(positions[0], apply_move(board, 5, 0)[0])
+        # Pit 1 ends in the store: its extra-turn continuations are expanded instead
+        self.assertNotIn(apply_move(board, 0, 0)[0], positions)
+        self.assertIn(apply_move(apply_move(board, 0, 0)[0], 5, 0)[0], positions)
+        self.assertEqual(len(positions), len({tuple(p) for p in positions}))
+
+    def test_hit_and_miss(self):
+        board = initial_state()
+        p = ponder.Ponderer(depth=3, strategy='basic')
+        p.start(board, 0)
+        self.assertTrue(p.wait(30))
+        
+        # Human plays a pondered move: answered from the stored search
+        child = apply_move(board, 1, 0)[0]
+        move, _ = p.get_best_move(child, 1)
+        self.assertEqual(p.hits, 1)
+        self.assertIs(ponder.ai_engine, ai_engine)
+        info = ai_engine.LAST_SEARCH_INFO
+        self.assertTrue(info["ponder_hit"])
+        self.assertEqual(info["depth"], 3)
+        self.assertEqual(len(info["stats"].iterations), 1) # Fixed depth, not iterative deepening
+        # Same search path as the real search: the same value (moves can tie)
+        ai_engine.get_best_move(child, 1, depth=3, strategy='basic')
+        self.assertEqual(info["score"], ai_engine.LAST_SEARCH_INFO["score"])
+        
+        # Nothing pondered for the bot's next move: a plain search, not a miss
+        p.get_best_move(apply_move(child, move, 1)[0], 0)
+        self.assertEqual(p.misses, 0)
+
+class TestMCTS(unittest.TestCase):
+
+    def setUp(self):
+        mcts.reset_trees()
+
+    def test_takes_winning_capture(self):
+        # Pit 4 lands in empty pit 5 and captures the 10 seeds opposite (pit 7)
+        board = [2, 0, 0, 0, 1, 0, 20, 10, 0, 0, 0, 0, 1, 14]
+        move, iterations = mcts.get_best_move_mcts(board, 0, iterations=2000)
+        self.assertEqual(move, 4)
+        self.assertEqual(iterations, 2000)
+
+    def test_tree_reuse(self):
+        tree = mcts.MCTS(seed=1)
+        board = initial_state()
+        move, _ = tree.search(board, 0, iterations=2000)
+        child, extra = apply_move(board, move, 0)
+        _, info = tree.search(child, 0 if extra else 1, iterations=100)
+        self.assertGreater(info["reused"], 0)
+        self.assertEqual(tree.visits[tree.root], info["reused"] + 100)
+
+    def test_stop_event(self):
+        import threading
+        stop = threading.Event()
+        stop.set()
+        move, iterations = mcts.get_best_move_mcts(initial_state(), 0, iterations=10**6, stop_event=stop)
+        self.assertIn(move, legal_moves(initial_state(), 0))
+        self.assertEqual(iterations, mcts.PROGRESS_INTERVAL)
+
+@unittest.skipUnless(np is not None, "numpy not installed")
+class TestBatchedMCTS(unittest.TestCase):
+
+    def test_takes_winning_capture(self):
+        board = [2, 0, 0, 0, 1, 0, 20, 10, 0, 0, 0, 0, 1, 14]
+        tree = mcts.BatchedMCTS('random', batch_size=16, seed=1)
+        self.assertEqual(tree.search(board, 0, iterations=1000)[0], 4)
+
+    def test_virtual_loss_is_removed(self):
+        tree = mcts.BatchedMCTS('random', batch_size=64, seed=1)
+        _, info = tree.search(initial_state(), 0, iterations=640)
+        self.assertLessEqual(info["batches"], 10)
+        self.assertEqual(tree.visits[tree.root], 640)
+        # The whole first batch stops at the unexpanded root, later ones reach its children
+        self.assertEqual(sum(v for _, v, _ in tree.root_stats()), 640 - 64)
+        self.assertTrue(all(0.0 <= q <= 1.0 for _, _, q in tree.root_stats()))
+
+@unittest.skipUnless(np is not None, "numpy not installed")
+class TestBatchLogic(unittest.TestCase):
+
+    def random_positions(self, rng, count):
+        """Positions from random games plus random boards with big pits (full laps)."""
+        positions = []
+        while len(positions) < count:
+            board, player = initial_state(), rng.randint(0, 1)
+            while not is_terminal(board):
+                move = rng.choice(legal_moves(board, player))
+                positions.append((board, move, player))
+                board, extra = apply_move(board, move, player)
+                player = player if extra else 1 - player
+            board = [rng.randint(0, 30) for _ in range(14)]
+            player = rng.randint(0, 1)
+            if legal_moves(board, player):
+                positions.append((board, rng.choice(legal_moves(board, player)), player))
+        return positions[:count]
+
+    def test_matches_apply_move(self):
+        rng = random.Random(14)
+        positions = self.random_positions(rng, 5000)
+        boards = np.array([p[0] for p in positions], dtype=np.int32)
+        moves = np.array([p[1] for p in positions])
+        players = np.array([p[2] for p in positions])
+        
+        new_boards, extra, terminal = batch_logic.apply_moves_batch(boards, moves, players)
+        self.assertEqual(boards.tolist(), [p[0] for p in positions]) # Input untouched
+        for i, (board, move, player) in enumerate(positions):
+            expected, expected_extra = apply_move(board, move, player)
+            self.assertEqual(new_boards[i].tolist(), expected)
+            self.assertEqual(bool(extra[i]), expected_extra)
+            self.assertEqual(bool(terminal[i]), is_terminal(expected))
+
+    def test_legal_mask_and_cleanup(self):
+        rng = random.Random(15)
+        positions = self.random_positions(rng, 500)
+        boards = np.array([p[0] for p in positions], dtype=np.int32)
+        players = np.array([p[2] for p in positions])
+        mask = batch_logic.legal_moves_mask(boards, players)
+        cleaned = batch_logic.cleanup_boards(boards)
+        for i, (board, _, player) in enumerate(positions):
+            first = 0 if player == 0 else 7
+            self.assertEqual([first + j for j in range(6) if mask[i, j]], legal_moves(board, player))
+            self.assertEqual(cleaned[i].tolist(), cleanup_board(board))
+
+    def test_random_playouts(self):
+        results = batch_logic.random_playouts(batch_logic.initial_states(200), np.zeros(200, dtype=int), np.random.default_rng(0))
+        self.assertEqual(results.shape, (200,))
+        self.assertTrue(((results + 72) % 2 == 0).all()) # All 72 seeds end in the stores
+        self.assertTrue((abs(results) <= 72).all())
+
+class TestStartup(unittest.TestCase):
+
+    def test_entry_point_skips_heavy_imports(self):
+        # Fresh interpreter: the terminal entry point must not pull in the GUI/RL stacks
+        code = (
+            "import sys, kalaha.main, kalaha.endgame_db as db; "
+            "print([m for m in ('pygame', 'numpy', 'torch', 'sb3_contrib') if m in sys.modules], db.endgame_db.loaded)"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip().splitlines()[-1], "[] False")
+
 if __name__ == '__main__':
     unittest.main()
@@ -7,10 +7,7 @@ import os
 # Adjust path to import game_logic from parent directory
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-from kalaha.game_logic import (
-    initial_state, legal_moves, apply_move, is_terminal, 
-    evaluate, cleanup_board, P1_PITS, P2_PITS, P1_STORE, P2_STORE
-)
+from kalaha.game_logic import RuleSet, DEFAULT_RULES
 
 class KalahaEnv(gym.Env):
     """
@@ -29,11 +26,16 @@ class KalahaEnv(gym.Env):
     
     Action Space: Discrete(6)
         - 0-5 representing the 6 pits to sow from.
+
+    With another RuleSet (e.g. Kalah(4,4)) the same layout scales to its
+    pit count: observation Box(2 * pits + 3), action Discrete(pits).
     """
     metadata = {'render.modes': ['human']}
 
-    def __init__(self):
+    def __init__(self, rules: RuleSet = DEFAULT_RULES):
         super(KalahaEnv, self).__init__()
+        self.rules = rules
+        n = rules.pits
         
         # 14 pits + 1 extra info (optional, e.g., turn number or just flat 14)
         # User feedback suggested Box(15) with Player info, but Canonical View 
@@ -41,10 +43,10 @@ class KalahaEnv(gym.Env):
         # We will separate "Me" and "Opponent" strictly.
         
         self.observation_space = spaces.Box(
-            low=0, high=72, shape=(15,), dtype=np.int32
+            low=0, high=rules.total_seeds, shape=(2 * n + 3,), dtype=np.int32
         )
         
-        self.action_space = spaces.Discrete(6)
+        self.action_space = spaces.Discrete(n)
         
         self.board = None
         self.current_player = 0
@@ -53,7 +55,7 @@ class KalahaEnv(gym.Env):
 
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
-        self.board = initial_state()
+        self.board = self.rules.initial_state()
         self.current_player = 0
         self.move_count = 0
         return self._get_obs(), {}
@@ -67,9 +69,9 @@ class KalahaEnv(gym.Env):
         if self.current_player == 0:
             actual_move = action # 0-5
         else:
-            actual_move = action + 7 # 7-12
+            actual_move = action + self.rules.pits + 1 # 7-12
             
-        valid_moves = legal_moves(self.board, self.current_player)
+        valid_moves = self.rules.legal_moves(self.board, self.current_player)
         
         # Illegal Move Handling
         # In MaskablePPO this shouldn't happen, but if it does (e.g. standard PPO),
@@ -81,7 +83,7 @@ class KalahaEnv(gym.Env):
             return self._get_obs(), -10, True, False, {"error": "illegal_move"}
         
         # 2. Apply Move
-        self.board, extra_turn = apply_move(self.board, actual_move, self.current_player)
+        self.board, extra_turn = self.rules.apply_move(self.board, actual_move, self.current_player)
         self.move_count += 1
         
         reward = 0
@@ -89,11 +91,11 @@ class KalahaEnv(gym.Env):
         truncated = False
         
         # 3. Check for Game Over
-        if is_terminal(self.board):
+        if self.rules.is_terminal(self.board):
             terminated = True
-            self.board = cleanup_board(self.board)
-            p1_score = self.board[P1_STORE]
-            p2_score = self.board[P2_STORE]
+            self.board = self.rules.cleanup_board(self.board)
+            p1_score = self.board[self.rules.p1_store]
+            p2_score = self.board[self.rules.p2_store]
             
             # Reward logic: relative to who just moved? 
             # OR relative to self.current_player (the agent)?
@@ -128,22 +130,19 @@ class KalahaEnv(gym.Env):
         Returns Canonical View:
         Indices 0-6 represent 'Current Player', 7-13 'Opponent'.
         """
-        obs = np.zeros(15, dtype=np.int32)
+        n = self.rules.pits
+        obs = np.zeros(2 * n + 3, dtype=np.int32)
         
         if self.current_player == 0:
             # Me: 0-6 (P1), Opp: 7-13 (P2)
-            obs[0:6] = self.board[0:6]        # My Pits
-            obs[6] = self.board[P1_STORE]     # My Store
-            obs[7:13] = self.board[7:13]      # Opp Pits
-            obs[13] = self.board[P2_STORE]    # Opp Store
-            obs[14] = 0 # ID 0
+            obs[0:n + 1] = self.board[0:n + 1]          # My Pits + My Store
+            obs[n + 1:2 * n + 2] = self.board[n + 1:]   # Opp Pits + Opp Store
+            obs[2 * n + 2] = 0 # ID 0
         else:
             # Me: 7-13 (P2), Opp: 0-6 (P1)
-            obs[0:6] = self.board[7:13]       # My Pits
-            obs[6] = self.board[P2_STORE]     # My Store
-            obs[7:13] = self.board[0:6]       # Opp Pits
-            obs[13] = self.board[P1_STORE]    # Opp Store
-            obs[14] = 1 # ID 1
+            obs[0:n + 1] = self.board[n + 1:]           # My Pits + My Store
+            obs[n + 1:2 * n + 2] = self.board[0:n + 1]  # Opp Pits + Opp Store
+            obs[2 * n + 2] = 1 # ID 1
             
         return obs
 
@@ -153,12 +152,12 @@ class KalahaEnv(gym.Env):
         Used by sb3-contrib MaskablePPO.
         """
         # Action space is 0-5.
-        mask = [False] * 6
+        mask = [False] * self.rules.pits
         
         if self.current_player == 0:
-            pits = list(range(0, 6))
+            pits = self.rules.p1_pits
         else:
-            pits = list(range(7, 13))
+            pits = self.rules.p2_pits
             
         for i, pit_idx in enumerate(pits):
             if self.board[pit_idx] > 0:
@@ -0,0 +1,183 @@
+from typing import Any, Dict, Optional, Tuple
+
+# Bytes per entry: key word + data word
+ENTRY_BYTES = 16
+
+# Entry flags
+EXACT = 0
+LOWERBOUND = 1
+UPPERBOUND = 2
+
+# Each bucket holds two entries: slot 0 is depth-preferred, slot 1 is always-replace
+DEFAULT_BUCKETS = 1 << 17
+SLOTS_PER_BUCKET = 2
+
+# Packed data word layout (low to high bits):
+#   value (32, fixed point, offset) | depth (8) | flag (2) | generation (8) | move+1 (4)
+VALUE_SCALE = 1000
+VALUE_BITS = 32
+VALUE_OFFSET = 1 << (VALUE_BITS - 1)
+VALUE_LIMIT = (VALUE_OFFSET - 1) / VALUE_SCALE
+DEPTH_SHIFT = VALUE_BITS
+FLAG_SHIFT = DEPTH_SHIFT + 8
+GEN_SHIFT = FLAG_SHIFT + 2
+MOVE_SHIFT = GEN_SHIFT + 8
+VALUE_MASK = (1 << VALUE_BITS) - 1
+MAX_DEPTH = 0xFF
+GEN_MASK = 0xFF
+NO_MOVE = -1
+
+class TranspositionTable:
+    """
+    Fixed-capacity transposition table.
+
+    Entries are two 64-bit words stored in flat arrays: the packed data word
+    and the Zobrist key XORed with it, so a torn or foreign entry simply fails
+    the key check. Memory use is fixed at construction time.
+    
+    The table can live in a caller-provided buffer (e.g. the .buf of a
+    multiprocessing SharedMemory block of buffer_size(num_buckets) bytes),
+    which lets several processes probe and fill the same table lock-free.
+    """
+    def __init__(self, num_buckets: int = DEFAULT_BUCKETS, buffer: Optional[Any] = None) -> None:
+        if num_buckets <= 0 or num_buckets & (num_buckets - 1):
+            raise ValueError("num_buckets must be a power of two")
+        self.num_buckets = num_buckets
+        self.capacity = num_buckets * SLOTS_PER_BUCKET
+        self.bucket_mask = num_buckets - 1
+        
+        size = buffer_size(num_buckets)
+        if buffer is None:
+            buffer = bytearray(size)
+        self.raw = memoryview(buffer)[:size]
+        if len(self.raw) < size:
+            raise ValueError(f"buffer too small: {len(self.raw)} < {size} bytes")
+        half = size // 2
+        self.keys = self.raw[:half].cast('Q')
+        self.data = self.raw[half:].cast('Q')
+        self.generation = 0
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        self.probes = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0 # Misses where the bucket held other positions
+        self.stores = 0
+        self.overwrites = 0 # Stores that evicted a different position
+
+    def clear(self) -> None:
+        """
+        Drops every entry and resets counters and generation.
+        """
+        self.raw[:] = bytes(len(self.raw))
+        self.generation = 0
+        self.reset_counters()
+
+    def new_search(self) -> None:
+        """
+        Starts a new search generation: entries from older generations
+        become preferred victims for replacement.
+        """
+        self.generation = (self.generation + 1) & GEN_MASK
+
+    def probe(self, key: int) -> Optional[Tuple[float, int, int, int]]:
+        """
+        Returns (value, depth, flag, best_move) for key, or None on a miss.
+        best_move is NO_MOVE when the entry has none.
+        """
+        self.probes += 1
+        slot = (key & self.bucket_mask) * SLOTS_PER_BUCKET
+        keys = self.keys
+        data = self.data
+
+        for s in (slot, slot + 1):
+            d = data[s]
+            if keys[s] ^ d == key and d:
+                self.hits += 1
+                return (
+                    ((d & VALUE_MASK) - VALUE_OFFSET) / VALUE_SCALE,
+                    (d >> DEPTH_SHIFT) & MAX_DEPTH,
+                    (d >> FLAG_SHIFT) & 0x3,
+                    (d >> MOVE_SHIFT) - 1,
+                )
+
+        self.misses += 1
+        if data[slot] or data[slot + 1]:
+            self.collisions += 1
+        return None
+
+    def store(self, key: int, value: float, depth: int, flag: int, move: int = NO_MOVE) -> None:
+        """
+        Stores an entry. The depth-preferred slot is taken if it is empty,
+        holds the same position, is from an older generation or is not deeper;
+        otherwise the always-replace slot is used.
+        """
+        self.stores += 1
+        if value > VALUE_LIMIT:
+            value = VALUE_LIMIT
+        elif value < -VALUE_LIMIT:
+            value = -VALUE_LIMIT
+        if depth > MAX_DEPTH:
+            depth = MAX_DEPTH
+
+        d = (
+            (int(round(value * VALUE_SCALE)) + VALUE_OFFSET)
+            | (depth << DEPTH_SHIFT)
+            | (flag << FLAG_SHIFT)
+            | (self.generation << GEN_SHIFT)
+            | ((move + 1) << MOVE_SHIFT)
+        )
+
+        slot = (key & self.bucket_mask) * SLOTS_PER_BUCKET
+        keys = self.keys
+        data = self.data
+        old = data[slot]
+        old_key = keys[slot] ^ old
+
+        if not (
+            not old
+            or old_key == key
+            or ((old >> GEN_SHIFT) & GEN_MASK) != self.generation
+            or depth >= (old >> DEPTH_SHIFT) & MAX_DEPTH
+        ):
+            slot += 1
+            old = data[slot]
+            old_key = keys[slot] ^ old
+
+        if old and old_key != key:
+            self.overwrites += 1
+        data[slot] = d
+        keys[slot] = key ^ d
+
+    def usage(self) -> int:
+        """
+        Number of occupied entries (O(capacity), meant for reporting).
+        """
+        return sum(1 for d in self.data if d)
+
+    def release(self) -> None:
+        """
+        Releases the views on the buffer (needed before closing shared memory).
+        """
+        self.keys.release()
+        self.data.release()
+        self.raw.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "capacity": self.capacity,
+            "probes": self.probes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+            "generation": self.generation,
+        }
+
+def buffer_size(num_buckets: int) -> int:
+    """
+    Bytes needed to back a table with num_buckets buckets.
+    """
+    return num_buckets * SLOTS_PER_BUCKET * ENTRY_BYTES
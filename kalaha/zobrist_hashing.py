@@ -1,34 +1,133 @@
 import random
-from typing import List
+from typing import List, Optional, Tuple
+
+try:
+    from game_logic import RuleSet, DEFAULT_RULES
+except ImportError:
+    from kalaha.game_logic import RuleSet, DEFAULT_RULES
 
 # Constants for Zobrist
-NUM_PITS = 14
-MAX_SEEDS = 100 
+NUM_PITS = DEFAULT_RULES.total_pits
+MAX_SEEDS = 100 # Keys per pit (at least the ruleset's total seeds + 1)
+
+# Keys of the global hasher come from this fixed seed, so hashes are the same
+# in every process and can be stored on disk (endgame DB) or shared between
+# search processes. HASH_VERSION identifies how keys are derived from the
+# seed; bump it whenever that changes (table shape, MAX_SEEDS, draw order),
+# which makes stored hashes stale.
+ZOBRIST_SEED = 0x4B414C4148415A42
+HASH_VERSION = 2
+
+MASK64 = (1 << 64) - 1
 
 class ZobristHasher:
-    def __init__(self) -> None:
-        self.table: List[List[int]] = [[0] * MAX_SEEDS for _ in range(NUM_PITS)]
-        self.turn_hash: int = random.getrandbits(64)
+    """
+    Hashes the 12 pits only (stores and side to move are not part of the
+    hash) and from both points of view at once: the low 64 bits hash the
+    pits as Player 0 sees them, the high 64 bits as Player 1 sees them
+    (own pits first). canonical.py turns this into table keys, adding the
+    side to move (turn_keys) and stores (store_keys) where a key needs them.
+
+    Boards follow `rules` (default: the standard Kalah(6,6)).
+    """
+    def __init__(self, seed: Optional[int] = None, rules: RuleSet = DEFAULT_RULES) -> None:
+        """
+        seed=None draws fresh random keys; a fixed seed gives the same keys
+        in every process (needed for hashes stored on disk).
+        """
+        self.seed = seed
+        self.rules = rules
+        self.rng = random.Random(seed)
+        self.num_pits = rules.total_pits
+        self.max_seeds = max(MAX_SEEDS, rules.total_seeds + 1)
+        # MIRROR[i]: the pit that plays the role of pit i with the sides swapped
+        self.mirror = [(i + rules.pits + 1) % self.num_pits for i in range(self.num_pits)]
+        # SOW_POS[player][move][idx]: position of pit idx in the sowing order
+        # of `move` (sow_cycle for the skipped opponent store)
+        self.sow_pos = [
+            [[order.index(i) if i in order else rules.sow_cycle for i in range(self.num_pits)] for order in per_move]
+            for per_move in rules.sow_order
+        ]
+        self.table: List[List[int]] = [[0] * self.max_seeds for _ in range(self.num_pits)]
+        self.turn_keys: List[int] = [self.rng.getrandbits(64), self.rng.getrandbits(64)]
+        self.store_keys: List[List[int]] = [[self.rng.getrandbits(64) for _ in range(self.max_seeds)] for _ in rules.stores]
         self._init_table()
         
     def _init_table(self) -> None:
-        for i in range(NUM_PITS):
-            for j in range(MAX_SEEDS):
-                self.table[i][j] = random.getrandbits(64)
+        pit_keys = [[self.rng.getrandbits(64) for _ in range(self.max_seeds)] for _ in range(self.num_pits)]
+        for i in range(self.num_pits):
+            if i in self.rules.stores:
+                continue # Stores stay 0: XORing them is a no-op
+            for j in range(self.max_seeds):
+                self.table[i][j] = pit_keys[i][j] | (pit_keys[self.mirror[i]][j] << 64)
                 
-    def compute_hash(self, board: List[int], current_player: int) -> int:
+    def compute_hash(self, board: List[int], current_player: int = 0) -> int:
         """
-        Computes the Zobrist hash for a given board and player.
+        Computes the (pits-only, both views) hash of a board. The side to
+        move is not part of it; the argument is kept for symmetry with
+        apply_move.
         """
         h = 0
-        if current_player == 1: # If Player 2's turn
-            h ^= self.turn_hash
-            
         for idx, seeds in enumerate(board):
-            s = min(seeds, MAX_SEEDS - 1)
+            s = min(seeds, self.max_seeds - 1)
             h ^= self.table[idx][s]
             
         return h
 
+    def position_key(self, board: List[int], player: int) -> int:
+        """
+        64-bit key of the exact position: Player 0's view of the pits,
+        side to move and both stores.
+        """
+        return (self.compute_hash(board) & MASK64) ^ self.turn_keys[player] ^ self.store_hash(board)
+
+    def store_hash(self, board: List[int]) -> int:
+        """
+        XOR of the store keys of both stores.
+        """
+        s1, s2 = self.rules.stores
+        return self.store_keys[0][min(board[s1], self.max_seeds - 1)] ^ self.store_keys[1][min(board[s2], self.max_seeds - 1)]
+
+    def apply_move(self, board: List[int], board_hash: int, move: int, player: int) -> Tuple[List[int], bool, int]:
+        """
+        Applies a move and updates the hash incrementally.
+        Only the pits the move can touch are XORed (sown pits, the origin,
+        and on a capture the opposite pit).
+        Returns: (new_board, extra_turn_boolean, new_hash)
+        """
+        rules = self.rules
+        new_board, extra = rules.apply_move(board, move, player)
+        table = self.table
+        seeds = board[move]
+        order = rules.sow_order[player][move]
+        h = board_hash
+        
+        # Seeds never exceed the total in play, so no max_seeds clamp is needed here
+        if seeds >= rules.sow_cycle:
+            # At least one full lap: every pit but the opponent store changed
+            for idx in order:
+                h ^= table[idx][board[idx]] ^ table[idx][new_board[idx]]
+        else:
+            h ^= table[move][seeds] ^ table[move][0]
+            for idx in order[:seeds]:
+                h ^= table[idx][board[idx]] ^ table[idx][new_board[idx]]
+                
+            if not extra:
+                last = rules.last_pit[player][move][seeds]
+                if new_board[last] == 0:
+                    # Capture: the opposite pit may lie outside the sown path
+                    opposite = rules.opposite[last]
+                    if self.sow_pos[player][move][opposite] >= seeds:
+                        h ^= table[opposite][board[opposite]] ^ table[opposite][0]
+            
+        return new_board, extra, h
+
+    @property
+    def key_version(self) -> int:
+        """
+        HASH_VERSION for seeded keys, 0 for random ones (not reproducible).
+        """
+        return HASH_VERSION if self.seed is not None else 0
+
 # Global instance
-zobrist = ZobristHasher()
+zobrist = ZobristHasher(ZOBRIST_SEED)
@@ -9,6 +9,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from kalaha.game_logic import initial_state, apply_move, is_terminal, cleanup_board
 from kalaha.ai_engine import get_best_move
+from kalaha.mcts import get_best_move_mcts, reset_trees, ITERATIONS_PER_DEPTH, ROLLOUT_POLICIES, BATCH_EVALUATORS
 from sb3_contrib import MaskablePPO # type: ignore
 
 RESULTS_FILE = os.path.join(os.path.dirname(__file__), "test_results.json")
@@ -46,14 +47,18 @@ def get_rl_move(model: MaskablePPO, board: list, player: int) -> int:
     action, _ = model.predict(obs, action_masks=mask, deterministic=True)
     return int(action) if player == 0 else int(action + 7)
 
-def play_game(agent_player: int, bot_depth: int, bot_strategy: str = 'balanced') -> Dict[str, Any]:
+def play_game(agent_player: int, bot_depth: int, bot_strategy: str = 'balanced', workers: int = 1,
+              rollout: str = 'random', batch_size: Optional[int] = None) -> Dict[str, Any]:
     """
-    Play a single game: RL Agent vs Minimax Bot
+    Play a single game: RL Agent vs Minimax (or MCTS) Bot
     
     Args:
         agent_player: 0 if agent is P1, 1 if agent is P2
-        bot_depth: Minimax search depth
-        bot_strategy: Bot strategy (basic, balanced, aggressive, defensive)
+        bot_depth: Minimax search depth (MCTS: depth * ITERATIONS_PER_DEPTH simulations)
+        bot_strategy: Bot strategy (basic, balanced, aggressive, defensive, mcts)
+        workers: Processes for the bot's search (lazy SMP when > 1)
+        rollout: MCTS rollout policy (only for bot_strategy 'mcts')
+        batch_size: Leaves per batched MCTS evaluation (None: plain MCTS)
     
     Returns:
         Game result dictionary
@@ -65,6 +70,7 @@ def play_game(agent_player: int, bot_depth: int, bot_strategy: str = 'balanced')
     board = initial_state()
     current_player = 0
     move_count = 0
+    reset_trees() # MCTS trees are only reused within a game
     
     while not is_terminal(board):
         if current_player == agent_player:
@@ -72,7 +78,11 @@ def play_game(agent_player: int, bot_depth: int, bot_strategy: str = 'balanced')
             move = get_rl_move(model, board, current_player)
         else:
             # Bot move
-            move, _ = get_best_move(board, current_player, depth=bot_depth, strategy=bot_strategy)
+            if bot_strategy == 'mcts':
+                move, _ = get_best_move_mcts(board, current_player, iterations=bot_depth * ITERATIONS_PER_DEPTH,
+                                             rollout=rollout, batch_size=batch_size)
+            else:
+                move, _ = get_best_move(board, current_player, depth=bot_depth, strategy=bot_strategy, workers=workers)
             if move is None:
                 break
         
@@ -121,7 +131,8 @@ def save_result(result: Dict[str, Any]) -> None:
     with open(RESULTS_FILE, 'w') as f:
         json.dump(results, f, indent=2)
 
-def benchmark_single(agent_player: int = 0, bot_depth: int = 6, bot_strategy: str = 'balanced', num_games: int = 100) -> Dict[str, Any]:
+def benchmark_single(agent_player: int = 0, bot_depth: int = 6, bot_strategy: str = 'balanced', num_games: int = 100, workers: int = 1,
+                     rollout: str = 'random', batch_size: Optional[int] = None) -> Dict[str, Any]:
     """
     Benchmark RL agent vs a specific bot configuration
     
@@ -130,6 +141,9 @@ def benchmark_single(agent_player: int = 0, bot_depth: int = 6, bot_strategy: st
         bot_depth: Minimax depth
         bot_strategy: Bot strategy
         num_games: Number of games to play
+        workers: Processes for the bot's search (lazy SMP when > 1)
+        rollout: MCTS rollout policy (only for bot_strategy 'mcts')
+        batch_size: Leaves per batched MCTS evaluation (None: plain MCTS)
     
     Returns:
         Summary statistics
@@ -145,7 +159,7 @@ def benchmark_single(agent_player: int = 0, bot_depth: int = 6, bot_strategy: st
     total_moves = 0
     
     for i in range(num_games):
-        result = play_game(agent_player, bot_depth, bot_strategy)
+        result = play_game(agent_player, bot_depth, bot_strategy, workers, rollout, batch_size)
         
         if "error" in result:
             print(f"Error: {result['error']}")
@@ -206,10 +220,16 @@ if __name__ == "__main__":
     parser.add_argument("--depth", type=int, default=6,
                        help="Minimax search depth (1-20)")
     parser.add_argument("--strategy", type=str, default="balanced",
-                       choices=["basic", "balanced", "aggressive", "defensive"],
-                       help="Bot strategy")
+                       choices=["basic", "balanced", "aggressive", "defensive", "mcts"],
+                       help="Bot strategy ('mcts' runs depth * %d MCTS simulations)" % ITERATIONS_PER_DEPTH)
     parser.add_argument("--games", type=int, default=100,
                        help="Number of games to play")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="Search processes for the bot (lazy SMP when > 1)")
+    parser.add_argument("--rollout", type=str, default="random", choices=list(ROLLOUT_POLICIES),
+                       help="MCTS rollout policy (with --strategy mcts)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                       help="Evaluate MCTS leaves in batches of this size (rollout %s)" % " or ".join(BATCH_EVALUATORS))
     
     args = parser.parse_args()
     
@@ -217,5 +237,8 @@ if __name__ == "__main__":
         agent_player=args.agent_player,
         bot_depth=args.depth,
         bot_strategy=args.strategy,
-        num_games=args.games
+        num_games=args.games,
+        workers=args.workers,
+        rollout=args.rollout,
+        batch_size=args.batch_size
     )
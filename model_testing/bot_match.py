@@ -0,0 +1,104 @@
+import os
+import sys
+import random
+import time
+from typing import Dict, Any, List
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from kalaha.game_logic import initial_state, legal_moves, apply_move, is_terminal, cleanup_board
+from kalaha import ai_engine
+
+def play_game(bots: List[Dict[str, Any]], opening: List[int], first: int) -> Dict[str, Any]:
+    """
+    Play one game between two minimax configurations.
+    
+    Args:
+        bots: get_best_move keyword arguments for bot A and bot B
+        opening: Random opening moves (indices into the legal moves) played first
+        first: Which bot (0 = A, 1 = B) plays Player 1
+    
+    Returns:
+        Margin from bot A's view, plus time and nodes per bot
+    """
+    board = initial_state()
+    player = 0
+    for choice in opening:
+        moves = legal_moves(board, player)
+        board, extra = apply_move(board, moves[choice % len(moves)], player)
+        player = player if extra else 1 - player
+        if is_terminal(board):
+            break
+    
+    times = [0.0, 0.0]
+    nodes = [0, 0]
+    while not is_terminal(board):
+        bot = first if player == 0 else 1 - first
+        # Both bots share the engine's tables: start every search from a clean state
+        ai_engine.reset_search_state()
+        start = time.perf_counter()
+        move, n = ai_engine.get_best_move(board, player, use_book=False, **bots[bot])
+        times[bot] += time.perf_counter() - start
+        nodes[bot] += n
+        board, extra = apply_move(board, move, player)
+        player = player if extra else 1 - player
+    
+    final = cleanup_board(board)
+    margin = final[6] - final[13]
+    return {"margin": margin if first == 0 else -margin, "times": times, "nodes": nodes}
+
+def run_match(bot_a: Dict[str, Any], bot_b: Dict[str, Any], openings: int = 12, opening_plies: int = 2,
+              seed: int = 1) -> Dict[str, Any]:
+    """
+    Plays every random opening twice, once with each bot moving first.
+    Returns bot A's wins/losses/draws and the time and nodes of both bots.
+    """
+    rng = random.Random(seed)
+    summary = {"wins": 0, "losses": 0, "draws": 0, "times": [0.0, 0.0], "nodes": [0, 0]}
+    for _ in range(openings):
+        opening = [rng.randrange(6) for _ in range(opening_plies)]
+        for first in (0, 1):
+            result = play_game([bot_a, bot_b], opening, first)
+            if result["margin"] > 0:
+                summary["wins"] += 1
+            elif result["margin"] < 0:
+                summary["losses"] += 1
+            else:
+                summary["draws"] += 1
+            for i in (0, 1):
+                summary["times"][i] += result["times"][i]
+                summary["nodes"][i] += result["nodes"][i]
+    
+    print(f"A {bot_a} vs B {bot_b}")
+    print(f"  A: {summary['wins']} wins, {summary['losses']} losses, {summary['draws']} draws")
+    print(f"  Time: A {summary['times'][0]:.1f}s, B {summary['times'][1]:.1f}s | "
+          f"Nodes: A {summary['nodes'][0]}, B {summary['nodes'][1]}")
+    return summary
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Play two minimax bot configurations against each other")
+    for side in ("a", "b"):
+        parser.add_argument(f"--depth-{side}", type=int, default=4,
+                           help=f"Search depth of bot {side.upper()}")
+        parser.add_argument(f"--strategy-{side}", type=str, default="balanced",
+                           choices=["basic", "balanced", "aggressive", "defensive"],
+                           help=f"Strategy of bot {side.upper()}")
+        parser.add_argument(f"--search-{side}", type=str, default="alphabeta", choices=list(ai_engine.SEARCH_ALGORITHMS),
+                           help=f"Search algorithm of bot {side.upper()}")
+        parser.add_argument(f"--quiescence-{side}", action="store_true",
+                           help=f"Quiescence search at bot {side.upper()}'s horizon")
+    parser.add_argument("--openings", type=int, default=12,
+                       help="Random openings, each played with both colours")
+    parser.add_argument("--seed", type=int, default=1,
+                       help="Seed for the random openings")
+    
+    args = parser.parse_args()
+    
+    bots = [
+        {"depth": getattr(args, f"depth_{side}"), "strategy": getattr(args, f"strategy_{side}"),
+         "search": getattr(args, f"search_{side}"), "quiescence": getattr(args, f"quiescence_{side}")}
+        for side in ("a", "b")
+    ]
+    run_match(bots[0], bots[1], args.openings, seed=args.seed)
@@ -1,6 +1,6 @@
 import os
 import sys
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from benchmark_bot import benchmark_single
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -11,40 +11,49 @@ DIFFICULTY_CONFIGS = [
     {"name": "Beginner", "depth": 2, "strategy": "basic"},
     {"name": "Easy", "depth": 4, "strategy": "balanced"},
     {"name": "Medium", "depth": 6, "strategy": "balanced"},
-    # {"name": "Hard", "depth": 10, "strategy": "balanced"},
-    # {"name": "Hell", "depth": 14, "strategy": "aggressive"},
-    # {"name": "Endgame Master", "depth": 8, "strategy": "defensive"},
+    {"name": "Endgame Master", "depth": 8, "strategy": "defensive"},
+    # Deep configs: run them with --workers set to the machine's cores. A single
+    # depth-14 move takes minutes on one core, so Hell only runs when asked for
+    # (--max-depth 14)
+    {"name": "Hard", "depth": 10, "strategy": "balanced"},
+    {"name": "Hell", "depth": 14, "strategy": "aggressive"},
 ]
+DEFAULT_MAX_DEPTH = 10
 
-def evaluate_all_difficulties(num_games: int = 50, agent_as_p1: bool = True) -> List[Dict[str, Any]]:
+def evaluate_all_difficulties(num_games: int = 50, agent_as_p1: bool = True, workers: int = 1,
+                              max_depth: Optional[int] = DEFAULT_MAX_DEPTH) -> List[Dict[str, Any]]:
     """
     Evaluate RL agent against all difficulty levels
     
     Args:
         num_games: Number of games per difficulty
         agent_as_p1: If True, agent plays as Player 1
+        workers: Search processes per bot move (use the cores for deep configs)
+        max_depth: Skip configurations searching deeper than this (None: run all)
     
     Returns:
         List of benchmark results
     """
     results = []
     agent_player = 0 if agent_as_p1 else 1
+    configs = [c for c in DIFFICULTY_CONFIGS if max_depth is None or c['depth'] <= max_depth]
     
     print("\n" + "="*70)
     print(f"FULL EVALUATION: RL Agent as Player {agent_player + 1}")
-    print(f"Testing against {len(DIFFICULTY_CONFIGS)} difficulty levels")
+    print(f"Testing against {len(configs)} difficulty levels")
     print(f"{num_games} games per difficulty")
     print("="*70)
     
-    for i, config in enumerate(DIFFICULTY_CONFIGS, 1):
-        print(f"\n[{i}/{len(DIFFICULTY_CONFIGS)}] Testing: {config['name']}")
+    for i, config in enumerate(configs, 1):
+        print(f"\n[{i}/{len(configs)}] Testing: {config['name']}")
         print("-" * 70)
         
         result = benchmark_single(
             agent_player=agent_player,
             bot_depth=config['depth'],
             bot_strategy=config['strategy'],
-            num_games=num_games
+            num_games=num_games,
+            workers=workers
         )
         
         if result:
@@ -96,10 +105,16 @@ if __name__ == "__main__":
                        help="Number of games per difficulty (default: 50)")
     parser.add_argument("--agent-p2", action="store_true",
                        help="Agent plays as Player 2 (default: Player 1)")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="Search processes per bot move (default: 1)")
+    parser.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH,
+                       help=f"Skip difficulties searching deeper than this (default: {DEFAULT_MAX_DEPTH}; 14 adds Hell)")
     
     args = parser.parse_args()
     
     evaluate_all_difficulties(
         num_games=args.games,
-        agent_as_p1=not args.agent_p2
+        agent_as_p1=not args.agent_p2,
+        workers=args.workers,
+        max_depth=args.max_depth
     )